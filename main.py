@@ -1,8 +1,11 @@
 import sys
 import os
-import time
 import shutil
 import argparse
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from os import getenv, mkdir
 from os.path import expandvars, exists, join
 from dataclasses import dataclass, field, fields
@@ -12,19 +15,59 @@ from packaging.version import Version
 import dotenv
 
 from utils.avalon import Avalon
+from utils import log_backend
 from utils.dataclass_util import load_dataclass_from_env, expandvars_fields
+from utils.qb_wait import TorrentWaiter
+from utils.bt_backup import new_backup_dir, snapshot_bt_backup
+from utils import fastresume
+from utils.torrent_cache import TorrentStateCache
+from utils.async_engine import AsyncEngineUnavailable, run_async_engine
+from utils.bencode import add_missing_trackers, torrent_trackers
+from utils.journal import TORRENT_FIELDS, TorrentJournal
+from utils.metrics import ProgressReporter, RunMetrics
+from utils.qb_client import ConnectionConfig, create_client
+from utils.concurrency import AdaptiveLimiter
+from utils.selector import DEFAULT_SELECTOR, SelectorError, TorrentSelector
+from utils.preflight import PathMapper, PreflightChecker
+from utils.content_index import ContentIndex
+from utils.spot_check import SpotChecker
+from utils.verify import VerifyEngine
+from utils.verify_cache import VerifyCache
+from utils.plan import DEFAULT_LATENCY, PLAN_VERSION, estimate_cost, load_plan, plan_torrent_dir, save_plan
 
 
-@expandvars_fields("backup_path")
+@expandvars_fields("backup_path", "metrics_file", "log_file")
 @dataclass
-class Config:
-    """存储从环境变量加载的 qBittorrent 配置。"""
-    host: str = "http://127.0.0.1"
-    port: int = 8080
-    username: str = ""
-    password: str = ""
+class Config(ConnectionConfig):
+    """存储从环境变量加载的 qBittorrent 配置（连接相关的字段见 ConnectionConfig）。"""
     backup_path: str = field(
         default_factory=lambda: expandvars(getenv("QB_BACKUP_PATH_DEFAULT", r"%LOCALAPPDATA%\qBittorrent\BT_backup")))
+    selector: str = DEFAULT_SELECTOR  # 目标种子的筛选表达式，语法见 utils/selector.py
+    workers: int = 1  # 并发处理种子的线程数，1 表示逐个处理
+    max_pending: int = 8  # 同一时刻最多允许多少个种子处于“已删除但尚未重新添加”的状态
+    wait_timeout: float = 10.0  # 等待种子删除/添加生效的超时时间（秒）
+    backup_hardlink: bool = False  # 旧版 API 备份 BT_backup 时使用硬链接代替复制（需确认 qBittorrent 不会原地改写这些文件）
+    in_memory: bool = False  # 导出的种子直接在内存中重新添加，仅在添加失败时才写入临时目录
+    batch_add: bool = False  # 按添加参数分组，每组只用一次 torrents_add 请求重新添加
+    bulk_delete: bool = False  # 先导出整批种子，再用一次 torrents_delete 请求删除整批
+    chunk_size: int = 20  # 批量添加/批量删除模式下每批处理的种子数
+    watch_interval: float = 5.0  # 监视模式下检查新种子的间隔（秒）
+    async_engine: bool = False  # 使用基于 asyncio 的引擎，并发上限同 workers（需要 aiohttp）
+    journal: bool = True  # 记录每个种子的处理阶段，进程中断后下次运行时自动恢复未完成的种子
+    metrics_file: str = ""  # 运行结束时把指标写入该文件，.json 结尾为 JSON，否则为 Prometheus 文本格式
+    progress_interval: float = 10.0  # 每隔多少秒输出一行进度、速率和预计剩余时间，0 表示不输出
+    log_level: str = "info"  # 最低输出的日志级别：debug、info、warning、error
+    log_file: str = ""  # 额外把日志以 JSON Lines 格式追加写入该文件
+    adaptive: bool = False  # 根据导出/添加请求的延迟自动调整同时处理的种子数，上限为 workers（workers 为 1 时为 16）
+    target_latency: float = 0.5  # 自适应并发的目标延迟（秒），导出/添加请求的平滑延迟超过该值时减少并发
+    preflight: bool = False  # 删除前检查种子的文件在本机是否存在、大小是否一致，不一致的种子跳过
+    spot_check: int = 0  # 删除前按分块哈希抽查本机文件时每个种子抽查的随机分块数，0 表示不抽查
+    verify: bool = False  # 删除前在本机用多进程完整校验种子内容，只有校验通过的种子才会跳过校验重新添加
+    verify_processes: int = 0  # 完整校验的进程数，0 表示按 CPU 核数
+    verify_cache: bool = True  # 把抽查/完整校验通过的文件记录到 ./temp/verify_cache.sqlite3，辅种共用的文件未改动时不再重复读取
+    verify_cache_size: int = 100000  # 校验缓存最多保留的文件记录数，超过时淘汰最久未使用的记录
+    sibling_check: bool = False  # 删除前查找覆盖全部文件、正在做种的兄弟种子，找到的免于抽查和校验，找不到且未开启抽查或校验的跳过
+    path_map: str = ""  # qBittorrent 路径到本机路径的映射，如 "/downloads=/mnt/nas/downloads;D:\\=/mnt/d"
 
 
 class QBittorrentSkipCheck:
@@ -33,15 +76,55 @@ class QBittorrentSkipCheck:
         self.config = config
         self.qbt_client = None
         self.temp_dir = "./temp"
-        self.temp_backup_dir = "./temp_BT_Backup"
+        self.temp_backup_dir = "./temp_BT_Backup"  # 旧版 API 时每批种子在其下单独备份
         self.use_new_export_api = True
         self.processed_count = 0
         self.failed_count = 0
+        self.skipped_count = 0
+        self._stop_event = threading.Event()
+        self._count_lock = threading.Lock()
+        # 限制处于“已删除、未重新添加”状态的种子数量，避免并发时大量种子同时从客户端中消失
+        self._pending_slots = threading.BoundedSemaphore(max(1, self.config.max_pending))
+        try:
+            self.selector = TorrentSelector.parse(self.config.selector)
+            self.path_mapper = PathMapper.parse(self.config.path_map)
+        except ValueError as e:
+            Avalon.error(str(e))
+            sys.exit(1)
+        self.metrics = RunMetrics()
+        self.progress = ProgressReporter(self.config.progress_interval)
+        self.limiter = None
+        self._limiter_used = False  # 是否有种子经过自适应并发处理（异步引擎和分批处理模式不使用）
+        self._limiter_warned = False
+        self._planned = {}  # 执行计划时：hash -> 计划中已导出的种子文件
+        if self.config.adaptive:
+            workers = self.config.workers
+            self.limiter = AdaptiveLimiter(maximum=workers if workers > 1 else 16,
+                                           target_latency=self.config.target_latency)
+            self.metrics.add_listener(self._feed_limiter)
 
         self._setup_working_directory()
         self._create_temp_directory()
-        self.qbt_client = self._login_qbittorrent()
+        self.journal = TorrentJournal(join(self.temp_dir, "journal.jsonl")) if self.config.journal else None
+        self.qbt_client = self.metrics.instrument_client(self._login_qbittorrent())
         self._check_qbittorrent_version()
+        self.waiter = TorrentWaiter(self.qbt_client, timeout=self.config.wait_timeout)
+        self.torrent_cache = TorrentStateCache(self.qbt_client)
+        self.preflight = self._create_preflight_checker() if self.config.preflight else None
+        self.content_index = ContentIndex(self.qbt_client, self.torrent_cache,
+                                          workers=max(8, self.config.workers)) if self.config.sibling_check else None
+        self._siblings = {}  # 当前批次中找到兄弟种子的目标：hash -> 兄弟种子 hash
+        self.verify_cache = None
+        if self.config.verify_cache and (self.config.spot_check > 0 or self.config.verify):
+            self.verify_cache = VerifyCache(join(self.temp_dir, "verify_cache.sqlite3"), self.config.verify_cache_size)
+        self.spot_checker = SpotChecker(self.config.spot_check, self.path_mapper,
+                                        cache=self.verify_cache) if self.config.spot_check > 0 else None
+        self.verifier = VerifyEngine(self.config.verify_processes or None, self.path_mapper,
+                                     cache=self.verify_cache) if self.config.verify else None
+
+    def _create_preflight_checker(self):
+        # 连接池至少有 10 个连接，检查线程数不超过连接池大小
+        return PreflightChecker(self.qbt_client, self.path_mapper, workers=max(8, self.config.workers))
 
     def _setup_working_directory(self):
         """设置工作目录到脚本所在位置"""
@@ -64,13 +147,8 @@ class QBittorrentSkipCheck:
     def _login_qbittorrent(self):
         """登录 qBittorrent Web UI"""
         Avalon.info("尝试登录 Web UI……", front="\n")
-        conn_info = dict(
-            host=self.config.host,
-            port=self.config.port,
-            username=self.config.username,
-            password=self.config.password
-        )
-        qbc = qbittorrentapi.Client(**conn_info)
+        concurrency = self.limiter.maximum if self.limiter is not None else max(1, self.config.workers)
+        qbc = create_client(self.config, concurrency=concurrency)
         try:
             qbc.auth_log_in()
             Avalon.info(f"{self.config.host} 连接成功！")
@@ -99,6 +177,8 @@ class QBittorrentSkipCheck:
                         Avalon.error(f"旧版 API 需要的 BT_backup 文件夹不存在于：{self.config.backup_path}")
                         sys.exit(1)
                     Avalon.info(f"将使用旧版 API，从 {self.config.backup_path} 复制文件。")
+                    if self.config.async_engine:
+                        Avalon.warning("异步引擎不支持旧版 API，将改用同步方式处理。")
                 else:
                     Avalon.info("操作已取消，因为需要旧版 API 但用户拒绝。")
                     sys.exit(0)
@@ -106,41 +186,431 @@ class QBittorrentSkipCheck:
             Avalon.error(f"检查 qBittorrent 版本时出错: {e}")
             sys.exit(1)
 
-    def _backup_bt_backup_folder(self):
-        """备份 BT_backup 文件夹（旧版 API 使用）"""
-        if not self.use_new_export_api:
-            try:
-                if exists(self.temp_backup_dir):
-                    shutil.rmtree(self.temp_backup_dir)
-                shutil.copytree(self.config.backup_path, self.temp_backup_dir, dirs_exist_ok=True)
-                Avalon.info(f"已备份种子文件夹：{self.config.backup_path} 到 {self.temp_backup_dir}")
-            except Exception as e:
-                Avalon.error(f"备份 BT_backup 文件夹时出错: {e}")
-                sys.exit(1)
+    def _backup_bt_backup_folder(self, target_torrents):
+        """
+        备份 BT_backup 中目标种子的文件（旧版 API 使用），返回备份目录。
+        每批种子使用单独的目录，监视模式下后续批次不会覆盖之前批次的备份。
+        """
+        if self.use_new_export_api:
+            return None
+        backup_dir = new_backup_dir(self.temp_backup_dir)
+        try:
+            manifest = snapshot_bt_backup(self.config.backup_path, backup_dir,
+                                          [t['hash'] for t in target_torrents if t.get('hash')],
+                                          hardlink=self.config.backup_hardlink)
+            Avalon.info(f"已从种子文件夹 {self.config.backup_path} 备份 {len(manifest['files'])} 个文件"
+                        f"到 {backup_dir}（清单：manifest.json）")
+            if manifest['missing']:
+                Avalon.warning(f"种子文件夹中缺少 {len(manifest['missing'])} 个文件，未能备份。")
+        except Exception as e:
+            Avalon.error(f"备份 BT_backup 文件夹时出错: {e}")
+            sys.exit(1)
+        return backup_dir
+
+    def _release_bt_backup(self, backup_dir, failed_before):
+        """本批种子全部处理成功（均已确认重新添加）后删除其备份，有失败时保留备份供还原"""
+        if backup_dir is None:
+            return
+        if self.failed_count > failed_before:
+            Avalon.warning(f"本批有 {self.failed_count - failed_before} 个种子处理失败，保留备份 {backup_dir}，"
+                           f"如需还原可执行 python -m utils.bt_backup restore {backup_dir}")
+            return
+        try:
+            shutil.rmtree(backup_dir)
+        except OSError as e:
+            Avalon.warning(f"清理备份目录 {backup_dir} 时出错: {e}")
 
     def process_torrents(self):
         """处理符合条件的种子"""
+        self._resume_from_journal()
         target_torrents = self._get_target_torrents()
         if not target_torrents:
             Avalon.info("没有需要处理的种子。")
+            self._cleanup()
+            self._write_metrics_file()
             return
 
-        self._backup_bt_backup_folder()
+        self._process_target_torrents(target_torrents)
+
+        self._cleanup()
+        self._print_summary()
+
+    def watch(self):
+        """常驻监视模式：保持同一会话，持续发现新暂停的辅种并分批处理，收到 SIGTERM/SIGINT 后处理完当前批次再退出"""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._on_stop_signal)
+
+        interval = self.config.watch_interval
+        batch_size = max(1, self.config.chunk_size)
+        attempted = set()  # 已处理过、仍符合筛选条件的种子（通常是处理失败或跳过的），不再反复重试
+        Avalon.info(f"进入监视模式，每 {interval} 秒检查一次新种子，按 Ctrl+C 或发送 SIGTERM 退出。")
+        self._resume_from_journal()
+
+        while not self._stop_event.is_set():
+            try:
+                matching = self._find_target_torrents(incremental=True)
+                # 已不再符合条件的种子（成功重新添加后不再暂停、已被删除等）无需继续记录，避免常驻时集合无限增长
+                attempted &= {t.get('hash') for t in matching}
+                target_torrents = [t for t in matching if t.get('hash') not in attempted]
+            except (qbittorrentapi.exceptions.Forbidden403Error, qbittorrentapi.exceptions.LoginFailed):
+                self._relogin()
+                target_torrents = []
+            except Exception as e:
+                Avalon.warning(f"获取种子信息时出错，稍后重试: {e}")
+                target_torrents = []
+
+            for i in range(0, len(target_torrents), batch_size):
+                if self._stop_event.is_set():
+                    break
+                batch = target_torrents[i:i + batch_size]
+                attempted.update(t['hash'] for t in batch)
+                Avalon.info(f"发现 {len(batch)} 个新的待处理种子。", front="\n")
+                self._process_target_torrents(batch)
+                self._write_metrics_file()
+
+            self._stop_event.wait(interval)
+
+        Avalon.info("收到退出信号，正在退出监视模式……", front="\n")
+        self._cleanup()
+        self._print_summary()
+
+    def plan(self, plan_path):
+        """
+        只读地生成处理计划：导出目标种子并补全 tracker、按添加参数分组、检查内容文件，
+        按实测延迟估算执行所需的 API 调用次数和耗时，写入 JSON，不删除任何种子
+        """
+        pending = self.journal.pending() if self.journal is not None else []
+        if pending:
+            Avalon.warning(f"处理日志中有 {len(pending)} 个上次运行未完成的种子，将在下次正常运行或执行计划时恢复。")
+        target_torrents = [t for t in self._get_target_torrents() if t.get('hash')]
+        torrent_dir = plan_torrent_dir(plan_path)
+        os.makedirs(torrent_dir, exist_ok=True)
+
+        workers = max(1, self.config.workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plan") as executor:
+            items = list(executor.map(lambda t: self._plan_torrent(t, torrent_dir), target_torrents))
+        targets = [item for item in items if item is not None]
+        with self.metrics.phase('preflight'):
+            problems = (self.preflight or self._create_preflight_checker()).check(targets)
+        for item in targets:
+            item['file_problem'] = problems[item['hash']]
+
+        plan = {
+            "version": PLAN_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "host": f"{self.config.host}:{self.config.port}",
+            "options": {"workers": workers, "in_memory": self.config.in_memory, "batch_add": self.config.batch_add,
+                        "bulk_delete": self.config.bulk_delete, "chunk_size": self.config.chunk_size},
+            "targets": targets,
+            "groups": self._plan_groups(targets),
+            "estimate": self._estimate_plan_cost(targets),
+        }
+        try:
+            save_plan(plan_path, plan)
+        except OSError as e:
+            Avalon.error(f"写入计划文件 {plan_path} 失败: {e}")
+            sys.exit(1)
+
+        self._cleanup()
+        self._print_plan(plan, plan_path, failed=len(target_torrents) - len(targets))
+        self._write_metrics_file()
+
+    def _plan_torrent(self, torrent, torrent_dir):
+        """导出单个种子并补全 tracker，写入计划目录，返回计划中的条目；导出失败时返回 None"""
+        torrent_hash = torrent['hash']
+        filename = f"{torrent_hash}.torrent"
+        try:
+            with self.metrics.phase('export'):
+                torrent_data = self._read_torrent_file(torrent)
+            torrent_data, added = self._repair_trackers(torrent, torrent_data)
+            with open(join(torrent_dir, filename), 'wb') as f:
+                f.write(torrent_data)
+        except Exception as e:
+            Avalon.error(f"导出种子 {torrent.get('name', '未知名称')} 时发生错误: {e}")
+            self._increase_count(failed=1)
+            return None
+        return dict({key: torrent[key] for key in TORRENT_FIELDS}, hash=torrent_hash, file=filename,
+                    trackers_added=added)
+
+    def _plan_groups(self, targets):
+        """按添加参数分组，与批量添加时的分组方式相同"""
+        groups = {}
+        for item in targets:
+            groups.setdefault(self._add_group_key(item), []).append(item)
+        return [{"params": self._build_add_params(group[0]), "hashes": [item['hash'] for item in group]}
+                for group in groups.values()]
+
+    def _estimate_plan_cost(self, targets):
+        """按当前的处理模式和生成计划时实测的接口延迟，估算执行计划的开销"""
+        endpoints = self.metrics.to_dict()["endpoints"]
+        measured = next((endpoints[name]["p50"] for name in ("torrents/export", "torrents/info", "app/version")
+                         if endpoints.get(name, {}).get("count")), None)
+        latency = measured if measured else DEFAULT_LATENCY
+
+        chunked = self.config.batch_add or self.config.bulk_delete
+        chunk_size = max(1, self.config.chunk_size) if chunked else max(1, len(targets))
+        chunks = [targets[i:i + chunk_size] for i in range(0, len(targets), chunk_size)]
+        return estimate_cost([len(chunk) for chunk in chunks],
+                             [len({self._add_group_key(item) for item in chunk}) for chunk in chunks],
+                             latency, concurrency=1 if chunked else max(1, self.config.workers),
+                             bulk_delete=self.config.bulk_delete, batch_add=self.config.batch_add,
+                             preflight=self.preflight is not None)
+
+    @staticmethod
+    def _print_plan(plan, plan_path, failed=0):
+        """输出计划摘要"""
+        targets = plan['targets']
+        estimate = plan['estimate']
+        calls = estimate['calls']
+        Avalon.info(f"处理计划已写入 {plan_path}（种子文件位于 {plan_torrent_dir(plan_path)}）：", front="\n")
+        Avalon.info(f"  待处理种子 {len(targets)} 个，按添加参数分为 {len(plan['groups'])} 组")
+        fixes = [item for item in targets if item['trackers_added']]
+        if fixes:
+            Avalon.info(f"  需要补全 tracker 的种子 {len(fixes)} 个，"
+                        f"共补全 {sum(len(item['trackers_added']) for item in fixes)} 个 tracker")
+        missing = [item for item in targets if item['file_problem']]
+        if missing:
+            Avalon.warning(f"  文件缺失或大小不符的种子 {len(missing)} 个（qBittorrent 运行在其他主机上时，"
+                           f"请用 QB_PATH_MAP 映射路径），例如：")
+            for item in missing[:5]:
+                Avalon.warning(f"    {item['name']}: {item['file_problem']}")
+        if failed:
+            Avalon.warning(f"  导出失败的种子 {failed} 个，未写入计划")
+        Avalon.info(f"  预计 API 调用 {estimate['total_calls']} 次（删除 {calls['torrents/delete']}、"
+                    f"添加 {calls['torrents/add']}、确认 {calls['torrents/info']}"
+                    f"{'、文件列表 %d' % calls['torrents/files'] if 'torrents/files' in calls else ''}），"
+                    f"按实测延迟 {estimate['latency'] * 1000:.1f} ms、并发 {estimate['concurrency']} 估算"
+                    f"耗时约 {estimate['seconds']:.1f} 秒（不含等待种子生效的轮询间隔）")
+        Avalon.info(f"确认无误后执行：python main.py --apply {plan_path}（请使用相同的处理选项）")
+
+    def apply_plan(self, plan_path):
+        """按 --plan 生成的计划处理种子，直接使用计划中已导出的种子文件，不再扫描或导出"""
+        try:
+            plan = load_plan(plan_path)
+        except (OSError, ValueError) as e:
+            Avalon.error(f"读取计划文件 {plan_path} 失败: {e}")
+            sys.exit(1)
+
+        torrent_dir = plan_torrent_dir(plan_path)
+        target_torrents = []
+        for item in plan['targets']:
+            torrent = dict({key: item[key] for key in TORRENT_FIELDS}, hash=item['hash'])
+            target_torrents.append(torrent)
+            self._planned[item['hash']] = join(torrent_dir, item['file'])
+
+        self._resume_from_journal()
+        target_torrents = self._drop_missing_planned(target_torrents)
+        Avalon.info(f"按 {plan['created']} 生成的计划处理 {len(target_torrents)} 个种子，不再重新扫描。")
+        if self.config.async_engine:
+            Avalon.warning("执行计划时不使用异步引擎，将按线程数处理。")
+        if target_torrents:
+            self._process_target_torrents(target_torrents)
+
+        self._cleanup()
+        self._print_summary()
+
+    def _drop_missing_planned(self, target_torrents):
+        """生成计划后可能有种子已被删除，只保留客户端中仍存在的种子，并列出被移出计划的种子"""
+        if not target_torrents:
+            return target_torrents
+        try:
+            live = {t['hash'] for t in self.qbt_client.torrents_info(torrent_hashes=[t['hash'] for t in target_torrents])}
+        except Exception as e:
+            Avalon.error(f"获取种子列表失败，无法核对计划: {e}")
+            sys.exit(1)
+        missing = [t for t in target_torrents if t['hash'] not in live]
+        if missing:
+            Avalon.warning(f"计划中有 {len(missing)} 个种子已不在客户端中，跳过：")
+            for torrent in missing:
+                Avalon.warning(f"  - {torrent.get('name', '未知名称')} ({torrent['hash']})")
+                self._planned.pop(torrent['hash'], None)
+        return [t for t in target_torrents if t['hash'] in live]
+
+    def _on_stop_signal(self, signum, frame):
+        """收到退出信号时只设置标志，当前批次处理完后再退出，避免种子停留在已删除状态"""
+        self._stop_event.set()
+
+    def _relogin(self):
+        """会话过期（如 SID 失效）时重新登录"""
+        Avalon.warning("Web UI 会话已失效，尝试重新登录……")
+        try:
+            self.qbt_client.auth_log_in()
+            Avalon.info("重新登录成功。")
+        except Exception as e:
+            Avalon.error(f"重新登录失败，稍后重试: {e}")
+
+    def _process_target_torrents(self, target_torrents):
+        """按配置的模式（逐个、并发或分批）处理给定的种子"""
+        if self.content_index is not None:
+            target_torrents = self._match_siblings(target_torrents)
+            if not target_torrents:
+                return
+        if self.preflight is not None:
+            target_torrents = self._preflight_check(target_torrents)
+            if not target_torrents:
+                return
+        backup_dir = self._backup_bt_backup_folder(target_torrents)
+        failed_before = self.failed_count
+        self.progress.start(len(target_torrents))
+
+        workers = max(1, self.config.workers)
+        content_checks = self.spot_checker is not None or self.verifier is not None
+        if self.config.async_engine and content_checks:
+            Avalon.warning("异步引擎不支持分块抽查和完整校验，将改用线程处理。")
+        if self.config.async_engine and self.use_new_export_api and not self._planned and not content_checks:
+            Avalon.info(f"使用异步引擎处理，最多 {workers} 个种子同时处理。")
+            self._warn_limiter_unused("异步引擎")
+            try:
+                processed, failed = run_async_engine(
+                    target_torrents, host=self.config.host, port=self.config.port, username=self.config.username,
+                    password=self.config.password, concurrency=workers, wait_timeout=self.config.wait_timeout,
+                    connect_timeout=self.config.connect_timeout, timeout=self.config.timeout,
+                    temp_dir=self.temp_dir, journal=self.journal, metrics=self.metrics)
+            except AsyncEngineUnavailable as e:
+                Avalon.error(str(e))
+                sys.exit(1)
+            self._increase_count(processed=processed, failed=failed)
+        elif self.config.batch_add or self.config.bulk_delete:
+            chunk_size = max(1, self.config.chunk_size)
+            Avalon.info(f"使用分批处理模式（批量删除：{'是' if self.config.bulk_delete else '否'}，"
+                        f"分组批量添加：{'是' if self.config.batch_add else '否'}），每批最多 {chunk_size} 个种子。")
+            self._warn_limiter_unused("分批处理模式")
+            for i in range(0, len(target_torrents), chunk_size):
+                self._process_torrent_chunk(target_torrents[i:i + chunk_size])
+        elif workers == 1 and self.limiter is None:
+            for torrent in target_torrents:
+                self._process_single_torrent(torrent)
+        else:
+            process = self._process_single_torrent
+            if self.limiter is not None:
+                workers = self.limiter.maximum
+                Avalon.info(f"使用自适应并发处理，根据请求延迟在 {self.limiter.minimum}-{workers} 个种子之间调整并发数"
+                            f"（目标延迟 {self.limiter.target_latency} 秒）。")
+                process = self._process_single_torrent_limited
+                self._limiter_used = True
+            else:
+                Avalon.info(f"使用 {workers} 个线程并发处理，最多 {self.config.max_pending} 个种子同时处于待重新添加状态。")
+            Avalon.thread_lock = threading.Lock()  # 多线程输出时避免日志交错
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="skip_check") as executor:
+                # 消费迭代器，确保所有任务都已完成
+                list(executor.map(process, target_torrents))
+        self._release_bt_backup(backup_dir, failed_before)
+
+    def _match_siblings(self, target_torrents):
+        """在做种内容索引中为目标查找兄弟种子，返回要继续处理的种子；找不到兄弟种子、又没有开启抽查或完整校验的跳过"""
+        with self.metrics.phase('content_index'):
+            try:
+                indexed, removed = self.content_index.refresh()
+                matches = self.content_index.match([t for t in target_torrents if t.get('hash')])
+            except Exception as e:
+                Avalon.error(f"更新做种内容索引时出错: {e}")
+                matches = {}
+            else:
+                if indexed or removed:
+                    Avalon.info(f"做种内容索引：共 {len(self.content_index)} 个已完成的种子"
+                                f"（本次索引 {indexed} 个，移除 {removed} 个）")
+        content_checks = self.spot_checker is not None or self.verifier is not None
+        # 每批重新匹配：兄弟种子可能已被删除或停止做种，上一批的结果不再可信
+        self._siblings = {h: sibling for h, sibling in matches.items() if sibling}
+        passed = []
+        for torrent in target_torrents:
+            if torrent.get('hash') in self._siblings:
+                passed.append(torrent)
+            elif content_checks:
+                passed.append(torrent)
+            else:
+                Avalon.warning(f"  ! 跳过种子 {torrent.get('name', '未知名称')}：没有覆盖其全部文件、正在做种的兄弟种子")
+        Avalon.info(f"兄弟种子：{len(self._siblings)}/{len(target_torrents)} 个种子的内容已由同一保存路径下正在做种的种子覆盖，免于检查。")
+        skipped = len(target_torrents) - len(passed)
+        if skipped:
+            self._increase_count(skipped=skipped)
+        return passed
 
+    def _preflight_check(self, target_torrents):
+        """删除前检查文件，返回文件完好的种子，其余跳过；已有兄弟种子的不再检查"""
+        checked = [t for t in target_torrents if t.get('hash') and t['hash'] not in self._siblings]
+        if not checked:
+            return target_torrents
+        Avalon.info(f"正在检查 {len(checked)} 个种子的文件……")
+        with self.metrics.phase('preflight'):
+            problems = self.preflight.check(checked)
+        passed = []
         for torrent in target_torrents:
+            problem = problems.get(torrent.get('hash'))
+            if problem:
+                Avalon.warning(f"  ! 跳过种子 {torrent.get('name', '未知名称')}：{problem}")
+            else:
+                passed.append(torrent)
+        skipped = len(target_torrents) - len(passed)
+        if skipped:
+            self._increase_count(skipped=skipped)
+            Avalon.warning(f"文件检查：{skipped} 个种子的文件缺失或大小不符，已跳过，未删除。")
+        return passed
+
+    def _warn_limiter_unused(self, mode):
+        """开启了自适应并发、但所选处理方式不使用它时提示（只提示一次）"""
+        if self.limiter is not None and not self._limiter_warned:
+            self._limiter_warned = True
+            Avalon.warning(f"{mode}不支持自适应并发，--adaptive（QB_ADAPTIVE）不生效。")
+
+    def _process_single_torrent_limited(self, torrent):
+        """在自适应并发的名额内处理单个种子"""
+        with self.limiter.slot():
             self._process_single_torrent(torrent)
 
-        self._cleanup()
-        Avalon.info(f"执行完毕！成功处理 {self.processed_count} 个种子，失败 {self.failed_count} 个。", front="\n")
+    def _feed_limiter(self, kind, name, elapsed, error):
+        """把导出/添加请求的延迟和所有请求的失败反馈给自适应并发控制器"""
+        if kind != "endpoint":
+            return
+        if error or name in ("torrents/export", "torrents/add"):
+            self.limiter.record(elapsed, error)
+
+    def _print_summary(self):
+        """输出运行统计"""
+        Avalon.info(f"等待统计：{self.waiter.summary()}")
+        if self._limiter_used:
+            Avalon.info(f"自适应并发：{self.limiter.summary()}")
+        if self.verify_cache is not None and self.verify_cache.lookups:
+            Avalon.info(f"校验缓存：{self.verify_cache.hits}/{self.verify_cache.lookups} 个文件复用了之前的校验结果")
+        if self.metrics.phases:
+            Avalon.info("各阶段及接口耗时统计（毫秒）：", front="\n")
+            for line in self.metrics.summary_lines():
+                Avalon.info(line)
+        self._write_metrics_file()
+        skipped = f"，因文件检查或校验未通过跳过 {self.skipped_count} 个" if self.skipped_count else ""
+        Avalon.info(f"执行完毕！成功处理 {self.processed_count} 个种子，失败 {self.failed_count} 个{skipped}。", front="\n")
+
+    def _write_metrics_file(self):
+        """配置了指标文件时，写入当前的运行指标"""
+        if not self.config.metrics_file:
+            return
+        self.metrics.set_counter("processed", self.processed_count)
+        self.metrics.set_counter("failed", self.failed_count)
+        self.metrics.set_counter("skipped", self.skipped_count)
+        if self.verify_cache is not None:
+            self.metrics.set_counter("verify_cache_hits", self.verify_cache.hits)
+        if self.content_index is not None:
+            self.metrics.set_counter("sibling_matched", len(self._siblings))  # 当前批次
+        try:
+            self.metrics.write(self.config.metrics_file)
+        except OSError as e:
+            Avalon.warning(f"写入指标文件 {self.config.metrics_file} 失败: {e}")
+
+    def _find_target_torrents(self, incremental=False):
+        """获取符合筛选条件的种子，出错时抛出异常"""
+        with self.metrics.phase('scan'):
+            if incremental:
+                # 反复扫描时通过 sync/maindata 增量刷新本地缓存，只传输有变化的种子，所有条件在本地筛选
+                self.torrent_cache.refresh()
+                return self.selector.select(self.torrent_cache.torrents())
+            # 只扫描一次时把标签、分类、状态等条件交给服务器筛选，只传输候选种子
+            return self.selector.fetch(self.qbt_client)
 
     def _get_target_torrents(self):
         """获取符合条件的种子"""
         try:
-            target_torrents = self.qbt_client.torrents.info(
-                status_filter='paused',  # 筛选暂停状态的种子
-                tag='IYUU自动辅种'  # 筛选标签
-            )
-            Avalon.info(f"找到符合条件（IYUU自动辅种 + 暂停状态）的种子数：{len(target_torrents)}，开始处理...")
+            target_torrents = self._find_target_torrents()
+            Avalon.info(f"找到符合条件（{self.selector}）的种子数：{len(target_torrents)}，开始处理...")
             return target_torrents
         except Exception as e:
             Avalon.error(f"获取种子信息时出错: {e}")
@@ -156,131 +626,427 @@ class QBittorrentSkipCheck:
 
         torrent_filename = f"{torrent_hash}.torrent"
         torrent_filepath = join(self.temp_dir, torrent_filename)
-        tracker_backup_filepath = join(self.temp_dir, f"{torrent_hash}.txt")  # 用于旧版 API tracker 备份
 
         Avalon.info(f"处理中: {torrent_name} (Hash: {torrent_hash[:8]}...)")
 
+        torrent_data = None  # 内存模式下导出的种子内容
+        re_added = False
         try:
-            # 1. 导出/复制种子文件
-            self._export_or_copy_torrent_file(torrent_hash, torrent_filepath, torrent_name, tracker_backup_filepath)
+            # 1. 导出/复制种子文件，并补全缺失的tracker
+            torrent_data = self._export_or_copy_torrent_file(torrent, torrent_filepath)
+            if not self._check_content(torrent, torrent_data, torrent_filepath):
+                torrent_data = None  # 种子没有删除，无需落盘
+                return
+            torrent_source = {torrent_filename: torrent_data} if torrent_data is not None else torrent_filepath
+            if self.journal is not None:
+                self.journal.begin(torrent, torrent_filepath, torrent_data)
 
-            # 2. 删除种子(不删除文件)
-            self._delete_torrent(torrent_hash, torrent_name)
+            # 2. 删除种子(不删除文件)，3. 重新添加种子
+            with self._pending_slots:
+                self._delete_torrent(torrent_hash, torrent_name)
+                self._journal_mark(torrent_hash, 'deleted')
+                re_added = self._re_add_torrent(torrent, torrent_source, torrent_name)
 
-            # 3. 重新添加种子
-            if self._re_add_torrent(torrent, torrent_filepath, torrent_name):
-                self.processed_count += 1
-
-                # 4. 检查和恢复tracker(如果需要)
-                self._check_and_restore_trackers(torrent_hash, torrent_name, tracker_backup_filepath, torrent)
+            if re_added:
+                self._journal_mark(torrent_hash, 're_added')
+                self._increase_count(processed=1)
 
                 # 清理种子文件
-                os.remove(torrent_filepath)
+                if torrent_data is None:
+                    os.remove(torrent_filepath)
 
         except Exception as e:
             Avalon.error(f"处理种子 {torrent_name} 时发生错误: {e}")
-            self.failed_count += 1
+            self._increase_count(failed=1)
             import traceback
             Avalon.error(f"错误追踪:\n{traceback.format_exc()}")
 
-    def _export_or_copy_torrent_file(self, torrent_hash, torrent_filepath, torrent_name, tracker_backup_filepath):
-        """导出或复制种子文件"""
-        if self.use_new_export_api:
-            with open(torrent_filepath, 'wb') as f:
-                f.write(self.qbt_client.torrents.export(torrent_hash))
+        finally:
+            # 内存模式下添加未成功时，把种子落盘到临时目录，保证仍可手动恢复
+            if torrent_data is not None and not re_added:
+                self._spill_torrent_file(torrent_filepath, torrent_data)
+
+    def _process_torrent_chunk(self, torrents):
+        """分批处理一批种子：先导出整批，再删除整批，最后重新添加整批"""
+        entries = []
+        for torrent in torrents:
+            torrent_hash = torrent.get('hash')
+            torrent_name = torrent.get('name', '未知名称')
+            if not torrent_hash:
+                Avalon.warning(f"跳过一个无法获取 Hash 的种子: {torrent_name}")
+                continue
+            entry = dict(
+                torrent=torrent, hash=torrent_hash, name=torrent_name,
+                filename=f"{torrent_hash}.torrent",
+                filepath=join(self.temp_dir, f"{torrent_hash}.torrent"),
+                data=None, re_added=False
+            )
+            Avalon.info(f"处理中: {torrent_name} (Hash: {torrent_hash[:8]}...)")
+            try:
+                entry['data'] = self._export_or_copy_torrent_file(torrent, entry['filepath'])
+                if self._check_content(torrent, entry['data'], entry['filepath']):
+                    entries.append(entry)
+            except Exception as e:
+                Avalon.error(f"导出种子 {torrent_name} 时发生错误: {e}")
+                self._increase_count(failed=1)
+
+        if self.journal is not None:
+            self.journal.begin_many((e['torrent'], e['filepath'], e['data']) for e in entries)
+
+        if self.config.bulk_delete:
+            deleted = self._bulk_delete_torrents(entries)
         else:
-            source_torrent_path = join(self.config.backup_path, f"{torrent_hash}.torrent")
-            if exists(source_torrent_path):
-                shutil.copy(source_torrent_path, torrent_filepath)
+            deleted = []
+            for entry in entries:
+                try:
+                    self._delete_torrent(entry['hash'], entry['name'])
+                    self._journal_mark(entry['hash'], 'deleted')
+                    deleted.append(entry)
+                except Exception as e:
+                    Avalon.error(f"删除种子 {entry['name']} 时发生错误: {e}")
+                    self._increase_count(failed=1)
+                    if entry['data'] is not None:
+                        self._spill_torrent_file(entry['filepath'], entry['data'])
 
-                # 保存备份tracker列表
-                with open(tracker_backup_filepath, 'w', encoding='utf-8') as f:
-                    f.write(self.qbt_client.torrents.properties(torrent_hash).get('tracker', ''))
+        if self.config.batch_add:
+            self._re_add_torrent_groups(deleted)
+        else:
+            for entry in deleted:
+                source = {entry['filename']: entry['data']} if entry['data'] is not None else entry['filepath']
+                try:
+                    entry['re_added'] = self._re_add_torrent(entry['torrent'], source, entry['name'])
+                except Exception as e:
+                    Avalon.error(f"  X 重新添加种子 {entry['name']} 时发生错误: {e}")
+
+        self._finish_entries(deleted)
+
+    def _finish_entries(self, entries):
+        """统计已删除种子的重新添加结果：成功的清理种子文件，失败的把内存中的种子落盘"""
+        self._journal_mark([e['hash'] for e in entries if e['re_added']], 're_added')
+        for entry in entries:
+            if entry['re_added']:
+                self._increase_count(processed=1)
+                if entry['data'] is None:
+                    os.remove(entry['filepath'])
             else:
-                raise FileNotFoundError(
-                    f"在 BT_backup 文件夹 {self.config.backup_path} 中找不到种子文件 {torrent_hash}.torrent")
+                self._increase_count(failed=1)
+                if entry['data'] is not None:
+                    self._spill_torrent_file(entry['filepath'], entry['data'])
+
+    def _bulk_delete_torrents(self, entries):
+        """用一次 torrents_delete 请求删除整批种子(不删除文件)，返回需要重新添加的条目"""
+        if not entries:
+            return []
+        hashes = [e['hash'] for e in entries]
+        try:
+            with self.metrics.phase('delete'):
+                self.qbt_client.torrents_delete(delete_files=False, torrent_hashes=hashes)
+            Avalon.info(f"  - 已批量删除 {len(hashes)} 个种子 (保留文件)")
+        except Exception as e:
+            # 无法确定哪些种子已被删除，全部尝试重新添加：对仍存在的种子重复添加是无害的
+            Avalon.error(f"批量删除 {len(hashes)} 个种子时发生错误: {e}，将全部尝试重新添加。")
+        self._journal_mark(hashes, 'deleted')
+        with self.metrics.phase('wait_gone'):
+            gone = self.waiter.wait_gone(hashes)
+        if not gone:
+            Avalon.warning(f"  ! 等待 {self.config.wait_timeout} 秒后仍有种子未从客户端消失。")
+        return entries
+
+    def _re_add_torrent_groups(self, entries):
+        """将添加参数相同的种子合并为一次 torrents_add 请求，并以种子实际出现与否判定每个种子是否成功"""
+        groups = {}
+        for entry in entries:
+            groups.setdefault(self._add_group_key(entry['torrent']), []).append(entry)
+
+        for group in groups.values():
+            torrent_files = {
+                e['filename']: e['data'] if e['data'] is not None else e['filepath'] for e in group
+            }
+            add_params = self._build_add_params(group[0]['torrent'])
+            try:
+                with self.metrics.phase('add'):
+                    res = self.qbt_client.torrents_add(torrent_files=torrent_files, **add_params)
+            except Exception as e:
+                Avalon.error(f"  X 批量添加 {len(group)} 个种子时出错: {e}")
+                res = ""
+
+            # 部分种子失败时 qBittorrent 仍可能返回 Ok.，因此以种子是否真正出现为准
+            with self.metrics.phase('wait_present'):
+                present = self.waiter.wait_present([e['hash'] for e in group])
+            for e in group:
+                e['re_added'] = e['hash'].lower() in present
+                if e['re_added']:
+                    Avalon.info(f"  + 种子重新添加成功: {e['name']}")
+                else:
+                    Avalon.error(f"  X 种子添加失败: {e['name']}. 响应: {res}")
+
+    @staticmethod
+    def _add_group_key(torrent):
+        """分组键：只有添加参数完全一致的种子才能合并到同一次请求中"""
+        save_path = torrent['save_path']
+        content_path = torrent['content_path']
+        # 内容路径不是默认的 “保存路径/种子名” 时（如改过名），单独成组，保持与逐个添加时相同的参数
+        default_content_path = join(save_path, torrent['name'])
+        same_layout = (os.path.normpath(content_path.replace('\\', '/')) ==
+                       os.path.normpath(default_content_path.replace('\\', '/')))
+        return (save_path, torrent['category'], torrent['tags'], torrent['up_limit'], torrent['dl_limit'],
+                None if same_layout else content_path)
+
+    def _resume_from_journal(self):
+        """根据处理日志恢复上次中断时已删除但未重新添加的种子，按添加参数分组批量重新添加"""
+        pending = self.journal.pending() if self.journal is not None else []
+        if not pending:
+            return
+
+        Avalon.warning(f"处理日志中有 {len(pending)} 个上次运行未完成的种子，开始恢复……", front="\n")
+        try:
+            present = {t.hash.lower() for t in self.qbt_client.torrents_info(
+                torrent_hashes=[r['hash'] for r in pending])}
+        except Exception as e:
+            Avalon.error(f"查询未完成种子的状态时出错，本次不做恢复: {e}")
+            return
+
+        entries = []
+        for record in pending:
+            torrent_hash = record['hash']
+            if torrent_hash.lower() in present:
+                # 仍在客户端中：要么还没删除，要么已重新添加但没来得及记录
+                self._journal_mark(torrent_hash, 're_added' if record['phase'] == 'deleted' else 'skipped')
+                continue
+
+            torrent = dict(record['torrent'], hash=torrent_hash)
+            source = self.journal.torrent_source(record)
+            if source is None:
+                Avalon.error(f"  X 找不到种子 {torrent['name']} 的种子文件，无法自动恢复 (Hash: {torrent_hash})")
+                self._increase_count(failed=1)
+                continue
+            in_memory = isinstance(source, bytes)
+            entries.append(dict(
+                torrent=torrent, hash=torrent_hash, name=torrent['name'],
+                filename=f"{torrent_hash}.torrent",
+                filepath=join(self.temp_dir, f"{torrent_hash}.torrent") if in_memory else source,
+                data=source if in_memory else None, re_added=False
+            ))
+
+        if entries:
+            self._re_add_torrent_groups(entries)
+            self._finish_entries(entries)
+            for entry in entries:
+                # 内存模式下中断时可能已把种子落盘，恢复成功后一并清理
+                if entry['re_added'] and entry['data'] is not None and exists(entry['filepath']):
+                    os.remove(entry['filepath'])
+        Avalon.info(f"恢复完成，重新添加了 {sum(e['re_added'] for e in entries)} 个种子。")
+
+    def _journal_mark(self, hashes, phase):
+        """在处理日志中记录种子进入新的阶段（未启用日志时什么也不做）"""
+        if self.journal is not None:
+            self.journal.mark(hashes, phase)
+
+    def _increase_count(self, processed=0, failed=0, skipped=0):
+        """线程安全地更新成功/失败/跳过计数"""
+        with self._count_lock:
+            self.processed_count += processed
+            self.failed_count += failed
+            self.skipped_count += skipped
+        self.progress.advance(processed + failed + skipped)
+
+    def _export_or_copy_torrent_file(self, torrent, torrent_filepath):
+        """导出或复制种子文件并补全缺失的tracker，内存模式下不落盘，直接返回种子内容"""
+        planned_path = self._planned.get(torrent['hash'])
+        if planned_path is not None:
+            # 计划中的种子已导出并补全了 tracker
+            with open(planned_path, 'rb') as f:
+                torrent_data = f.read()
+        else:
+            with self.metrics.phase('export'):
+                torrent_data = self._read_torrent_file(torrent)
+            with self.metrics.phase('trackers'):
+                torrent_data = self._fill_missing_trackers(torrent, torrent_data)
+        if self.config.in_memory:
+            return torrent_data
+        with open(torrent_filepath, 'wb') as f:
+            f.write(torrent_data)
+        return None
+
+    def _read_torrent_file(self, torrent):
+        """通过 Web API 导出种子，旧版 API 下从 BT_backup 复制"""
+        torrent_hash = torrent['hash']
+        if self.use_new_export_api:
+            return self.qbt_client.torrents.export(torrent_hash)
+        source_torrent_path = join(self.config.backup_path, f"{torrent_hash}.torrent")
+        if not exists(source_torrent_path):
+            raise FileNotFoundError(
+                f"在 BT_backup 文件夹 {self.config.backup_path} 中找不到种子文件 {torrent_hash}.torrent")
+        with open(source_torrent_path, 'rb') as f:
+            return f.read()
+
+    def _check_content(self, torrent, torrent_data, torrent_filepath):
+        """按配置抽查或完整校验本机文件，未通过时跳过该种子（不删除）、清理导出的种子文件并返回 False"""
+        if self.spot_checker is None and self.verifier is None:
+            return True
+        if torrent.get('hash') in self._siblings:
+            return True  # 同一内容已在做种
+        if torrent_data is None:
+            with open(torrent_filepath, 'rb') as f:
+                content = f.read()
+        else:
+            content = torrent_data
+        torrent_name = torrent.get('name', '未知名称')
+        problem = None
+        if self.spot_checker is not None:
+            with self.metrics.phase('spot_check'):
+                try:
+                    problem = self.spot_checker.check(torrent['content_path'], content)
+                except Exception as e:
+                    problem = f"抽查时出错: {e}"
+            if problem:
+                problem = f"分块抽查未通过，{problem}"
+        if problem is None and self.verifier is not None:
+            problem = self._verify_content(torrent, content)
+        if problem is None:
+            return True
+        Avalon.warning(f"  ! 跳过种子 {torrent_name}：{problem}")
+        self._increase_count(skipped=1)
+        if torrent_data is None:
+            os.remove(torrent_filepath)
+        return False
+
+    def _verify_content(self, torrent, content):
+        """完整校验种子内容，通过时返回 None，否则逐个文件输出问题并返回说明"""
+        torrent_name = torrent.get('name', '未知名称')
+        with self.metrics.phase('verify'):
+            try:
+                result = self.verifier.verify(torrent['content_path'], content)
+            except Exception as e:
+                return f"完整校验时出错: {e}"
+        if not result.supported:
+            return "种子中没有可用于校验的分块哈希"
+        if result.ok:
+            mode = f"v2 按文件校验 {len(result.files)} 个文件，" if result.merkle else ""
+            cached = f"{result.cached} 个文件复用校验缓存，" if result.cached else ""
+            Avalon.info(f"  - 完整校验通过: {torrent_name}（{mode}{cached}{result.pieces} 个分块，"
+                        f"{result.speed / (1 << 20):.0f} MiB/s）")
+            return None
+        for path, file_problem in result.problems.items():
+            Avalon.warning(f"    {path}: {file_problem}")
+        return f"完整校验未通过，{result.failed_pieces}/{result.pieces} 个分块不匹配，{len(result.problems)} 个文件有问题"
+
+    def _fill_missing_trackers(self, torrent, torrent_data):
+        """
+        删除前规划tracker：直接解析种子内容中的tracker，与原始tracker比对，
+        缺失的写入种子文件的 announce-list，随添加请求一并生效，添加后无需再查询和补充tracker。
+        """
+        return self._repair_trackers(torrent, torrent_data)[0]
+
+    def _repair_trackers(self, torrent, torrent_data):
+        """补全种子内容中缺失的原始tracker，返回 (种子内容, 补全的tracker列表)"""
+        torrent_name = torrent.get('name', '未知名称')
+        if self.use_new_export_api:
+            original_trackers = [trk.strip() for trk in torrent.get('tracker', '').splitlines() if trk.strip()]
+        else:
+            # BT_backup 中的 .torrent 可能不含tracker，原始tracker以 .fastresume 中记录的为准
+            fastresume_path = join(self.config.backup_path, f"{torrent['hash']}.fastresume")
+            original_trackers = []
+            if exists(fastresume_path):
+                with open(fastresume_path, 'rb') as f:
+                    original_trackers = torrent_trackers(f.read())
+
+        torrent_data, added = add_missing_trackers(torrent_data, original_trackers)
+        if added:
+            Avalon.warning(f"  ! 种子 {torrent_name} 的tracker列表为空或不完整，已将 {len(added)} 个原始tracker写入种子。")
+        elif not original_trackers and not torrent_trackers(torrent_data):
+            Avalon.info(f"  - 种子 {torrent_name} 原本就没有tracker或tracker列表为空，无需添加。")
+        return torrent_data, added
+
+    @staticmethod
+    def _spill_torrent_file(torrent_filepath, torrent_data):
+        """将内存中的种子内容写入临时目录，供手动恢复"""
+        try:
+            with open(torrent_filepath, 'wb') as f:
+                f.write(torrent_data)
+            Avalon.warning(f"  ! 种子文件已保存到 {torrent_filepath}，可手动添加恢复。")
+        except OSError as e:
+            Avalon.error(f"  X 保存种子文件 {torrent_filepath} 失败: {e}")
 
     def _delete_torrent(self, torrent_hash, torrent_name):
         """删除种子"""
-        self.qbt_client.torrents_delete(delete_files=False, torrent_hashes=torrent_hash)
+        self._send_confirmed('delete',
+                             lambda: self.qbt_client.torrents_delete(delete_files=False, torrent_hashes=torrent_hash),
+                             lambda: not self.qbt_client.torrents_info(torrent_hashes=torrent_hash),
+                             f"删除种子 {torrent_name} ")
         Avalon.info(f"  - 已删除种子 (保留文件): {torrent_name}")
-        time.sleep(0.5)
-
-    def _re_add_torrent(self, torrent, torrent_filepath, torrent_name):
-        """重新添加种子"""
-        add_params = dict(
-            torrent_files=torrent_filepath,
-            save_path=torrent['save_path'],
-            content_path=torrent['content_path'],
-            is_skip_checking=True,
-            category=torrent['category'],
-            tags=torrent['tags'],
-            upload_limit=torrent['up_limit'],
-            download_limit=torrent['dl_limit']
-        )
+        with self.metrics.phase('wait_gone'):
+            gone = self.waiter.wait_gone(torrent_hash)
+        if not gone:
+            Avalon.warning(f"  ! 等待 {self.config.wait_timeout} 秒后种子仍未从客户端消失: {torrent_name}")
 
-        res = self.qbt_client.torrents_add(**add_params)
+    def _re_add_torrent(self, torrent, torrent_source, torrent_name):
+        """重新添加种子，torrent_source 为种子文件路径，或内存模式下的 {文件名: 种子内容}"""
+        res = self._send_confirmed(
+            'add', lambda: self.qbt_client.torrents_add(torrent_files=torrent_source, **self._build_add_params(torrent)),
+            lambda: bool(self.qbt_client.torrents_info(torrent_hashes=torrent['hash'])),
+            f"添加种子 {torrent_name} ") or "Ok."
 
         if "OK" in res.upper():
             Avalon.info(f"  + 种子重新添加成功: {torrent_name}")
-            time.sleep(1)  # 在tracker操作前必要的暂停
+            # 等待种子真正出现在客户端，确认添加生效
+            with self.metrics.phase('wait_present'):
+                present = self.waiter.wait_present(torrent['hash'])
+            if not present:
+                Avalon.warning(f"  ! 等待 {self.config.wait_timeout} 秒后仍未在客户端中查询到种子: {torrent_name}")
             return True
         else:
             Avalon.error(f"  X 种子添加失败: {torrent_name}. 响应: {res}")
             return False
 
-    def _check_and_restore_trackers(self, torrent_hash, torrent_name, tracker_backup_filepath, torrent):
-        """检查和恢复tracker"""
-        try:
-            # 获取新添加种子的tracker列表
-            current_trackers_info = self.qbt_client.torrents.trackers(torrent_hash)
-            current_tracker_urls = {t['url'] for t in current_trackers_info}
-
-            # 获取原始tracker(来自torrent字典或备份文件)
-            original_tracker_str = torrent.get('tracker', '')
-            if not self.use_new_export_api and exists(tracker_backup_filepath):
-                with open(tracker_backup_filepath, 'r', encoding='utf-8') as f:
-                    original_tracker_str = f.read()
-
-            original_trackers_list = [trk.strip() for trk in original_tracker_str.splitlines() if trk.strip()]
-
-            # 如果当前tracker为空或数量明显少于原始tracker，且原始tracker不为空
-            if (not current_tracker_urls or len(current_tracker_urls) < len(
-                    original_trackers_list)) and original_trackers_list:
-                Avalon.warning(f"  ! 种子 {torrent_name} 的tracker列表为空或不完整，尝试添加原始tracker...")
-                trackers_to_add_str = "\n".join(original_trackers_list)
-                try:
-                    self.qbt_client.torrents.add_trackers(torrent_hash=torrent_hash, urls=trackers_to_add_str)
-                    Avalon.info(f"    -> 已尝试添加 {len(original_trackers_list)} 个原始tracker。")
-                except Exception as add_trk_err:
-                    Avalon.error(f"    -> 添加tracker时出错: {add_trk_err}")
-
-            elif not original_trackers_list:
-                Avalon.info(f"  - 种子 {torrent_name} 原本就没有tracker或tracker列表为空，无需添加。")
-            else:
-                Avalon.info(f"  - Tracker状态似乎正常: {torrent_name}")
-
-            # 清理旧版API的tracker备份文件
-            if not self.use_new_export_api and exists(tracker_backup_filepath):
-                try:
-                    os.remove(tracker_backup_filepath)
-                except OSError as e:
-                    Avalon.warning(f"  ! 清理tracker备份文件 {tracker_backup_filepath} 失败: {e}")
+    def _send_confirmed(self, phase, send, applied, description):
+        """
+        发送添加/删除请求。客户端不会自动重发这两类请求（请求可能已经生效），
+        出错时先用 applied() 确认请求是否已生效，确实没有生效时才重试；已生效时返回 None。
+        """
+        for attempt in range(self.config.retries + 1):
+            try:
+                with self.metrics.phase(phase):
+                    return send()
+            except (qbittorrentapi.HTTP5XXError, qbittorrentapi.APIConnectionError) as e:
+                if applied():
+                    return None
+                if attempt >= self.config.retries:
+                    raise
+                Avalon.warning(f"  ! {description}时出错（{e}），确认尚未生效，重试……")
 
-        except qbittorrentapi.exceptions.NotFound404Error:
-            Avalon.warning(f"  ! 添加种子 {torrent_name} 后立即查询tracker失败(404)，可能需要稍等或手动检查。")
-        except Exception as track_err:
-            Avalon.warning(f"  ! 检查或添加tracker时出错 ({torrent_name}): {track_err}")
+    @staticmethod
+    def _build_add_params(torrent):
+        """根据原种子信息构造重新添加时的参数（不含种子文件）"""
+        return dict(
+            save_path=torrent['save_path'],
+            content_path=torrent['content_path'],
+            is_skip_checking=True,
+            category=torrent['category'],
+            tags=torrent['tags'],
+            upload_limit=torrent['up_limit'],
+            download_limit=torrent['dl_limit']
+        )
 
     def _cleanup(self):
         """清理临时文件和目录"""
-        # 如果使用了旧版API，清理临时备份目录
+        if self.journal is not None:
+            self.journal.close()
+        if self.verifier is not None:
+            self.verifier.close()
+        if self.verify_cache is not None:
+            self.verify_cache.close()
+
+        # 如果使用了旧版API，各批次成功后已删除自己的备份，只剩有失败种子的批次时保留
         if not self.use_new_export_api and exists(self.temp_backup_dir):
-            try:
-                shutil.rmtree(self.temp_backup_dir)
-                Avalon.info(f"已清理临时备份目录 {self.temp_backup_dir}")
-            except Exception as e:
-                Avalon.warning(f"清理临时备份目录 {self.temp_backup_dir} 时出错: {e}")
+            if os.listdir(self.temp_backup_dir):
+                Avalon.warning(f"临时备份目录 {self.temp_backup_dir} 中保留了有种子处理失败的批次的备份。")
+            else:
+                try:
+                    os.rmdir(self.temp_backup_dir)
+                    Avalon.info(f"已清理临时备份目录 {self.temp_backup_dir}")
+                except OSError as e:
+                    Avalon.warning(f"清理临时备份目录 {self.temp_backup_dir} 时出错: {e}")
 
         # 登出Web UI会话
         try:
@@ -290,6 +1056,60 @@ class QBittorrentSkipCheck:
             Avalon.warning(f"退出Web UI会话时出错: {e}")
 
 
+def _is_qbittorrent_running(config):
+    """尝试连接 Web UI，能得到响应（包括登录失败）即认为 qBittorrent 仍在运行"""
+    qbc = create_client(config)
+    try:
+        qbc.auth_log_in()
+    except qbittorrentapi.LoginFailed:
+        return True
+    except qbittorrentapi.exceptions.APIConnectionError:
+        return False
+    qbc.auth_log_out()
+    return True
+
+
+def run_offline_rewrite(config):
+    """离线模式：qBittorrent 退出后，直接改写 BT_backup 中目标种子的 fastresume，下次启动时不会再校验"""
+    if not exists(config.backup_path):
+        Avalon.error(f"BT_backup 文件夹不存在：{config.backup_path}")
+        sys.exit(1)
+    if _is_qbittorrent_running(config):
+        Avalon.error("qBittorrent 仍在运行，离线模式需要先完全退出 qBittorrent。")
+        sys.exit(1)
+    if not Avalon.ask("离线模式会直接改写 fastresume 文件，请确认 qBittorrent 已完全退出且处理期间不会启动。继续？(y/n)",
+                      default=False):
+        sys.exit(0)
+
+    try:
+        tag = TorrentSelector.parse(config.selector).offline_tag()
+    except SelectorError as e:
+        Avalon.error(str(e))
+        sys.exit(1)
+    if tag is None:
+        Avalon.error(f"离线模式只支持 \"tag:<标签> state:paused\" 形式的筛选条件，当前为：{config.selector}")
+        sys.exit(1)
+
+    processes = config.workers if config.workers > 1 else None  # 默认按 CPU 核数
+    target_hashes = fastresume.find_offline_targets(config.backup_path, tag, processes)
+    Avalon.info(f"找到符合条件（{tag} + 暂停状态）的种子数：{len(target_hashes)}")
+    if not target_hashes:
+        return
+
+    backup_dir = new_backup_dir(join(os.path.dirname(os.path.abspath(__file__)), "temp_BT_Backup"))
+    # 离线改写总是先写临时文件再替换（fastresume.rewrite_fastresume），不会改动硬链接指向的备份
+    manifest = snapshot_bt_backup(config.backup_path, backup_dir, target_hashes, hardlink=True)
+    Avalon.info(f"已备份 {len(manifest['files'])} 个文件到 {backup_dir}，"
+                f"如需还原可执行 python -m utils.bt_backup restore {backup_dir}")
+
+    results = fastresume.rewrite_all(config.backup_path, target_hashes, processes)
+    failed = [(h, msg) for h, ok, msg in results if not ok]
+    for torrent_hash, msg in failed:
+        Avalon.error(f"改写 {torrent_hash}.fastresume 失败: {msg}")
+    Avalon.info(f"执行完毕！成功改写 {len(results) - len(failed)} 个种子，失败 {len(failed)} 个。"
+                f"启动 qBittorrent 后这些种子将直接开始做种。", front="\n")
+
+
 def _load_environment_variables(env_file_path):
     """加载环境变量文件"""
     try:
@@ -311,6 +1131,48 @@ def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description="IYUU辅种免验助手")
     parser.add_argument("-e", "--env-file", type=str, default=".env", help="指定要加载的环境变量文件路径 (默认为.env)")
+    parser.add_argument("-m", "--in-memory", action="store_true", default=None,
+                        help="导出的种子不写入临时目录，直接在内存中重新添加 (默认读取 QB_IN_MEMORY)")
+    parser.add_argument("-b", "--batch-add", action="store_true", default=None,
+                        help="按保存路径、分类、标签、限速分组，每组一次请求批量重新添加 (默认读取 QB_BATCH_ADD)")
+    parser.add_argument("-d", "--bulk-delete", action="store_true", default=None,
+                        help="先导出整批种子，再用一次请求删除整批、然后重新添加 (默认读取 QB_BULK_DELETE)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=None,
+                        help="批量删除/批量添加模式下每批的种子数 (默认读取 QB_CHUNK_SIZE，未设置时为 20)")
+    parser.add_argument("--log-level", choices=list(log_backend.LEVELS), default=None,
+                        help="最低输出的日志级别 (默认读取 QB_LOG_LEVEL，未设置时为 info)")
+    parser.add_argument("--log-file", default=None,
+                        help="额外把日志以 JSON Lines 格式追加写入该文件 (默认读取 QB_LOG_FILE)")
+    parser.add_argument("--metrics-file", default=None,
+                        help="运行结束时写入指标文件，.json 结尾为 JSON，否则为 Prometheus textfile (默认读取 QB_METRICS_FILE)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--offline", action="store_true",
+                      help="离线模式：qBittorrent 退出后直接改写 BT_backup 中的 fastresume，不经过 Web API")
+    mode.add_argument("--watch", action="store_true",
+                      help="常驻监视模式：持续发现新暂停的辅种并分批处理，直到收到 Ctrl+C 或 SIGTERM")
+    mode.add_argument("--plan", metavar="PLAN.json",
+                      help="只生成处理计划（目标种子、分组、需补全的tracker、缺失的文件及开销估算）并写入该文件，不删除任何种子")
+    mode.add_argument("--apply", metavar="PLAN.json",
+                      help="按 --plan 生成的计划处理种子，不再重新扫描和导出")
+    parser.add_argument("-a", "--async", dest="async_engine", action="store_true", default=None,
+                        help="使用异步引擎，所有请求共用一个连接池并发执行，适合高延迟的远程 qBittorrent (需要 aiohttp)")
+    parser.add_argument("-s", "--selector", default=None,
+                        help=f"目标种子的筛选表达式，如 \"tag:IYUU自动辅种 state:paused size:>1G\" "
+                             f"(默认读取 QB_SELECTOR，未设置时为 \"{DEFAULT_SELECTOR}\")")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="并发处理种子的线程数 (默认读取 QB_WORKERS，未设置时为 1)")
+    parser.add_argument("--preflight", action="store_true", default=None,
+                        help="删除前检查种子的文件在本机是否存在、大小是否一致，不一致的跳过 (默认读取 QB_PREFLIGHT)")
+    parser.add_argument("--spot-check", type=int, default=None, metavar="N",
+                        help="删除前按分块哈希抽查本机文件，每个种子抽查 N 个随机分块及首尾、文件边界处的分块，"
+                             "未通过的跳过 (默认读取 QB_SPOT_CHECK，未设置时为 0，即不抽查)")
+    parser.add_argument("--verify", action="store_true", default=None,
+                        help="删除前在本机用多进程完整校验种子内容，只有校验通过的才跳过校验重新添加 (默认读取 QB_VERIFY)")
+    parser.add_argument("--siblings", action="store_true", default=None,
+                        help="删除前查找覆盖全部文件、正在做种的兄弟种子，找到的免于检查，找不到的跳过或照常抽查/校验 "
+                             "(默认读取 QB_SIBLING_CHECK)")
+    parser.add_argument("--adaptive", action="store_true", default=None,
+                        help="根据导出/添加请求的延迟自动调整并发数，上限为 --workers (默认读取 QB_ADAPTIVE)")
     args = parser.parse_args()
 
     # 加载环境变量
@@ -318,6 +1180,45 @@ def main():
 
     # 加载配置
     config = load_dataclass_from_env(Config, 'QB_')
+    if args.workers is not None:
+        config.workers = args.workers
+    if args.selector is not None:
+        config.selector = args.selector
+    if args.in_memory:
+        config.in_memory = True
+    if args.batch_add:
+        config.batch_add = True
+    if args.bulk_delete:
+        config.bulk_delete = True
+    if args.async_engine:
+        config.async_engine = True
+    if args.adaptive:
+        config.adaptive = True
+    if args.preflight:
+        config.preflight = True
+    if args.spot_check is not None:
+        config.spot_check = args.spot_check
+    if args.verify:
+        config.verify = True
+    if args.siblings:
+        config.sibling_check = True
+    if args.chunk_size is not None:
+        config.chunk_size = args.chunk_size
+    if args.metrics_file is not None:
+        config.metrics_file = args.metrics_file
+    if config.metrics_file:
+        config.metrics_file = os.path.abspath(config.metrics_file)  # 处理器会切换工作目录
+    if args.log_level is not None:
+        config.log_level = args.log_level
+    if args.log_file is not None:
+        config.log_file = args.log_file
+
+    # 日志改由后台线程写出，处理线程不再因输出而阻塞
+    try:
+        log_backend.install(level=config.log_level, json_file=config.log_file or None)
+    except (ValueError, OSError) as e:
+        Avalon.error(f"初始化日志失败: {e}")
+        sys.exit(1)
 
     # 基本验证
     if not config.username or not config.password:
@@ -325,9 +1226,22 @@ def main():
         if not Avalon.ask("是否继续尝试匿名或使用之前的会话？ (y/n)", default=False):
             sys.exit(0)
 
+    if args.offline:
+        run_offline_rewrite(config)
+        return
+
     # 创建并初始化处理器
+    # 处理器会切换工作目录，计划文件路径先转为绝对路径
+    plan_path = os.path.abspath(args.plan or args.apply) if (args.plan or args.apply) else None
     processor = QBittorrentSkipCheck(config)
-    processor.process_torrents()
+    if args.watch:
+        processor.watch()
+    elif args.plan:
+        processor.plan(plan_path)
+    elif args.apply:
+        processor.apply_plan(plan_path)
+    else:
+        processor.process_torrents()
 
 
 if __name__ == '__main__':
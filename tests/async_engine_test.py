@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mock_qbittorrent import make_mock_torrent, start_mock_server  # noqa: E402
+from utils.async_engine import run_async_engine  # noqa: E402
+
+# 配置项
+TORRENT_COUNT = 200
+CONCURRENCY = 16
+
+
+def run(temp_dir):
+    """用异步引擎处理模拟服务器上的种子，返回 (成功数, 失败数, 服务器状态)"""
+    # 每 10 个种子中有一个导出后不含 tracker，验证引擎会在添加前补上
+    torrents = [make_mock_torrent(i, with_tracker=i % 10 != 0) for i in range(TORRENT_COUNT)]
+    server, state = start_mock_server(torrents)
+    port = server.server_address[1]
+    print(f"模拟服务器已启动，端口 {port}，种子数 {TORRENT_COUNT}")
+
+    try:
+        start = time.perf_counter()
+        processed, failed = run_async_engine(torrents, host="http://127.0.0.1", port=port, username="admin",
+                                             password="admin", concurrency=CONCURRENCY, temp_dir=temp_dir)
+        print(f"成功 {processed} 个，失败 {failed} 个，耗时 {time.perf_counter() - start:.2f} 秒")
+        print(f"各接口调用次数: {state.calls}")
+        return processed, failed, state
+    finally:
+        server.shutdown()
+
+
+def test_async_engine(tmp_path):
+    pytest.importorskip("aiohttp")  # 异步引擎的可选依赖
+    processed, failed, state = run(str(tmp_path))
+    assert (processed, failed) == (TORRENT_COUNT, 0)
+    assert all(t["state"] == "stalledUP" for t in state.torrents.values())
+    assert all(t["tracker"] for t in state.torrents.values())
+
+
+def main():
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    os.makedirs("../temp", exist_ok=True)
+    processed, failed, state = run("../temp")
+    skipped = [t for t in state.torrents.values() if t["state"] != "stalledUP"]
+    print("所有种子均已跳过校验重新添加" if not skipped else f"有 {len(skipped)} 个种子未按预期重新添加")
+    no_tracker = [t for t in state.torrents.values() if not t["tracker"]]
+    print("所有种子均带有 tracker" if not no_tracker else f"有 {len(no_tracker)} 个种子缺少 tracker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+性能基准：用本地模拟的 qBittorrent Web API 运行 QBittorrentSkipCheck，统计吞吐量、每个种子的 API 调用次数
+以及各阶段耗时的 p50/p99，用于发现性能回退。
+
+示例：
+    python tests/benchmark.py --sizes 100,1000,10000 --latency "*=0.002,torrents/add=0.01" --workers 8
+    python tests/benchmark.py --sizes 1000 --bulk-delete --batch-add --in-memory --fail torrents/add=0.01
+    python tests/benchmark.py --sizes 1000 --serial --latency "*=0.005" --workers 32 --adaptive
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from tests.mock_qbittorrent import make_mock_torrent, start_mock_server  # noqa: E402
+from utils.avalon import Avalon  # noqa: E402
+
+TEMP_DIR = os.path.join(os.path.dirname(os.path.abspath(main.__file__)), "temp")
+
+
+def parse_endpoint_values(text):
+    """解析 "接口=数值,..." 形式的参数，只写数值时作为所有接口的默认值（键 "*"）"""
+    result = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        key, sep, value = item.rpartition("=")
+        result[key if sep else "*"] = float(value)
+    return result
+
+
+def run_once(size, args):
+    """用 size 个模拟种子跑一轮，返回结果字典"""
+    torrents = [make_mock_torrent(i, with_tracker=i % 10 != 0) for i in range(size)]
+    server, state = start_mock_server(torrents, latency=parse_endpoint_values(args.latency),
+                                      failure_rate=parse_endpoint_values(args.fail), seed=args.seed,
+                                      serial=args.serial)
+    config = main.Config(
+        host="http://127.0.0.1", port=server.server_address[1], username="admin", password="admin",
+        workers=args.workers, max_pending=args.max_pending, wait_timeout=args.wait_timeout,
+        in_memory=args.in_memory, batch_add=args.batch_add, bulk_delete=args.bulk_delete,
+        chunk_size=args.chunk_size, async_engine=args.async_engine,
+        adaptive=args.adaptive, target_latency=args.target_latency,
+        journal=False,  # 不把模拟种子写入真实的处理日志
+        progress_interval=0,
+    )
+    try:
+        processor = main.QBittorrentSkipCheck(config)
+        start = time.perf_counter()
+        processor.process_torrents()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        _remove_spilled_files(torrents)
+
+    api_calls = sum(count for endpoint, count in state.calls.items() if not endpoint.startswith("auth/"))
+    return {
+        "size": size,
+        "elapsed": elapsed,
+        "torrents_per_sec": size / elapsed if elapsed else 0.0,
+        "processed": processor.processed_count,
+        "failed": processor.failed_count,
+        "api_calls_per_torrent": api_calls / size if size else 0.0,
+        "calls": dict(sorted(state.calls.items())),
+        "adaptive": processor.limiter.summary() if processor._limiter_used else None,
+        # 分批模式下 delete/add 每次覆盖整批种子；wait_* 为确认删除/添加生效的等待
+        "phases": {phase: {"count": s["count"], "errors": s["errors"],
+                           "p50_ms": s["p50"] * 1000, "p99_ms": s["p99"] * 1000}
+                   for phase, s in processor.metrics.to_dict()["phases"].items()},
+    }
+
+
+def _remove_spilled_files(torrents):
+    """清理添加失败时落盘到 ./temp 的模拟种子"""
+    for torrent in torrents:
+        path = os.path.join(TEMP_DIR, f"{torrent['hash']}.torrent")
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def print_report(results):
+    print()
+    print(f"{'种子数':>8} {'耗时(s)':>9} {'种子/秒':>9} {'成功':>7} {'失败':>6} {'调用/种子':>9}  各阶段 p50/p99 (ms)")
+    for r in results:
+        phases = "  ".join(f"{phase} {p['p50_ms']:.1f}/{p['p99_ms']:.1f}" for phase, p in r["phases"].items())
+        print(f"{r['size']:>8} {r['elapsed']:>9.2f} {r['torrents_per_sec']:>9.1f} {r['processed']:>7} "
+              f"{r['failed']:>6} {r['api_calls_per_torrent']:>9.2f}  {phases}")
+    for r in results:
+        print(f"{r['size']} 个种子的接口调用次数: {r['calls']}")
+        if r["adaptive"]:
+            print(f"{r['size']} 个种子的自适应并发: {r['adaptive']}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="用模拟的 qBittorrent Web API 测试跳过校验流程的性能")
+    parser.add_argument("--sizes", default="100,1000", help="逗号分隔的模拟种子数量 (默认: 100,1000)")
+    parser.add_argument("--latency", default="", help="接口延迟秒数，如 \"*=0.002,torrents/add=0.01\"")
+    parser.add_argument("--fail", default="", help="接口失败概率，如 \"torrents/add=0.01\"")
+    parser.add_argument("--seed", type=int, default=0, help="失败注入的随机种子 (默认: 0)")
+    parser.add_argument("--serial", action="store_true", help="模拟服务器逐个处理请求，模拟 qBittorrent 单线程的 Web UI")
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--max-pending", type=int, default=8)
+    parser.add_argument("--wait-timeout", type=float, default=2.0)
+    parser.add_argument("-m", "--in-memory", action="store_true")
+    parser.add_argument("-b", "--batch-add", action="store_true")
+    parser.add_argument("-d", "--bulk-delete", action="store_true")
+    parser.add_argument("-c", "--chunk-size", type=int, default=20)
+    parser.add_argument("-a", "--async", dest="async_engine", action="store_true")
+    parser.add_argument("--adaptive", action="store_true")
+    parser.add_argument("--target-latency", type=float, default=0.5)
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出处理过程中的日志（默认不输出）")
+    parser.add_argument("-o", "--output", help="把结果以 JSON 格式写入指定文件，便于对比")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)  # 处理器会切换工作目录
+
+    if not args.verbose:
+        # 大量逐种子日志会拖慢终端并干扰计时
+        Avalon._print = staticmethod(lambda msg, file, end: None)
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        print(f"正在测试 {size} 个种子……", flush=True)
+        results.append(run_once(size, args))
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bencode import (BencodeError, add_missing_trackers, decode, encode, info_hash,  # noqa: E402
+                           raw_info, torrent_trackers)
+
+INFO = {"name": "示例", "length": 3 << 20, "piece length": 1 << 18, "pieces": bytes(range(20)) * 12}
+
+
+def test_round_trip():
+    data = encode({"announce": "http://a.example/announce", "info": INFO, "list": [1, -2, b"\xff\x00", []],
+                   "empty": {}})
+    value = decode(data)
+    assert value["info"]["name"] == "示例".encode()  # 字典的值保持为 bytes
+    assert value["list"] == [1, -2, b"\xff\x00", []]
+    assert encode(value) == data
+
+
+def test_dict_keys_sorted_by_raw_bytes():
+    assert encode({"b": 1, "a": 2, "ab": 3}) == b"d1:ai2e2:abi3e1:bi1ee"
+
+
+def test_non_utf8_key_survives_round_trip():
+    data = b"d2:\xff\xfei1ee"
+    assert encode(decode(data)) == data
+
+
+@pytest.mark.parametrize("data", [b"", b"i12", b"5:abc", b"d1:a", b"x", b"i1ei2e", b"l"])
+def test_invalid_data(data):
+    with pytest.raises(BencodeError):
+        decode(data)
+
+
+def test_info_hash_uses_raw_info_bytes():
+    # 非规范编码（键未排序）的 info 字典：重新编码会改变字节，info hash 必须按原始字节计算
+    raw = b"d4:name1:x6:lengthi1ee"
+    data = b"d4:info" + raw + b"8:announce3:urle"
+    assert raw_info(data) == raw
+    assert info_hash(data) == hashlib.sha1(raw).hexdigest()
+    assert encode(decode(raw)) != raw
+
+
+def test_info_hash_without_info():
+    with pytest.raises(BencodeError):
+        info_hash(encode({"announce": "x"}))
+
+
+def test_torrent_trackers_dedup_in_order():
+    data = encode({"info": INFO, "announce": "http://a/",
+                   "announce-list": [["http://a/", "http://b/"], ["http://c/", "http://a/"]]})
+    assert torrent_trackers(data) == ["http://a/", "http://b/", "http://c/"]
+
+
+def test_add_missing_trackers_keeps_info_hash():
+    data = encode({"info": INFO})
+    new_data, added = add_missing_trackers(data, ["http://a/", "http://b/", "http://a/"])
+    assert added == ["http://a/", "http://b/"]
+    assert info_hash(new_data) == info_hash(data)
+    assert torrent_trackers(new_data) == ["http://a/", "http://b/"]
+    assert add_missing_trackers(new_data, ["http://b/"]) == (new_data, [])
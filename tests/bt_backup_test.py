@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bt_backup import (new_backup_dir, restore_bt_backup, snapshot_bt_backup,  # noqa: E402
+                             verify_bt_backup)
+
+
+@pytest.fixture
+def bt_backup(tmp_path):
+    path = tmp_path / "BT_backup"
+    path.mkdir()
+    for name in ("a", "b"):
+        (path / f"{name}.torrent").write_bytes(b"torrent-" + name.encode())
+        (path / f"{name}.fastresume").write_bytes(b"resume-" + name.encode())
+    return str(path)
+
+
+def test_snapshot_and_restore(tmp_path, bt_backup):
+    dest = new_backup_dir(str(tmp_path / "temp_BT_Backup"))
+    manifest = snapshot_bt_backup(bt_backup, dest, ["a", "missing"])
+    assert sorted(f["name"] for f in manifest["files"]) == ["a.fastresume", "a.torrent"]
+    assert manifest["missing"] == ["missing.torrent", "missing.fastresume"]
+    assert verify_bt_backup(dest) == []
+
+    os.remove(os.path.join(bt_backup, "a.fastresume"))
+    assert sorted(restore_bt_backup(dest)) == ["a.fastresume", "a.torrent"]
+    with open(os.path.join(bt_backup, "a.fastresume"), "rb") as f:
+        assert f.read() == b"resume-a"
+
+
+def test_existing_backup_is_never_overwritten(tmp_path, bt_backup):
+    parent = str(tmp_path / "temp_BT_Backup")
+    first = new_backup_dir(parent)
+    snapshot_bt_backup(bt_backup, first, ["a"])
+    second = new_backup_dir(parent)
+    assert second != first
+    snapshot_bt_backup(bt_backup, second, ["b"])
+    with pytest.raises(FileExistsError):
+        snapshot_bt_backup(bt_backup, first, ["b"])
+    assert verify_bt_backup(first) == []
+    assert sorted(os.listdir(first)) == ["a.fastresume", "a.torrent", "manifest.json"]
+
+
+def test_copies_unless_hardlink_requested(tmp_path, bt_backup):
+    parent = str(tmp_path / "temp_BT_Backup")
+    copied = new_backup_dir(parent)
+    assert not any(f["linked"] for f in snapshot_bt_backup(bt_backup, copied, ["a"])["files"])
+    linked = new_backup_dir(parent)
+    assert all(f["linked"] for f in snapshot_bt_backup(bt_backup, linked, ["a"], hardlink=True)["files"])
+
+    # 原地改写原文件：复制的备份不受影响，硬链接的备份随之改变
+    with open(os.path.join(bt_backup, "a.fastresume"), "r+b") as f:
+        f.write(b"RESUME")
+    assert verify_bt_backup(copied) == []
+    assert verify_bt_backup(linked) == ["a.fastresume"]
@@ -0,0 +1,2 @@
+# 以下脚本需要连接真实的 qBittorrent 并在导入时读取输入，只能手动运行
+collect_ignore = ["torrent_add_test.py", "torrent_add_test_api.py"]
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+import qbittorrentapi
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mock_qbittorrent import make_mock_torrent, start_mock_server  # noqa: E402
+from utils.content_index import ContentIndex  # noqa: E402
+from utils.torrent_cache import TorrentStateCache  # noqa: E402
+
+
+@pytest.fixture
+def mock():
+    server, server_state = start_mock_server()
+    client = qbittorrentapi.Client(host=f"http://127.0.0.1:{server.server_address[1]}",
+                                   username="admin", password="admin")
+    yield server_state, ContentIndex(client, TorrentStateCache(client), workers=2)
+    server.shutdown()
+
+
+def _add(server_state, index, **kwargs):
+    torrent = make_mock_torrent(index, **kwargs)
+    server_state.put(torrent)
+    return torrent
+
+
+def _match(index, target):
+    index.refresh()
+    return index.match([target])[target["hash"]]
+
+
+def test_matches_seeding_sibling_in_same_save_path(mock):
+    qb, index = mock
+    sibling = _add(qb, 1, state="uploading")
+    target = _add(qb, 1, source="other")  # 内容相同、hash 不同的辅种
+    assert target["hash"] != sibling["hash"]
+    assert _match(index, target) == sibling["hash"]
+
+
+def test_rejects_sibling_in_other_save_path(mock):
+    qb, index = mock
+    _add(qb, 1, state="uploading", save_path="/elsewhere")
+    target = _add(qb, 1, source="other")
+    assert _match(index, target) is None
+
+
+@pytest.mark.parametrize("sibling_state", ["pausedUP", "stoppedUP", "missingFiles", "error", "checkingUP"])
+def test_rejects_sibling_not_seeding(mock, sibling_state):
+    qb, index = mock
+    _add(qb, 1, state=sibling_state)
+    target = _add(qb, 1, source="other")
+    assert _match(index, target) is None
+
+
+def test_rejects_incomplete_sibling_and_other_content(mock):
+    qb, index = mock
+    incomplete = _add(qb, 1, state="uploading")
+    with qb.lock:
+        qb.torrents[incomplete["hash"]]["progress"] = 0.5
+    _add(qb, 2, state="uploading")  # 文件名不同
+    assert _match(index, _add(qb, 1, source="other")) is None
+
+
+def test_target_is_not_its_own_sibling(mock):
+    qb, index = mock
+    target = _add(qb, 1, state="uploading")
+    assert _match(index, target) is None
+
+
+def test_sibling_state_change_is_seen_on_refresh(mock):
+    qb, index = mock
+    sibling = _add(qb, 1, state="uploading")
+    target = _add(qb, 1, source="other")
+    assert _match(index, target) == sibling["hash"]
+    with qb.lock:
+        qb.torrents[sibling["hash"]]["state"] = "pausedUP"
+    assert _match(index, target) is None
+    with qb.lock:
+        del qb.torrents[sibling["hash"]]
+    assert index.refresh() == (0, 1)
+    assert len(index) == 1  # 只剩已完成的 target 本身
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.journal import TORRENT_FIELDS, TorrentJournal  # noqa: E402
+
+
+def _torrent(index):
+    torrent = {key: f"{key}-{index}" for key in TORRENT_FIELDS}
+    torrent.update(hash=f"{index:040x}", up_limit=0, dl_limit=0)
+    return torrent
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_after_crash(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = TorrentJournal(path)
+    journal.begin(_torrent(1), torrent_data=b"d4:infodee")
+    journal.begin(_torrent(2), torrent_file="/nonexistent.torrent")
+    journal.begin(_torrent(3), torrent_data=b"x")
+    journal.mark(_torrent(1)["hash"], "deleted")
+    journal.mark([_torrent(3)["hash"]], "re_added")
+    # 不调用 close，模拟进程崩溃
+
+    pending = {r["hash"]: r for r in TorrentJournal(path).pending()}
+    assert set(pending) == {_torrent(1)["hash"], _torrent(2)["hash"]}
+    first = pending[_torrent(1)["hash"]]
+    assert first["phase"] == "deleted"
+    assert first["torrent"]["save_path"] == "save_path-1"
+    assert TorrentJournal.torrent_source(first) == b"d4:infodee"
+    assert TorrentJournal.torrent_source(pending[_torrent(2)["hash"]]) is None  # 种子文件已不存在
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = TorrentJournal(path)
+    journal.begin(_torrent(1), torrent_data=b"x")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"hash": "abc", "pha')
+    assert [r["hash"] for r in TorrentJournal(path).pending()] == [_torrent(1)["hash"]]
+
+
+def test_compaction_keeps_only_pending(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = TorrentJournal(path)
+    journal.begin_many([(_torrent(i), None, b"x") for i in range(5)])
+    journal.mark([_torrent(i)["hash"] for i in range(4)], "deleted")
+    journal.mark([_torrent(i)["hash"] for i in range(3)], "re_added")
+    journal.mark(_torrent(4)["hash"], "skipped")
+    assert len(_lines(path)) == 5 + 4 + 3 + 1
+
+    journal.close()
+    lines = _lines(path)
+    assert [(r["hash"], r["phase"]) for r in lines] == [(_torrent(3)["hash"], "deleted")]
+    assert lines[0]["data"]  # 压缩后仍保留重新添加所需的内容
+
+
+def test_close_removes_finished_journal(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = TorrentJournal(path)
+    journal.begin(_torrent(1), torrent_data=b"x")
+    journal.mark(_torrent(1)["hash"], "re_added")
+    journal.close()
+    assert not os.path.exists(path)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bencode import encode  # noqa: E402
+from utils.merkle import (BLOCK_SIZE, ZERO_HASH, V2Layout, block_hashes, layer_root, merkle_root,  # noqa: E402
+                          piece_hash, small_file_root)
+
+
+def _h(data):
+    return hashlib.sha256(data).digest()
+
+
+def _data(length):
+    return bytes(i * 7 % 251 for i in range(length))
+
+
+def test_merkle_root_pads_with_zero_hashes():
+    a, b, c = _h(b"a"), _h(b"b"), _h(b"c")
+    assert merkle_root([], 1) == ZERO_HASH
+    assert merkle_root([a], 1) == a
+    assert merkle_root([a, b, c], 4) == _h(_h(a + b) + _h(c + ZERO_HASH))
+    # 补齐的叶子不足半边时，整棵空子树的根也要正确计算
+    assert merkle_root([a], 4) == _h(_h(a + ZERO_HASH) + _h(ZERO_HASH + ZERO_HASH))
+
+
+def test_block_hashes_last_block_not_padded():
+    data = _data(BLOCK_SIZE + 10)
+    assert block_hashes(data) == [_h(data[:BLOCK_SIZE]), _h(data[BLOCK_SIZE:])]
+
+
+def test_small_file_root():
+    data = _data(100)
+    assert small_file_root(data) == _h(data)
+    data = _data(2 * BLOCK_SIZE + 1)
+    blocks = block_hashes(data)
+    assert small_file_root(data) == _h(_h(blocks[0] + blocks[1]) + _h(blocks[2] + ZERO_HASH))
+
+
+def test_piece_hash_pads_short_last_piece_to_full_piece():
+    piece_length = 4 * BLOCK_SIZE
+    data = _data(BLOCK_SIZE)
+    assert piece_hash(data, piece_length) == _h(_h(_h(data) + ZERO_HASH) + _h(ZERO_HASH + ZERO_HASH))
+
+
+@pytest.mark.parametrize("pieces", [2, 3, 5, 8])
+def test_layer_root_matches_root_over_all_blocks(pieces):
+    # 由分块层计算的根必须等于直接对整个文件的全部块计算的根（BEP 52 中 pieces root 的定义）
+    piece_length = 2 * BLOCK_SIZE
+    data = _data((pieces - 1) * piece_length + 100)
+    layer = b"".join(piece_hash(data[i:i + piece_length], piece_length) for i in range(0, len(data), piece_length))
+    assert layer_root(layer, piece_length) == small_file_root(data)
+
+
+def test_layout_from_torrent():
+    piece_length = 2 * BLOCK_SIZE
+    big, small = _data(3 * piece_length), _data(10)
+    layer = b"".join(piece_hash(big[i:i + piece_length], piece_length) for i in range(0, len(big), piece_length))
+    root = layer_root(layer, piece_length)
+    info = {"name": "dir", "piece length": piece_length, "meta version": 2, "pieces": b"",
+            "file tree": {"sub": {"big": {"": {"length": len(big), "pieces root": root}}},
+                          "small": {"": {"length": len(small), "pieces root": small_file_root(small)}},
+                          "empty": {"": {"length": 0}}}}
+    layout = V2Layout.from_torrent(encode({"info": info, "piece layers": {root: layer}}))
+    assert layout.hybrid and not layout.single_file
+    files = {"/".join(f.parts): f for f in layout.files}
+    assert set(files) == {"sub/big", "small", "empty"}
+    assert files["sub/big"].piece_layer == layer  # 以原始字节的 pieces root 为键查找分块层
+    assert files["small"].piece_layer == b""
+    assert files["empty"].pieces_root == b""
+    assert layout.piece_count(files["sub/big"]) == 3
+    assert layout.total_length == len(big) + len(small)
+
+
+def test_layout_single_file_and_v1():
+    info = {"name": "f", "piece length": BLOCK_SIZE, "meta version": 2,
+            "file tree": {"f": {"": {"length": 10, "pieces root": small_file_root(_data(10))}}}}
+    assert V2Layout.from_torrent(encode({"info": info})).single_file
+    assert V2Layout.from_torrent(encode({"info": {"name": "f", "length": 1, "pieces": b""}})) is None
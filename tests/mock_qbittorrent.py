@@ -0,0 +1,282 @@
+"""
+本地模拟的 qBittorrent Web API 服务器，用于在没有真实客户端的情况下离线测试。
+
+只实现了本项目用到的接口，种子数据全部保存在内存中。
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bencode import BencodeError, decode, encode, info_hash, torrent_trackers  # noqa: E402
+
+SID = "mock-session-id"
+
+
+def make_mock_torrent(index, tag="IYUU自动辅种", state="pausedUP", save_path="/downloads", with_tracker=True,
+                      source=None):
+    """
+    生成一个模拟种子的信息，"_torrent" 中是对应的真实 .torrent 内容（hash 即其 info hash）。
+
+    with_tracker 为 False 时导出的种子不含 tracker，模拟 tracker 丢失的情况。
+    source 不为空时写入 info['source']，模拟其他站点的辅种：内容与同一 index 的种子相同，hash 不同。
+    """
+    name = f"mock-torrent-{index}"
+    size = 1 << 20
+    piece_length = 1 << 18
+    info = {"name": name, "length": size, "piece length": piece_length,
+            "pieces": b"".join(hashlib.sha1(b"%d-%d" % (index, i)).digest() for i in range(size // piece_length))}
+    if source:
+        info["source"] = source
+    tracker = f"http://tracker.example.com/announce?id={index}"
+    meta = {"info": info, "announce": tracker} if with_tracker else {"info": info}
+    torrent_bytes = encode(meta)
+    return {
+        "hash": info_hash(torrent_bytes), "name": name, "size": size, "state": state, "progress": 1.0,
+        "save_path": save_path, "content_path": f"{save_path}/{name}",
+        "category": "mock", "tags": tag, "up_limit": 0, "dl_limit": 0,
+        "tracker": tracker, "_torrent": torrent_bytes,
+    }
+
+
+class MockQBittorrentState:
+    """
+    模拟客户端的内存状态。
+
+    latency / failure_rate 按接口（如 "torrents/add"）设置每次请求的额外延迟（秒）和返回 500 的概率，
+    键 "*" 作为未单独设置的接口的默认值。serial 为 True 时逐个处理请求，模拟 qBittorrent 单线程的 Web UI，
+    此时并发请求的延迟会随排队长度增加。
+    """
+
+    def __init__(self, torrents=(), latency=None, failure_rate=None, seed=None, serial=False):
+        self.latency = dict(latency or {})
+        self.serial_lock = threading.Lock() if serial else None
+        self.failure_rate = dict(failure_rate or {})
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.torrents = {}
+        self.torrent_files = {}  # hash -> .torrent 内容
+        self.removed = {}  # 已删除的种子，重新添加时恢复其信息
+        self.rid = 0
+        self.calls = {}
+        for torrent in torrents:
+            self.put(torrent)
+
+    def put(self, torrent):
+        torrent = dict(torrent)
+        with self.lock:
+            self.torrent_files[torrent["hash"]] = torrent.pop("_torrent")
+            self.torrents[torrent["hash"]] = torrent
+
+    def count(self, endpoint):
+        with self.lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def inject(self, endpoint):
+        """按配置模拟接口延迟，返回本次请求是否应当失败"""
+        delay = self.latency.get(endpoint, self.latency.get("*", 0))
+        if delay:
+            time.sleep(delay)
+        rate = self.failure_rate.get(endpoint, self.failure_rate.get("*", 0))
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+
+class MockQBittorrentHandler(BaseHTTPRequestHandler):
+    """处理 /api/v2/ 下的请求，state 由 start_mock_server 注入"""
+    protocol_version = "HTTP/1.1"  # 与 qBittorrent 一样支持长连接
+    disable_nagle_algorithm = True  # 响应头与正文分两次写出，长连接下避免 Nagle 算法带来的 40ms 延迟
+    state: MockQBittorrentState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch(parse_qs(urlparse(self.path).query), {})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            fields, files = self._parse_multipart(content_type, body)
+        else:
+            fields, files = parse_qs(body.decode()), {}
+        self._dispatch(fields, files)
+
+    def _dispatch(self, fields, files):
+        if self.state.serial_lock is None:
+            return self._handle(fields, files)
+        with self.state.serial_lock:
+            return self._handle(fields, files)
+
+    def _handle(self, fields, files):
+        endpoint = urlparse(self.path).path.removeprefix("/api/v2/")
+        self.state.count(endpoint)
+        if self.state.inject(endpoint):
+            return self._send(500, "Injected failure")
+        if endpoint != "auth/login" and f"SID={SID}" not in self.headers.get("Cookie", ""):
+            return self._send(403, "Forbidden")
+        handler = getattr(self, "_api_" + endpoint.replace("/", "_"), None)
+        if handler is None:
+            return self._send(404, "Not Found")
+        args = {k: v[0] for k, v in fields.items()}
+        handler(args, files)
+
+    # ---------- auth / app ----------
+    def _api_auth_login(self, args, files):
+        self._send(200, "Ok.", headers={"Set-Cookie": f"SID={SID}; path=/"})
+
+    def _api_auth_logout(self, args, files):
+        self._send(200, "")
+
+    def _api_app_version(self, args, files):
+        self._send(200, "v4.6.7")
+
+    def _api_app_webapiVersion(self, args, files):
+        self._send(200, "2.9.3")
+
+    # ---------- torrents ----------
+    def _api_torrents_info(self, args, files):
+        with self.state.lock:
+            torrents = list(self.state.torrents.values())
+        if args.get("hashes"):
+            wanted = set(args["hashes"].lower().split("|"))
+            torrents = [t for t in torrents if t["hash"] in wanted]
+        if args.get("category") is not None:
+            torrents = [t for t in torrents if t["category"] == args["category"]]
+        if args.get("tag") is not None:
+            torrents = [t for t in torrents if args["tag"] in [x.strip() for x in t["tags"].split(",")]]
+        if args.get("filter") in ("paused", "stopped"):
+            torrents = [t for t in torrents if t["state"].startswith(("paused", "stopped"))]
+        self._send_json(torrents)
+
+    def _api_torrents_export(self, args, files):
+        with self.state.lock:
+            exists = args.get("hash") in self.state.torrents
+            torrent_bytes = self.state.torrent_files.get(args.get("hash"))
+        if not exists:
+            return self._send(404, "Not Found")
+        self._send(200, torrent_bytes, content_type="application/x-bittorrent")
+
+    def _api_torrents_delete(self, args, files):
+        with self.state.lock:
+            for torrent_hash in args.get("hashes", "").split("|"):
+                torrent = self.state.torrents.pop(torrent_hash, None)
+                if torrent is not None:
+                    self.state.removed[torrent_hash] = torrent
+        self._send(200, "")
+
+    def _api_torrents_add(self, args, files):
+        added = 0
+        with self.state.lock:
+            # 与 qBittorrent 一致：所有上传的文件都视为种子，不限定表单字段名
+            for content in (c for contents in files.values() for c in contents):
+                try:
+                    torrent_hash = info_hash(content)
+                    trackers = torrent_trackers(content)
+                except BencodeError:
+                    continue
+                if torrent_hash in self.state.torrents:
+                    continue
+                torrent = dict(self.state.removed.pop(torrent_hash, {"hash": torrent_hash, "name": torrent_hash}))
+                torrent.update(save_path=args.get("savepath", torrent.get("save_path", "")),
+                               category=args.get("category", ""), tags=args.get("tags", ""),
+                               tracker=trackers[0] if trackers else "",
+                               state="stalledUP" if args.get("skip_checking", "").lower() == "true" else "checkingUP")
+                self.state.torrent_files[torrent_hash] = content
+                self.state.torrents[torrent_hash] = torrent
+                added += 1
+        self._send(200, "Ok." if added else "Fails.")
+
+    def _api_torrents_trackers(self, args, files):
+        with self.state.lock:
+            exists = args.get("hash") in self.state.torrents
+            torrent_bytes = self.state.torrent_files.get(args.get("hash"))
+        if not exists:
+            return self._send(404, "Not Found")
+        self._send_json([{"url": url, "status": 2} for url in torrent_trackers(torrent_bytes)])
+
+    def _api_torrents_files(self, args, files):
+        with self.state.lock:
+            torrent_bytes = self.state.torrent_files.get(args.get("hash"))
+            torrent = self.state.torrents.get(args.get("hash"))
+        if torrent is None:
+            return self._send(404, "Not Found")
+        info = decode(torrent_bytes)["info"]
+        name = info["name"].decode()
+        if "files" in info:
+            entries = [("/".join([name] + [p.decode() for p in f["path"]]), f["length"]) for f in info["files"]]
+        else:
+            entries = [(name, info["length"])]
+        self._send_json([{"index": i, "name": n, "size": size, "priority": 1, "progress": torrent.get("progress", 0)}
+                         for i, (n, size) in enumerate(entries)])
+
+    def _api_torrents_addTrackers(self, args, files):
+        self._send(200, "")
+
+    # ---------- sync ----------
+    def _api_sync_maindata(self, args, files):
+        with self.state.lock:
+            self.state.rid += 1
+            torrents = {h: {k: v for k, v in t.items() if k != "hash"} for h, t in self.state.torrents.items()}
+            rid = self.state.rid
+        self._send_json({"rid": rid, "full_update": True, "torrents": torrents})
+
+    # ---------- helpers ----------
+    @staticmethod
+    def _parse_multipart(content_type, body):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        fields, files = {}, {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            payload = part.get_payload(decode=True)
+            if part.get_filename() is not None:
+                files.setdefault(name, []).append(payload)
+            else:
+                fields.setdefault(name, []).append(payload.decode())
+        return fields, files
+
+    def _send_json(self, obj):
+        self._send(200, json.dumps(obj), content_type="application/json")
+
+    def _send(self, status, body, content_type="text/plain; charset=UTF-8", headers=None):
+        data = body if isinstance(body, bytes) else body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_mock_server(torrents=(), host="127.0.0.1", port=0, latency=None, failure_rate=None, seed=None,
+                      serial=False):
+    """在后台线程中启动模拟服务器，返回 (server, state)；port 为 0 时自动分配端口"""
+    state = MockQBittorrentState(torrents, latency=latency, failure_rate=failure_rate, seed=seed, serial=serial)
+    handler = type("Handler", (MockQBittorrentHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    srv, _ = start_mock_server([make_mock_torrent(i) for i in range(100)], port=8080)
+    print(f"模拟 qBittorrent Web API 已启动: http://127.0.0.1:{srv.server_address[1]} (Ctrl+C 退出)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        srv.shutdown()
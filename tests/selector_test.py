@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.selector import DEFAULT_SELECTOR, SelectorError, Term, TorrentSelector  # noqa: E402
+
+
+def _torrent(**kwargs):
+    torrent = {"hash": "ab" * 20, "name": "Some.Movie.2024", "state": "pausedUP", "tags": "IYUU自动辅种, other",
+               "category": "movies", "size": 5 << 30, "save_path": "/data/pt", "tracker": "https://t.example.com/a"}
+    torrent.update(kwargs)
+    return torrent
+
+
+def test_parse_default():
+    selector = TorrentSelector.parse(DEFAULT_SELECTOR)
+    assert selector.terms == [Term("tag", ("IYUU自动辅种",)), Term("state", ("paused",))]
+    assert selector.matches(_torrent())
+    assert not selector.matches(_torrent(state="uploading"))
+    assert selector.offline_tag() == "IYUU自动辅种"
+
+
+@pytest.mark.parametrize("expression", ["", "   ", None])
+def test_empty_expression_rejected(expression):
+    with pytest.raises(SelectorError):
+        TorrentSelector.parse(expression)
+
+
+@pytest.mark.parametrize("expression", ["foo:bar", "tag", "size:", 'name:"unterminated', "size:1G", "size:>1X",
+                                        "hash:", "hash:,", "hash: , ", "tag:x hash:"])
+def test_invalid_expression(expression):
+    with pytest.raises(SelectorError):
+        TorrentSelector.parse(expression)
+
+
+def test_aliases_negation_and_quotes():
+    selector = TorrentSelector.parse('cat:movies,tv -status:errored name:"movie 2024"')
+    assert [t.key for t in selector.terms] == ["category", "state", "name"]
+    assert selector.terms[1].negate
+    assert selector.matches(_torrent(name="The Movie 2024"))
+    assert not selector.matches(_torrent(name="The Movie 2024", state="missingFiles"))
+
+
+@pytest.mark.parametrize("expression, size, expected", [
+    ("size:>1G", 1 << 30, False), ("size:>=1G", 1 << 30, True), ("size:<1K", 1023, True),
+    ("size:1G..2G", 2 << 30, True), ("size:..1M", 2 << 20, False), ("size:1.5G..", 2 << 30, True),
+])
+def test_size_ranges(expression, size, expected):
+    assert TorrentSelector.parse(expression).matches(_torrent(size=size)) == expected
+
+
+@pytest.mark.parametrize("save_path, expected", [
+    ("/data/pt", True), ("/data/pt/", True), ("/data/pt/movies", True), ("/data/pt2", False), ("/data", False),
+])
+def test_path_matches_directory(save_path, expected):
+    assert TorrentSelector.parse("path:/data/pt/").matches(_torrent(save_path=save_path)) == expected
+
+
+def test_windows_path():
+    assert TorrentSelector.parse('path:"D:\\pt"').matches(_torrent(save_path="D:\\pt\\movies"))
+
+
+def test_tracker_matches_subdomains_only():
+    selector = TorrentSelector.parse("tracker:example.com")
+    assert selector.matches(_torrent(tracker="https://t.example.com/announce"))
+    assert not selector.matches(_torrent(tracker="https://badexample.com/announce"))
+
+
+def test_empty_tag_matches_untagged():
+    selector = TorrentSelector.parse("tag:")
+    assert selector.matches(_torrent(tags=""))
+    assert not selector.matches(_torrent())
+
+
+def test_server_params_pushdown():
+    selector = TorrentSelector.parse("tag:IYUU自动辅种 state:paused category:a,b -hash:cd hash:AB")
+    params, pushed = selector.server_params("2.11.0")
+    assert params == {"tag": "IYUU自动辅种", "status_filter": "stopped", "torrent_hashes": ["ab"]}
+    assert pushed == {0, 1, 4}
+    assert selector.server_params("2.9.0")[0]["status_filter"] == "paused"
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bencode import encode  # noqa: E402
+from utils.spot_check import SpotChecker, TorrentLayout  # noqa: E402
+
+PIECE_LENGTH = 16384
+# a 之后是 BEP 47 填充文件，使 b 从分块边界开始；b 与 c 共用第 3 个分块
+FILES = [("a", 20000), (".pad", 32768 - 20000), ("b", 30000), ("c", 10000)]
+
+
+def _content(name, length):
+    if name == ".pad":
+        return bytes(length)
+    return (hashlib.sha256(name.encode()).digest() * (length // 32 + 1))[:length]
+
+
+def make_torrent(root):
+    """在 root 下写入各文件，返回对应的 v1 种子内容"""
+    os.makedirs(root, exist_ok=True)
+    data = b""
+    entries = []
+    for name, length in FILES:
+        content = _content(name, length)
+        data += content
+        if name == ".pad":
+            entries.append({"length": length, "path": [".pad", str(length)], "attr": b"p"})
+            continue
+        with open(os.path.join(root, name), "wb") as f:
+            f.write(content)
+        entries.append({"length": length, "path": [name]})
+    pieces = b"".join(hashlib.sha1(data[i:i + PIECE_LENGTH]).digest() for i in range(0, len(data), PIECE_LENGTH))
+    return encode({"info": {"name": "content", "piece length": PIECE_LENGTH, "pieces": pieces, "files": entries}})
+
+
+def corrupt(path, offset):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xff]))
+
+
+@pytest.fixture
+def content(tmp_path):
+    root = str(tmp_path / "content")
+    return root, make_torrent(root)
+
+
+def test_layout_marks_padding(content):
+    layout = TorrentLayout.from_torrent(content[1])
+    assert [(f.parts[-1], f.offset, f.padding) for f in layout.files] == \
+        [("a", 0, False), ("12768", 20000, True), ("b", 32768, False), ("c", 62768, False)]
+    assert layout.piece_count == 5
+
+
+def test_spot_check_ok(content):
+    root, torrent = content
+    assert SpotChecker(samples=8, rng=random.Random(0)).check(root, torrent) is None
+
+
+@pytest.mark.parametrize("name, offset", [("a", 0), ("b", 0), ("c", 9999)])
+def test_spot_check_detects_boundary_corruption(content, name, offset):
+    # 边界分块不超过 samples 个时，各文件首尾所在的分块都会被抽查，与随机数无关
+    root, torrent = content
+    corrupt(os.path.join(root, name), offset)
+    assert "哈希不匹配" in SpotChecker(samples=8, rng=random.Random(0)).check(root, torrent)
+
+
+def test_spot_check_missing_and_truncated(content):
+    root, torrent = content
+    with open(os.path.join(root, "b"), "r+b") as f:
+        f.truncate(100)
+    assert SpotChecker(samples=8, rng=random.Random(0)).check(root, torrent) is not None
+    os.remove(os.path.join(root, "a"))
+    assert os.path.join(root, "a") in SpotChecker(samples=8, rng=random.Random(0)).check(root, torrent)
@@ -0,0 +1,121 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.spot_check_test import content, corrupt  # noqa: E402,F401  content 为 fixture
+from utils.spot_check import SpotChecker  # noqa: E402
+from utils.verify import VerifyEngine  # noqa: E402
+from utils.verify_cache import VerifyCache  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = VerifyCache(str(tmp_path / "verify_cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def _paths(root, *names):
+    return {os.path.join(root, name) for name in names}
+
+
+def test_full_result_serves_spot_but_not_vice_versa(content, cache):
+    root, torrent = content
+    cache.store(cache.lookup(torrent, root, cache.SPOT), cache.SPOT, _paths(root, "a"))
+    assert cache.lookup(torrent, root, cache.SPOT).hits == _paths(root, "a")
+    assert cache.lookup(torrent, root, cache.FULL).hits == set()
+
+    cache.store(cache.lookup(torrent, root, cache.FULL), cache.FULL, _paths(root, "a", "b"))
+    assert cache.lookup(torrent, root, cache.FULL).hits == _paths(root, "a", "b")
+    assert cache.lookup(torrent, root, cache.SPOT).hits == _paths(root, "a", "b")
+    # 之后的抽查结果不会降低已有的级别
+    cache.store(cache.lookup(torrent, root, cache.SPOT), cache.SPOT, _paths(root, "a"))
+    assert cache.lookup(torrent, root, cache.FULL).hits == _paths(root, "a", "b")
+
+
+def _touch_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _grow(path):
+    st = os.stat(path)
+    with open(path, "ab") as f:
+        f.write(b"x")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _replace_inode(path):
+    # 内容、大小、修改时间都相同，只有 inode 不同
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path + ".new", "wb") as f:
+        f.write(data)
+    os.utime(path + ".new", ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(path + ".new", path)
+
+
+@pytest.mark.parametrize("change", [_touch_mtime, _grow, _replace_inode])
+def test_changed_file_is_invalidated(content, cache, change):
+    root, torrent = content
+    cache.store(cache.lookup(torrent, root, cache.FULL), cache.FULL, _paths(root, "a", "b", "c"))
+    change(os.path.join(root, "b"))
+    assert cache.lookup(torrent, root, cache.SPOT).hits == _paths(root, "a", "c")
+    assert cache._conn.execute("SELECT COUNT(*) FROM verified").fetchone()[0] == 2  # 失效的记录已删除
+
+
+def test_identity_is_taken_before_reading(content, cache):
+    # 校验期间文件被改动时，按查询时的文件身份记录，下次查询即失效
+    root, torrent = content
+    lookup = cache.lookup(torrent, root, cache.FULL)
+    _touch_mtime(os.path.join(root, "a"))
+    cache.store(lookup, cache.FULL, _paths(root, "a"))
+    assert cache.lookup(torrent, root, cache.FULL).hits == set()
+
+
+def test_different_expected_content_does_not_hit(content, cache):
+    root, torrent = content
+    cache.store(cache.lookup(torrent, root, cache.FULL), cache.FULL, _paths(root, "a", "b", "c"))
+    # 同一路径、不同的期望内容：改动最后一个分块的哈希，只有 c 的指纹随之改变
+    patched = bytearray(torrent)
+    patched[torrent.index(b"6:pieces") + len(b"6:pieces100:") + 99] ^= 0xff
+    assert cache.lookup(bytes(patched), root, cache.FULL).hits == _paths(root, "a", "b")
+
+
+def test_evicts_least_recently_used(tmp_path, content):
+    root, torrent = content
+    cache = VerifyCache(str(tmp_path / "small.sqlite3"), max_entries=2)
+    try:
+        lookup = cache.lookup(torrent, root, cache.FULL)
+        cache.store(lookup, cache.FULL, _paths(root, "a", "b", "c"))
+        assert cache._conn.execute("SELECT COUNT(*) FROM verified").fetchone()[0] == 2
+    finally:
+        cache.close()
+
+
+def test_engines_reuse_and_record_results(content, cache):
+    root, torrent = content
+    with VerifyEngine(processes=1, cache=cache) as engine:
+        assert engine.verify(root, torrent).cached == 0
+        assert engine.verify(root, torrent).cached == 3
+    assert SpotChecker(samples=8, rng=random.Random(0), cache=cache).check(root, torrent) is None
+
+    corrupt(os.path.join(root, "a"), 0)
+    _touch_mtime(os.path.join(root, "a"))
+    assert "哈希不匹配" in SpotChecker(samples=8, rng=random.Random(0), cache=cache).check(root, torrent)
+    with VerifyEngine(processes=1, cache=cache) as engine:
+        result = engine.verify(root, torrent)
+    assert result.cached == 2 and set(result.problems) == _paths(root, "a")
+
+
+def test_failed_check_is_not_cached(content, cache):
+    root, torrent = content
+    corrupt(os.path.join(root, "c"), 0)
+    with VerifyEngine(processes=1, cache=cache) as engine:
+        engine.verify(root, torrent)
+    assert cache.lookup(torrent, root, cache.FULL).hits == _paths(root, "a")  # b 与损坏的 c 共用分块
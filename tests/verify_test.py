@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.spot_check_test import PIECE_LENGTH, content, corrupt  # noqa: E402,F401  content 为 fixture
+from utils.verify import VerifyEngine  # noqa: E402
+
+# 单进程，以及每个子任务只有两个分块的多进程（任务之间有跨文件的分块）
+ENGINES = [dict(processes=1), dict(processes=2, chunk_bytes=2 * PIECE_LENGTH)]
+
+
+@pytest.mark.parametrize("options", ENGINES)
+def test_verify_ok(content, options):
+    root, torrent = content
+    with VerifyEngine(**options) as engine:
+        result = engine.verify(root, torrent)
+    assert result.ok
+    assert result.pieces == 5 and result.failed_pieces == 0
+    assert result.files == {os.path.join(root, name): True for name in ("a", "b", "c")}  # 填充文件不在磁盘上
+
+
+@pytest.mark.parametrize("options", ENGINES)
+def test_verify_attributes_corruption_to_file(content, options):
+    root, torrent = content
+    corrupt(os.path.join(root, "b"), 100)  # 第 2 个分块，只属于 b
+    with VerifyEngine(**options) as engine:
+        result = engine.verify(root, torrent)
+    assert not result.ok
+    assert result.failed_pieces == 1
+    assert set(result.problems) == {os.path.join(root, "b")}
+    assert result.files[os.path.join(root, "a")] and result.files[os.path.join(root, "c")]
+
+
+@pytest.mark.parametrize("options", ENGINES)
+def test_verify_missing_file_does_not_blame_neighbour(content, options):
+    root, torrent = content
+    os.remove(os.path.join(root, "c"))
+    with VerifyEngine(**options) as engine:
+        result = engine.verify(root, torrent)
+    assert list(result.problems) == [os.path.join(root, "c")]
+    assert "不存在" in result.problems[os.path.join(root, "c")]
+    # b 与缺失的 c 共用分块，没有问题记录，但也不能确认完好
+    assert result.files[os.path.join(root, "b")] is False
+    assert result.files[os.path.join(root, "a")] is True
+
+
+def test_verify_skip_still_reads_shared_pieces(content):
+    root, torrent = content
+    corrupt(os.path.join(root, "b"), 29999)  # b 的最后一个字节，位于与 c 共用的分块
+    with VerifyEngine(processes=1) as engine:
+        result = engine.verify(root, torrent, skip=[os.path.join(root, "b")])
+    assert result.failed_pieces == 1
+    assert result.files[os.path.join(root, "c")] is False
@@ -1,7 +1,5 @@
 import os
-import shutil
 import sys
-import time
 import tkinter as tk
 import tkinter.filedialog as fd
 from os import getenv, mkdir
@@ -13,20 +11,35 @@ import qbittorrentapi
 from packaging.version import Version
 
 from utils.avalon import Avalon
+from utils.dataclass_util import load_dataclass_from_env
+from utils.qb_client import ConnectionConfig, create_client
+from utils.qb_wait import TorrentWaiter
+from utils.bt_backup import new_backup_dir, snapshot_bt_backup
+from utils.torrent_cache import TorrentStateCache
+from utils.selector import SelectorError, Term, TorrentSelector
+from utils.verify import VerifyEngine
+from utils.verify_cache import VerifyCache
+from utils.bencode import add_missing_trackers, torrent_trackers
 
 dotenv.load_dotenv()
 
-qb_host = str(getenv("QB_HOST", "http://127.0.0.1"))
-qb_port = int(getenv("QB_PORT", 8080))
-qb_username = str(getenv("QB_USERNAME", ""))
-qb_passwd = str(getenv("QB_PASSWD", ""))
+# 连接配置（含连接池、超时和重试）从 QB_ 环境变量加载，密码兼容旧的 QB_PASSWD
+qb_conn_config = load_dataclass_from_env(ConnectionConfig, "QB_")
+qb_conn_config.password = qb_conn_config.password or str(getenv("QB_PASSWD", ""))
 qb_backup_path = str(expandvars(getenv("QB_BACKUP_PATH", r"%LOCALAPPDATA%\qBittorrent\BT_backup")))
+qb_wait_timeout = float(getenv("QB_WAIT_TIMEOUT", 10))
+# 旧版 API 备份 BT_backup 时使用硬链接代替复制
+qb_backup_hardlink = getenv("QB_BACKUP_HARDLINK", "").lower() in ('true', '1', 't', 'y', 'yes')
+# 重新添加前先在本机完整校验新位置的文件，未通过的种子不做处理
+qb_verify = getenv("QB_VERIFY", "").lower() in ('true', '1', 't', 'y', 'yes')
+# 校验通过的文件记录到缓存中，与 main.py 共用 ./temp/verify_cache.sqlite3
+qb_verify_cache = getenv("QB_VERIFY_CACHE", "true").lower() in ('true', '1', 't', 'y', 'yes')
+qb_verify_cache_size = int(getenv("QB_VERIFY_CACHE_SIZE", 100000))
 
 
-def qb_login(host: str, port: int, username: str, password: str) -> qbittorrentapi.Client:
+def qb_login(config: ConnectionConfig) -> qbittorrentapi.Client:
     Avalon.info("尝试登录 Web UI……", front="\n")
-    conn_info = dict(host=host, port=port, username=username, password=password)
-    qbc = qbittorrentapi.Client(**conn_info)
+    qbc = create_client(config)
     try:
         qbc.auth_log_in()
     except qbittorrentapi.LoginFailed as e:
@@ -36,33 +49,55 @@ def qb_login(host: str, port: int, username: str, password: str) -> qbittorrenta
 
 
 # 获取种子信息并按文件大小降序排列, 其次以保存路径、名称升序排列
-def get_torrents(client):
-    _torrents = client.torrents_info()
+# 通过 sync/maindata 增量刷新，首次之后只传输有变化的种子
+def get_torrents(cache):
+    cache.refresh()
+    _torrents = cache.torrents()
     return sorted(_torrents, key=lambda x: (-x.size, x.save_path, x.name))
 
 
+# 种子内容在新保存路径下的位置：多文件种子为其根目录，单文件种子为文件本身
+def new_content_path(torrent, new_path):
+    content_path = torrent['content_path'].replace('\\', '/').rstrip('/')
+    if content_path == torrent['save_path'].replace('\\', '/').rstrip('/'):
+        return new_path  # 多文件种子未创建子文件夹
+    return os.path.join(new_path, content_path.rsplit('/', 1)[-1])
+
+
+# 搜索框内容转为筛选条件：含 “条件:值” 时按筛选表达式解析（如 "category:movies size:>1G"），否则按名称搜索
+def parse_search(search_text):
+    search_text = search_text.strip()
+    if ":" in search_text:
+        return TorrentSelector.parse(search_text)
+    return TorrentSelector([Term("name", (search_text,))] if search_text else [])
+
+
 # 更新种子列表
 def update_torrent_list(_torrents, search_text=""):
+    try:
+        selector = parse_search(search_text)
+    except SelectorError as e:
+        Avalon.error(str(e))
+        return
     for item in tree.get_children():  # 载入新的之前先清空
         tree.delete(item)
-    for index, torrent in enumerate(_torrents):
-        if search_text.lower() in torrent.name.lower():
-            size = torrent.size
-            if size >= 1 << 30:
-                size_str = f"{size / (1 << 30):.2f} GB"
-            elif size >= 1 << 20:
-                size_str = f"{size / (1 << 20):.2f} MB"
-            else:
-                size_str = f"{size / (1 << 10):.2f} KB"
-            # 根据行索引设置背景色
-            if index % 2 == 0:
-                tag = 'even_row'  # 给偶数行打上tag
-            else:
-                tag = ''
-            # 插入数据时，新增一个空字符串作为选择列的初始值
-            tree.insert("", "end",
-                        values=("", torrent.name, size_str, torrent.save_path, torrent.state, torrent.hash),
-                        tags=tag)
+    for index, torrent in enumerate(selector.select(_torrents)):
+        size = torrent.size
+        if size >= 1 << 30:
+            size_str = f"{size / (1 << 30):.2f} GB"
+        elif size >= 1 << 20:
+            size_str = f"{size / (1 << 20):.2f} MB"
+        else:
+            size_str = f"{size / (1 << 10):.2f} KB"
+        # 根据行索引设置背景色
+        if index % 2 == 0:
+            tag = 'even_row'  # 给偶数行打上tag
+        else:
+            tag = ''
+        # 插入数据时，新增一个空字符串作为选择列的初始值
+        tree.insert("", "end",
+                    values=("", torrent.name, size_str, torrent.save_path, torrent.state, torrent.hash),
+                    tags=tag)
 
 
 # 搜索功能
@@ -123,7 +158,8 @@ def set_new_path():
             Avalon.warning("No item selected!")
             return  # 防止传入空列表，导致意外选中全部种子
 
-        selected_torrents = qbt_client.torrents_info(torrent_hashes=selected_hashes)  # 根据 hash 去获取选种子信息
+        torrent_cache.refresh()
+        selected_torrents = torrent_cache.torrents(selected_hashes)  # 根据 hash 去获取选种子信息
 
         ###
         # 开始为种子设定新的保存路径，并跳过校验
@@ -137,23 +173,48 @@ def set_new_path():
         try:
             # 旧版 API
             if not USE_NEW_EXPORT_API:
-                shutil.rmtree("./temp_BT_backup") if os.path.exists("./temp_BT_Backup") else None
-                shutil.copytree(qb_backup_path, "./temp_BT_Backup")
-                Avalon.info(f"已备份种子文件夹：{qb_backup_path} 到当前目录")
+                backup_dir = new_backup_dir("./temp_BT_Backup")
+                manifest = snapshot_bt_backup(qb_backup_path, backup_dir, selected_hashes, hardlink=qb_backup_hardlink)
+                Avalon.info(f"已从种子文件夹 {qb_backup_path} 备份 {len(manifest['files'])} 个文件到 {backup_dir}，"
+                            f"如需还原可执行 python -m utils.bt_backup restore {backup_dir}")
 
             for torrent in selected_torrents:
                 torrent_filename = torrent['hash'] + '.torrent'
                 if USE_NEW_EXPORT_API:
-                    with open(f"./temp/{torrent_filename}", 'wb') as f:
-                        f.write(qbt_client.torrents.export(torrent['hash']))  # 导出种子文件
+                    torrent_data = qbt_client.torrents.export(torrent['hash'])  # 导出种子文件
+                    original_trackers = [torrent['tracker']] if torrent['tracker'] else []
                 else:
-                    shutil.copy(os.path.join(qb_backup_path, torrent_filename), f"./temp/{torrent_filename}")  # 复制出种子文件
-                    with open(f"./temp/{torrent['hash']}.txt", 'w') as f:
-                        f.write(torrent['tracker'])  # 保存备份 tracker 列表
+                    with open(os.path.join(qb_backup_path, torrent_filename), 'rb') as f:
+                        torrent_data = f.read()  # 读取种子文件
+                    # BT_backup 中的种子可能不含 tracker，以 .fastresume 中记录的为准
+                    fastresume_path = os.path.join(qb_backup_path, torrent['hash'] + '.fastresume')
+                    original_trackers = []
+                    if os.path.exists(fastresume_path):
+                        with open(fastresume_path, 'rb') as f:
+                            original_trackers = torrent_trackers(f.read())
+
+                # 删除前就把缺失的 tracker 写入种子文件，添加后无需再查询、补充
+                torrent_data, added_trackers = add_missing_trackers(torrent_data, original_trackers)
+                if added_trackers:
+                    Avalon.warning(f"种子：{torrent['name']} 的 tracker 列表为空，已写入种子！ Tracker：{added_trackers}")
+
+                if verifier is not None:
+                    result = verifier.verify(new_content_path(torrent, str(new_path)), torrent_data)
+                    if not result.ok:
+                        Avalon.warning(f"种子：{torrent['name']} 在新路径下校验未通过，已跳过！ Hash：{torrent['hash']}")
+                        if not result.supported:
+                            Avalon.warning("种子中没有可用于校验的分块哈希")
+                        for path, problem in result.problems.items():
+                            Avalon.warning(f"    {path}: {problem}")
+                        continue
+                    Avalon.info(f"种子：{torrent['name']} 校验通过（{result.speed / (1 << 20):.0f} MiB/s）")
+                with open(f"./temp/{torrent_filename}", 'wb') as f:
+                    f.write(torrent_data)
 
                 qbt_client.torrents_delete(delete_files=False, torrent_hashes=torrent['hash'])  # 删除种子
 
-                time.sleep(1)
+                if not waiter.wait_gone(torrent['hash']):  # 等待种子真正被删除
+                    Avalon.warning(f"种子：{torrent['name']} 删除后 {qb_wait_timeout} 秒内仍未消失！")
 
                 res = qbt_client.torrents_add(
                     torrent_files=f"./temp/{torrent_filename}",
@@ -169,17 +230,14 @@ def set_new_path():
                     Avalon.info(f"种子：{torrent['name']} 处理成功！ Hash：{torrent['hash']}")
                     os.remove(f"./temp/{torrent_filename}")  # 删除种子文件
 
-                    time.sleep(1)  # 必要的，否则太快了会有 404
-                    # 检查 tracker 是否为空, 若为空则添加
-                    if not qbt_client.torrents.trackers(torrent['hash']):
-                        qbt_client.torrents.add_trackers(torrent['hash'], torrent['tracker'])
-                        Avalon.warning(
-                            f"种子：{torrent['name']} 的 tracker 列表为空，已添加！ Tracker：{torrent['tracker']}")
+                    waiter.wait_present(torrent['hash'])  # 等待添加生效后再处理下一个
                 else:
                     Avalon.warning(f"种子：{torrent['name']} 添加失败！ Hash：{torrent['hash']}")
 
+            Avalon.info(f"等待统计：{waiter.summary()}")
+
             # 再次更新列表
-            torrents = get_torrents(qbt_client)
+            torrents = get_torrents(torrent_cache)
             update_torrent_list(torrents)
             update_selected_count()
 
@@ -192,6 +250,10 @@ def set_new_path():
 
 def on_closing():
     Avalon.info("执行完毕", front="\n")
+    if verifier is not None:
+        verifier.close()
+    if verify_cache is not None:
+        verify_cache.close()
     qbt_client.auth_log_out()
     root.destroy()
 
@@ -200,11 +262,13 @@ if __name__ == '__main__':
     os.chdir(sys.path[0])
     mkdir("temp") if not os.path.exists("temp") else None
 
-    if not all([qb_host, qb_port, qb_username, qb_passwd]):
+    if not all([qb_conn_config.host, qb_conn_config.port, qb_conn_config.username, qb_conn_config.password]):
         Avalon.warning("请检查环境变量是否配置正确！")
         None if Avalon.ask("是否继续？", default=False) else sys.exit(0)
 
-    qbt_client = qb_login(qb_host, qb_port, qb_username, qb_passwd)
+    qbt_client = qb_login(qb_conn_config)
+    verify_cache = VerifyCache("./temp/verify_cache.sqlite3", qb_verify_cache_size) if qb_verify and qb_verify_cache else None
+    verifier = VerifyEngine(cache=verify_cache) if qb_verify else None
     Avalon.info(f"qBittorrent: {qbt_client.app.version}")
     Avalon.info(f"qBittorrent Web API: {qbt_client.app.web_api_version}")
 
@@ -284,9 +348,10 @@ if __name__ == '__main__':
     set_path_button = tk.Button(bottom_frame, text="Set New Path", command=set_new_path)
     set_path_button.pack(anchor='center', padx=5)
 
-    # 登录并获取种子信息
-    qbt_client = qb_login(qb_host, qb_port, qb_username, qb_passwd)
-    torrents = get_torrents(qbt_client)
+    # 获取种子信息（复用启动时的登录会话，会话过期时客户端会自动重新登录）
+    waiter = TorrentWaiter(qbt_client, timeout=qb_wait_timeout)
+    torrent_cache = TorrentStateCache(qbt_client)
+    torrents = get_torrents(torrent_cache)
     Avalon.info(f"获取到种子数：{len(torrents)}")
     update_torrent_list(torrents)
 
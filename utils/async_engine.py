@@ -0,0 +1,219 @@
+import asyncio
+import time
+from contextlib import nullcontext
+from os.path import join
+from typing import Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:  # 可选依赖，仅异步引擎需要
+    aiohttp = None
+
+from utils.avalon import Avalon
+from utils.bencode import add_missing_trackers
+
+
+class AsyncEngineUnavailable(RuntimeError):
+    """未安装 aiohttp 时无法使用异步引擎"""
+
+
+def build_base_url(host: str, port: int) -> str:
+    """由 QB_HOST / QB_PORT 构造 Web UI 地址，QB_HOST 中已带端口时忽略 QB_PORT"""
+    if "://" not in host:
+        host = f"http://{host}"
+    parsed = urlparse(host)
+    netloc = parsed.netloc if parsed.port is not None else f"{parsed.netloc}:{port}"
+    return f"{parsed.scheme}://{netloc}{parsed.path.rstrip('/')}"
+
+
+class AsyncSkipCheckEngine:
+    """
+    基于 asyncio 的跳过校验引擎。
+
+    与 QBittorrentSkipCheck 执行相同的流程（导出并补全 tracker → 删除 → 添加），但每个种子
+    是一个协程，所有请求共用一个带连接池的 HTTP 会话，由信号量限制同时处理的种子数。
+    qBittorrent 位于高延迟的远程主机时，可以让大量请求的往返时间相互重叠。
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str, concurrency: int = 8,
+                 wait_timeout: float = 10.0, connect_timeout: float = 5.0, timeout: float = 30.0,
+                 temp_dir: str = "./temp", journal=None, metrics=None):
+        if aiohttp is None:
+            raise AsyncEngineUnavailable("异步引擎需要 aiohttp，请先执行 pip install aiohttp")
+        self.base_url = build_base_url(host, port)
+        self.username = username
+        self.password = password
+        self.concurrency = max(1, concurrency)
+        self.wait_timeout = wait_timeout
+        self.client_timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=timeout)
+        self.temp_dir = temp_dir
+        self.journal = journal  # 可选的 TorrentJournal，记录每个种子的处理阶段
+        self.metrics = metrics  # 可选的 RunMetrics，统计各阶段和各接口的耗时
+        self.processed_count = 0
+        self.failed_count = 0
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def run(self, torrents: Iterable[dict]):
+        """处理给定的种子，返回 (成功数, 失败数)"""
+        connector = aiohttp.TCPConnector(limit=self.concurrency * 2)
+        async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True),
+                                         timeout=self.client_timeout) as session:
+            self._session = session
+            await self._login()
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def limited(torrent):
+                async with semaphore:
+                    await self._process_single_torrent(torrent)
+
+            await asyncio.gather(*(limited(t) for t in torrents))
+            try:
+                await self._request("POST", "auth/logout", relogin=False)
+            except Exception as e:
+                Avalon.warning(f"退出Web UI会话时出错: {e}")
+        self._session = None
+        return self.processed_count, self.failed_count
+
+    async def _process_single_torrent(self, torrent):
+        torrent_hash = torrent.get('hash')
+        torrent_name = torrent.get('name', '未知名称')
+        if not torrent_hash:
+            Avalon.warning(f"跳过一个无法获取 Hash 的种子: {torrent_name}")
+            return
+
+        Avalon.info(f"处理中: {torrent_name} (Hash: {torrent_hash[:8]}...)")
+        torrent_data = None
+        re_added = False
+        try:
+            with self._phase("export"):
+                torrent_data = await self._request("GET", "torrents/export", params={"hash": torrent_hash},
+                                                   binary=True)
+            with self._phase("trackers"):
+                original_trackers = [t.strip() for t in torrent.get('tracker', '').splitlines() if t.strip()]
+                torrent_data, added = add_missing_trackers(torrent_data, original_trackers)
+            if added:
+                Avalon.warning(f"  ! 种子 {torrent_name} 的tracker列表为空或不完整，已将 {len(added)} 个原始tracker写入种子。")
+            if self.journal is not None:
+                self.journal.begin(torrent, torrent_data=torrent_data)
+
+            with self._phase("delete"):
+                await self._request("POST", "torrents/delete", data={"hashes": torrent_hash, "deleteFiles": "false"})
+            Avalon.info(f"  - 已删除种子 (保留文件): {torrent_name}")
+            self._journal_mark(torrent_hash, "deleted")
+            with self._phase("wait_gone"):
+                still_present = await self._wait({torrent_hash}, present=False)
+            if still_present:
+                Avalon.warning(f"  ! 等待 {self.wait_timeout} 秒后种子仍未从客户端消失: {torrent_name}")
+
+            re_added = await self._re_add_torrent(torrent, torrent_data)
+            if re_added:
+                self._journal_mark(torrent_hash, "re_added")
+                self.processed_count += 1
+            else:
+                self.failed_count += 1
+        except Exception as e:
+            Avalon.error(f"处理种子 {torrent_name} 时发生错误: {e}")
+            self.failed_count += 1
+        finally:
+            if torrent_data is not None and not re_added:
+                self._spill_torrent_file(torrent_hash, torrent_data)
+
+    async def _re_add_torrent(self, torrent, torrent_data) -> bool:
+        torrent_hash = torrent['hash']
+
+        def build_form():
+            form = aiohttp.FormData()
+            form.add_field("torrents", torrent_data, filename=f"{torrent_hash}.torrent",
+                           content_type="application/x-bittorrent")
+            for key, value in (("savepath", torrent['save_path']), ("category", torrent['category']),
+                               ("tags", torrent['tags']), ("skip_checking", "true"),
+                               ("upLimit", torrent['up_limit']), ("dlLimit", torrent['dl_limit'])):
+                form.add_field(key, str(value))
+            return form
+
+        with self._phase("add"):
+            res = await self._request("POST", "torrents/add", data=build_form)
+        if "OK" not in res.upper():
+            Avalon.error(f"  X 种子添加失败: {torrent['name']}. 响应: {res}")
+            return False
+        Avalon.info(f"  + 种子重新添加成功: {torrent['name']}")
+        with self._phase("wait_present"):
+            missing = await self._wait({torrent_hash}, present=True)
+        if missing:
+            Avalon.warning(f"  ! 等待 {self.wait_timeout} 秒后仍未在客户端中查询到种子: {torrent['name']}")
+        return True
+
+    async def _wait(self, hashes: Set[str], present: bool) -> Set[str]:
+        """轮询直到种子全部出现/消失，返回超时后仍未满足条件的 hash"""
+        deadline = time.monotonic() + self.wait_timeout
+        interval = 0.05
+        while True:
+            infos = await self._request("GET", "torrents/info", params={"hashes": "|".join(hashes)}, json=True)
+            found = {t['hash'].lower() for t in infos}
+            pending = {h for h in hashes if (h.lower() in found) != present}
+            if not pending or time.monotonic() >= deadline:
+                return pending
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 1.0)
+
+    async def _login(self):
+        res = await self._request("POST", "auth/login", data={"username": self.username, "password": self.password},
+                                  relogin=False)
+        if res.strip() != "Ok.":
+            raise PermissionError(f"登录 {self.base_url} 失败: {res}")
+
+    async def _request(self, method: str, endpoint: str, params=None, data=None, binary=False, json=False,
+                       relogin=True):
+        """
+        发送请求，会话过期 (403) 时自动重新登录并重试一次。
+
+        data 可以是生成请求体的函数，用于 multipart 表单这类只能发送一次的请求体。
+        """
+        url = f"{self.base_url}/api/v2/{endpoint}"
+        body = data() if callable(data) else data
+        start = time.perf_counter()
+        error = True
+        try:
+            async with self._session.request(method, url, params=params, data=body,
+                                             headers={"Referer": self.base_url}) as resp:
+                if not (resp.status == 403 and relogin):
+                    resp.raise_for_status()
+                    if binary:
+                        result = await resp.read()
+                    elif json:
+                        result = await resp.json(content_type=None)
+                    else:
+                        result = await resp.text()
+                    error = False
+                    return result
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_endpoint(endpoint, time.perf_counter() - start, error)
+
+        await self._login()
+        return await self._request(method, endpoint, params=params, data=data, binary=binary, json=json,
+                                   relogin=False)
+
+    def _phase(self, name):
+        """统计阶段耗时（协程内使用，耗时包含等待其他协程的时间）"""
+        return self.metrics.phase(name) if self.metrics is not None else nullcontext()
+
+    def _journal_mark(self, torrent_hash, phase):
+        if self.journal is not None:
+            self.journal.mark(torrent_hash, phase)
+
+    def _spill_torrent_file(self, torrent_hash, torrent_data):
+        torrent_filepath = join(self.temp_dir, f"{torrent_hash}.torrent")
+        try:
+            with open(torrent_filepath, 'wb') as f:
+                f.write(torrent_data)
+            Avalon.warning(f"  ! 种子文件已保存到 {torrent_filepath}，可手动添加恢复。")
+        except OSError as e:
+            Avalon.error(f"  X 保存种子文件 {torrent_filepath} 失败: {e}")
+
+
+def run_async_engine(torrents: List[dict], **kwargs):
+    """同步入口：在新的事件循环中运行异步引擎，返回 (成功数, 失败数)"""
+    engine = AsyncSkipCheckEngine(**kwargs)
+    return asyncio.run(engine.run(torrents))
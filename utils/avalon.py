@@ -18,7 +18,6 @@ and foreground colors.
 
 # built-in imports
 import sys
-import threading
 
 PLATFORM = sys.platform
 
@@ -51,6 +50,10 @@ class Avalon:
     # optional thread lock
     thread_lock = None
 
+    # optional logging backend (e.g. utils.log_backend.QueueLogBackend)
+    # when set, messages are handed over to it instead of being printed directly
+    backend = None
+
     class FG:
         """ Foreground Colors
 
@@ -135,23 +138,48 @@ class Avalon:
     def _print(msg, file, end):
         """ thread-safe print method
 
-        This is a simple thread-safe print method. If a thread lock
-        is provided, then the lock will be acquired before printing the
-        message, and will be released after printing the message.
+        This is a simple thread-safe print method. If Avalon.thread_lock
+        is set, it is held while printing the message.
 
         Arguments:
             msg {string} -- message to print
-
-        Keyword Arguments:
-            thread_lock {threading.Lock()} -- thread lock to use (default: {None})
+            file {_io.TextIOWrapper} -- pipe to write output to
+            end {str} -- line ending
         """
-        if isinstance(threading.Lock(), type(Avalon.thread_lock)):
-            Avalon.thread_lock.acquire()
-            print(msg, file=file, end=end)
-            Avalon.thread_lock.release()
+        if Avalon.thread_lock is not None:
+            with Avalon.thread_lock:
+                print(msg, file=file, end=end)
         else:
             print(msg, file=file, end=end)
 
+    @staticmethod
+    def _emit(level, msg, line, file, end, syslog_priority=None):
+        """ hand a message over to the backend, or print it directly
+
+        Arguments:
+            level {str} -- message level (debug, info, warning, error)
+            msg {str} -- plain message without colors
+            line {str} -- formatted console line
+            file {_io.TextIOWrapper} -- pipe to write output to
+            end {str} -- line ending
+
+        Keyword Arguments:
+            syslog_priority {int} -- syslog priority, None to skip syslog (default: {None})
+        """
+        if Avalon.backend is not None:
+            Avalon.backend.submit(level, msg, line, file, end, syslog_priority)
+            return
+        Avalon._print(line, file=file, end=end)
+        if syslog_priority is not None:
+            syslog.syslog(syslog_priority, msg)
+
+    @staticmethod
+    def _syslog_priority(log, name):
+        """ return the syslog priority to log with, or None if syslog is not used """
+        if log and PLATFORM != 'win32':
+            return getattr(syslog, name)
+        return None
+
     @staticmethod
     def info(msg, log=False, front="", end="\n", file=sys.stdout):
         """ print regular information
@@ -163,9 +191,8 @@ class Avalon:
             log {bool} -- Ture logs message to syslog on Linux (default: {False})
             file {_io.TextIOWrapper} -- pipe to write output to (default: {sys.stdout})
         """
-        Avalon._print(f'{front}{Avalon.FG.G}[+] INFO: {str(msg)}{Avalon.FM.RST}', file=file, end=end)
-        if log and PLATFORM != 'win32':
-            syslog.syslog(syslog.LOG_INFO, msg)
+        Avalon._emit('info', str(msg), f'{front}{Avalon.FG.G}[+] INFO: {str(msg)}{Avalon.FM.RST}', file, end,
+                     Avalon._syslog_priority(log, 'LOG_INFO'))
 
     @staticmethod
     def time_info(msg, log=False, front="", end="\n", file=sys.stdout):
@@ -179,11 +206,10 @@ class Avalon:
             file {_io.TextIOWrapper} -- pipe to write output to (default: {sys.stdout})
         """
         import datetime
-        Avalon._print(
+        Avalon._emit(
+            'info', str(msg),
             f'{front}{Avalon.FM.RST}{str(datetime.datetime.now())}{Avalon.FG.G} [+] INFO: {str(msg)}{Avalon.FM.RST}',
-            file=file, end=end)
-        if log and PLATFORM != 'win32':
-            syslog.syslog(syslog.LOG_INFO, msg)
+            file, end, Avalon._syslog_priority(log, 'LOG_INFO'))
 
     @staticmethod
     def debug_info(msg, log=True, front="", end="\n", file=sys.stderr):
@@ -197,10 +223,9 @@ class Avalon:
             file {_io.TextIOWrapper} -- pipe to write output to (default: {sys.stderr})
         """
         import datetime
-        Avalon._print(f'{front}{Avalon.FG.DGR}{str(datetime.datetime.now())} [+] INFO: {str(msg)}{Avalon.FM.RST}',
-                      file=file, end=end)
-        if log and PLATFORM != 'win32':
-            syslog.syslog(syslog.LOG_DEBUG, msg)
+        Avalon._emit('debug', str(msg),
+                     f'{front}{Avalon.FG.DGR}{str(datetime.datetime.now())} [+] INFO: {str(msg)}{Avalon.FM.RST}',
+                     file, end, Avalon._syslog_priority(log, 'LOG_DEBUG'))
 
     @staticmethod
     def warning(msg, log=False, front="", end="\n", file=sys.stderr):
@@ -213,9 +238,8 @@ class Avalon:
             log {bool} -- Ture logs message to syslog on Linux (default: {False})
             file {_io.TextIOWrapper} -- pipe to write output to (default: {sys.stderr})
         """
-        Avalon._print(f'{front}{Avalon.FG.Y}{Avalon.FM.BD}[^] WARNING: {str(msg)}{Avalon.FM.RST}', file=file, end=end)
-        if log and PLATFORM != 'win32':
-            syslog.syslog(syslog.LOG_WARNING, msg)
+        Avalon._emit('warning', str(msg), f'{front}{Avalon.FG.Y}{Avalon.FM.BD}[^] WARNING: {str(msg)}{Avalon.FM.RST}',
+                     file, end, Avalon._syslog_priority(log, 'LOG_WARNING'))
 
     @staticmethod
     def error(msg, log=True, front="", end="\n", file=sys.stderr):
@@ -228,9 +252,8 @@ class Avalon:
             log {bool} -- Ture logs message to syslog on Linux (default: {True})
             file {_io.TextIOWrapper} -- pipe to write output to (default: {sys.stderr})
         """
-        Avalon._print(f'{front}{Avalon.FG.R}{Avalon.FM.BD}[!] ERROR: {str(msg)}{Avalon.FM.RST}', file=file, end=end)
-        if log and PLATFORM != 'win32':
-            syslog.syslog(syslog.LOG_WARNING, msg)
+        Avalon._emit('error', str(msg), f'{front}{Avalon.FG.R}{Avalon.FM.BD}[!] ERROR: {str(msg)}{Avalon.FM.RST}',
+                     file, end, Avalon._syslog_priority(log, 'LOG_WARNING'))
 
     @staticmethod
     def debug(msg, log=True, front="", end="\n", file=sys.stderr):
@@ -243,9 +266,8 @@ class Avalon:
             log {bool} -- Ture logs message to syslog on Linux (default: {True})
             file {_io.TextIOWrapper} -- pipe to write output to (default: {sys.stderr})
         """
-        Avalon._print(f'{front}{Avalon.FG.R}{Avalon.FM.RDM}[*] DEBUG: {str(msg)}{Avalon.FM.RST}', file=file, end=end)
-        if log and PLATFORM != 'win32':
-            syslog.syslog(syslog.LOG_DEBUG, msg)
+        Avalon._emit('debug', str(msg), f'{front}{Avalon.FG.R}{Avalon.FM.RDM}[*] DEBUG: {str(msg)}{Avalon.FM.RST}',
+                     file, end, Avalon._syslog_priority(log, 'LOG_DEBUG'))
 
     @staticmethod
     def gets(msg, default=None, batch=False, front="", end="", file=sys.stdout):
@@ -267,6 +289,10 @@ class Avalon:
         if batch:
             return default
 
+        # make sure queued messages are shown before the prompt
+        if Avalon.backend is not None:
+            Avalon.backend.flush()
+
         print(f'{front}{Avalon.FG.C}{Avalon.FM.BD}[?] USER: {str(msg)}{Avalon.FM.RST}', end=end, file=file)
 
         # get user input
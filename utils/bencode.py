@@ -0,0 +1,168 @@
+"""
+轻量的 bencode 编解码，用于直接读取 .torrent / .fastresume 内容。
+
+字典的键解码为 str（UTF-8，无法解码的字节以 surrogateescape 保留），其余字符串保持为 bytes，
+因此 encode(decode(data)) 对规范编码的数据是逐字节还原的。
+"""
+import hashlib
+from typing import Iterable, List, Tuple, Union
+
+BencodeT = Union[int, bytes, list, dict]
+
+
+class BencodeError(ValueError):
+    """数据不是合法的 bencode"""
+
+
+class RawBencode(bytes):
+    """已编码好的 bencode 片段，encode 时原样输出（用于保证 info 字典逐字节不变）"""
+
+
+def decode(data: bytes) -> BencodeT:
+    """解码完整的 bencode 数据"""
+    try:
+        value, pos = _decode(data, 0)
+    except BencodeError:
+        raise
+    except (IndexError, ValueError) as e:
+        raise BencodeError(f"无效的 bencode 数据: {e}") from None
+    if pos != len(data):
+        raise BencodeError(f"bencode 数据在第 {pos} 字节后有多余内容")
+    return value
+
+
+def _decode(data: bytes, pos: int) -> Tuple[BencodeT, int]:
+    c = data[pos]
+    if c == 0x69:  # i
+        end = data.index(b'e', pos)
+        return int(data[pos + 1:end]), end + 1
+    if c == 0x6c:  # l
+        pos += 1
+        items = []
+        while data[pos] != 0x65:  # e
+            item, pos = _decode(data, pos)
+            items.append(item)
+        return items, pos + 1
+    if c == 0x64:  # d
+        pos += 1
+        result = {}
+        while data[pos] != 0x65:
+            key, pos = _decode_bytes(data, pos)
+            result[key.decode('utf-8', 'surrogateescape')], pos = _decode(data, pos)
+        return result, pos + 1
+    if 0x30 <= c <= 0x39:
+        return _decode_bytes(data, pos)
+    raise BencodeError(f"第 {pos} 字节处出现无法识别的类型标记 {chr(c)!r}")
+
+
+def _decode_bytes(data: bytes, pos: int) -> Tuple[bytes, int]:
+    colon = data.index(b':', pos)
+    length = int(data[pos:colon])
+    start = colon + 1
+    if start + length > len(data):
+        raise BencodeError(f"第 {pos} 字节处的字符串长度超出数据范围")
+    return data[start:start + length], start + length
+
+
+def encode(value: BencodeT) -> bytes:
+    """编码为 bencode，字典按键的原始字节排序"""
+    out = []
+    _encode(value, out)
+    return b''.join(out)
+
+
+def _encode(value, out: list):
+    if isinstance(value, RawBencode):
+        out.append(value)
+    elif isinstance(value, bool):
+        out.append(b'i%de' % int(value))
+    elif isinstance(value, int):
+        out.append(b'i%de' % value)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(b'%d:' % len(value))
+        out.append(bytes(value))
+    elif isinstance(value, str):
+        _encode(value.encode('utf-8', 'surrogateescape'), out)
+    elif isinstance(value, (list, tuple)):
+        out.append(b'l')
+        for item in value:
+            _encode(item, out)
+        out.append(b'e')
+    elif isinstance(value, dict):
+        out.append(b'd')
+        items = [(k.encode('utf-8', 'surrogateescape') if isinstance(k, str) else k, v) for k, v in value.items()]
+        for key, item in sorted(items):
+            _encode(key, out)
+            _encode(item, out)
+        out.append(b'e')
+    else:
+        raise TypeError(f"无法编码为 bencode 的类型: {type(value).__name__}")
+
+
+def raw_info(data: bytes) -> RawBencode:
+    """返回种子中 info 字典的原始编码片段，不做重新编码"""
+    if not data.startswith(b'd'):
+        raise BencodeError("种子文件顶层不是字典")
+    pos = 1
+    try:
+        while data[pos] != 0x65:
+            key, pos = _decode_bytes(data, pos)
+            _, end = _decode(data, pos)
+            if key == b'info':
+                return RawBencode(data[pos:end])
+            pos = end
+    except BencodeError:
+        raise
+    except (IndexError, ValueError) as e:
+        raise BencodeError(f"无效的 bencode 数据: {e}") from None
+    raise BencodeError("种子文件中没有 info 字典")
+
+
+def info_hash(data: bytes) -> str:
+    """计算种子的 v1 info hash（十六进制小写）"""
+    return hashlib.sha1(raw_info(data)).hexdigest()
+
+
+def _text(value) -> str:
+    return value.decode('utf-8', 'replace') if isinstance(value, (bytes, bytearray)) else str(value)
+
+
+def tracker_tiers(meta: dict) -> List[List[str]]:
+    """
+    读取 tracker 分层列表。
+
+    支持 .torrent 的 announce-list / announce，以及 .fastresume 的 trackers。
+    """
+    tiers = meta.get('announce-list') or meta.get('trackers')
+    if tiers:
+        result = [[_text(url) for url in tier if url] for tier in tiers if isinstance(tier, list)]
+        return [tier for tier in result if tier]
+    if meta.get('announce'):
+        return [[_text(meta['announce'])]]
+    return []
+
+
+def torrent_trackers(data: bytes) -> List[str]:
+    """从 .torrent / .fastresume 内容中读取所有 tracker（按出现顺序去重）"""
+    return list(dict.fromkeys(url for tier in tracker_tiers(decode(data)) for url in tier))
+
+
+def add_missing_trackers(torrent_data: bytes, trackers: Iterable[str]) -> Tuple[bytes, List[str]]:
+    """
+    把种子文件中缺失的 tracker 写入 announce-list（每个单独成层），info 字典保持逐字节不变，
+    因此 info hash 不受影响。
+
+    :return: (新的种子内容, 实际补上的 tracker 列表)，没有缺失时原样返回种子内容
+    """
+    meta = decode(torrent_data)
+    tiers = tracker_tiers(meta)
+    existing = {url for tier in tiers for url in tier}
+    missing = [url for url in dict.fromkeys(trackers) if url and url not in existing]
+    if not missing:
+        return torrent_data, []
+
+    tiers.extend([url] for url in missing)
+    meta['info'] = raw_info(torrent_data)
+    meta['announce'] = tiers[0][0]
+    meta['announce-list'] = tiers
+    return encode(meta), missing
@@ -0,0 +1,140 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import time
+from os.path import exists, join
+from typing import Iterable, List, Optional
+
+MANIFEST_NAME = "manifest.json"
+BACKUP_EXTENSIONS = (".torrent", ".fastresume")
+
+
+def snapshot_bt_backup(backup_path: str, dest_dir: str, torrent_hashes: Iterable[str], hardlink: bool = False) -> dict:
+    """
+    只备份指定种子在 BT_backup 中的 .torrent/.fastresume 文件，并写入清单文件。
+
+    默认复制文件。hardlink 为 True 时优先使用硬链接，几乎不占用额外空间和时间，但只有在写入方
+    总是先写新文件再替换（不原地改写）时备份才不会随原文件一起变化：离线改写（utils.fastresume）如此，
+    旧版（低于 v4.5）qBittorrent 是否如此没有验证过，因此旧版 API 只在用户明确开启时使用硬链接。
+    跨分区等无法硬链接的情况回退为复制。
+
+    :param backup_path: qBittorrent 的 BT_backup 文件夹
+    :param dest_dir: 备份目录，不能是已有内容的目录（不会覆盖之前的备份），通常由 new_backup_dir 选取
+    :param torrent_hashes: 需要备份的种子 hash
+    :param hardlink: 是否优先使用硬链接
+    :return: 清单内容
+    """
+    if exists(dest_dir) and os.listdir(dest_dir):
+        raise FileExistsError(f"备份目录 {dest_dir} 已存在且不为空，不会覆盖其中的备份")
+    os.makedirs(dest_dir, exist_ok=True)
+
+    files, missing = [], []
+    for torrent_hash in dict.fromkeys(torrent_hashes):
+        for ext in BACKUP_EXTENSIONS:
+            name = f"{torrent_hash}{ext}"
+            src = join(backup_path, name)
+            if not exists(src):
+                missing.append(name)
+                continue
+            dst = join(dest_dir, name)
+            linked = False
+            if hardlink:
+                try:
+                    os.link(src, dst)
+                    linked = True
+                except OSError:
+                    pass
+            if not linked:
+                shutil.copy2(src, dst)
+            st = os.stat(dst)
+            files.append(dict(name=name, size=st.st_size, mtime_ns=st.st_mtime_ns, sha1=_sha1_of(dst), linked=linked))
+
+    manifest = dict(source=os.path.abspath(backup_path), created=time.strftime("%Y-%m-%d %H:%M:%S"),
+                    files=files, missing=missing)
+    with open(join(dest_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def new_backup_dir(parent: str) -> str:
+    """在 parent 下选取一个尚不存在、按当前时间命名的备份目录（不创建），每次备份各用一个，互不覆盖"""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    for n in itertools.count(1):
+        path = join(parent, f"{stamp}_{n}")
+        if not exists(path):
+            return path
+
+
+def load_manifest(dest_dir: str) -> dict:
+    """读取备份目录中的清单"""
+    with open(join(dest_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_bt_backup(dest_dir: str) -> List[str]:
+    """
+    按清单校验备份，先比较大小，再比较 SHA-1。
+
+    :return: 缺失或内容不符的文件名列表，为空表示备份完好
+    """
+    problems = []
+    for item in load_manifest(dest_dir)["files"]:
+        path = join(dest_dir, item["name"])
+        if not exists(path) or os.path.getsize(path) != item["size"] or _sha1_of(path) != item["sha1"]:
+            problems.append(item["name"])
+    return problems
+
+
+def restore_bt_backup(dest_dir: str, backup_path: Optional[str] = None,
+                      torrent_hashes: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    将备份的文件还原到 BT_backup（需先关闭 qBittorrent），每个文件先写临时文件再原子替换。
+
+    :param dest_dir: 备份目录
+    :param backup_path: 还原到的 BT_backup 文件夹，默认为清单中记录的来源
+    :param torrent_hashes: 只还原这些种子，默认全部还原
+    :return: 已还原的文件名列表
+    """
+    manifest = load_manifest(dest_dir)
+    backup_path = backup_path or manifest["source"]
+    wanted = set(torrent_hashes) if torrent_hashes is not None else None
+
+    restored = []
+    for item in manifest["files"]:
+        name = item["name"]
+        if wanted is not None and os.path.splitext(name)[0] not in wanted:
+            continue
+        target = join(backup_path, name)
+        tmp = f"{target}.restore_tmp"
+        shutil.copy2(join(dest_dir, name), tmp)
+        os.replace(tmp, target)
+        restored.append(name)
+    return restored
+
+
+def _sha1_of(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="校验或还原 BT_backup 选择性备份")
+    parser.add_argument("action", choices=("verify", "restore"))
+    parser.add_argument("backup_dir", help="备份目录 (如 ./temp_BT_Backup/20250101-120000_1)")
+    parser.add_argument("--to", dest="backup_path", default=None, help="还原到的 BT_backup 文件夹 (默认为清单中记录的来源)")
+    args = parser.parse_args()
+
+    if args.action == "verify":
+        bad = verify_bt_backup(args.backup_dir)
+        print("备份完好" if not bad else "以下文件缺失或内容不符:\n" + "\n".join(bad))
+    else:
+        bad = verify_bt_backup(args.backup_dir)
+        if bad:
+            print("警告：以下备份文件与清单不符，仍将按当前内容还原:\n" + "\n".join(bad))
+        print(f"已还原 {len(restore_bt_backup(args.backup_dir, args.backup_path))} 个文件")
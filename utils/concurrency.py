@@ -0,0 +1,93 @@
+"""
+根据 qBittorrent 的响应延迟自动调整并发数（AIMD：加性增、乘性减）。
+
+qBittorrent 的 Web UI 由单个线程处理请求，请求过多时延迟会急剧上升。控制器在延迟低于目标值时
+逐步放开同时处理的种子数，一旦出现超时、5xx 错误或延迟尖峰就立即减半。
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class AdaptiveLimiter:
+    """AIMD 并发上限，slot() 用于包住每个种子的处理流程，record() 用于反馈请求延迟"""
+
+    def __init__(self, initial: int = 2, minimum: int = 1, maximum: int = 16, target_latency: float = 0.5,
+                 spike_factor: float = 3.0, decrease_factor: float = 0.5, smoothing: float = 0.2):
+        """
+        :param initial: 初始并发上限
+        :param minimum: 并发上限的下限
+        :param maximum: 并发上限的上限（即线程池大小）
+        :param target_latency: 目标延迟（秒），平滑后的延迟超过该值时收缩
+        :param spike_factor: 单次延迟超过目标值的该倍数时视为尖峰，立即收缩
+        :param decrease_factor: 收缩时并发上限乘以的系数
+        :param smoothing: 延迟指数移动平均的权重
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.target_latency = target_latency
+        self.spike_factor = spike_factor
+        self.decrease_factor = decrease_factor
+        self.smoothing = smoothing
+        self.latency: Optional[float] = None  # 平滑后的延迟
+        self.peak = int(self.limit)
+        self.increases = 0
+        self.decreases = 0
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def current(self) -> int:
+        """当前允许同时处理的种子数"""
+        return int(self.limit)
+
+    @contextmanager
+    def slot(self):
+        """占用一个并发名额，名额不足时等待"""
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record(self, latency: float, error: bool = False):
+        """反馈一次请求的结果"""
+        with self._cond:
+            if not error:
+                self.latency = latency if self.latency is None else (
+                        self.smoothing * latency + (1 - self.smoothing) * self.latency)
+            spike = latency > self.target_latency * self.spike_factor
+            if error or spike or (self.latency or 0) > self.target_latency:
+                self._decrease()
+            elif self._in_flight >= int(self.limit):
+                # 只有名额确实用满时才加，约每完成一轮请求上限加 1
+                before = int(self.limit)
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+                if int(self.limit) > before:
+                    self.increases += 1
+                    self.peak = max(self.peak, int(self.limit))
+            self._cond.notify_all()
+
+    def _decrease(self):
+        # 同一波慢请求会陆续返回，一个延迟周期内只收缩一次，避免连续砍到下限
+        now = time.monotonic()
+        if now - self._last_decrease < max(self.latency or 0, self.target_latency):
+            return
+        self._last_decrease = now
+        new_limit = max(float(self.minimum), self.limit * self.decrease_factor)
+        if int(new_limit) < int(self.limit):
+            self.decreases += 1
+        self.limit = new_limit
+
+    def summary(self) -> str:
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else "无"
+        return (f"当前并发上限 {self.current}（范围 {self.minimum}-{self.maximum}，峰值 {self.peak}），"
+                f"上调 {self.increases} 次，下调 {self.decreases} 次，平滑延迟 {latency}")
@@ -0,0 +1,127 @@
+"""
+做种内容索引：把客户端中已完成的种子的文件按 (相对路径, 大小) 建立索引，用来为辅种查找“兄弟种子”——
+同一保存路径下覆盖其全部文件、已完成并正在做种的种子。有兄弟种子说明这份内容已经在本机完好地做种，
+辅种可以不经抽查或完整校验直接跳过校验重新添加。
+
+索引首次建立时获取所有已完成种子的文件列表，之后借助 sync/maindata（TorrentStateCache）增量更新：
+只为新完成、或保存路径等发生变化的种子重新获取文件列表，已删除的种子从索引中移除。
+种子当前是否在做种不写入索引，匹配时按缓存中的最新状态判断。
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.torrent_cache import TorrentStateCache
+
+# 已完成且正在做种（或排队做种）的状态；暂停、校验中、文件丢失、出错的种子不算
+SEEDING_STATES = frozenset({"uploading", "stalledUP", "forcedUP", "queuedUP"})
+
+FileKey = Tuple[str, int]  # (相对路径, 大小)
+
+
+class ContentIndex:
+    """线程安全的 (相对路径, 大小) -> 种子 hash 索引"""
+
+    def __init__(self, client, cache: TorrentStateCache, workers: int = 8):
+        """
+        :param client: 已登录的 qbittorrentapi.Client
+        :param cache: 种子状态缓存，可与其他地方共用（索引每次刷新时与缓存中的全部种子核对，不依赖变化集合）
+        :param workers: 并行获取文件列表的线程数
+        """
+        self.client = client
+        self.cache = cache
+        self.workers = max(1, workers)
+        self._index: Dict[FileKey, Set[str]] = {}
+        self._files: Dict[str, List[FileKey]] = {}  # hash -> 已索引的文件
+        self._signatures: Dict[str, Tuple] = {}  # hash -> 建立索引时的保存路径、名称、大小和是否完成
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Tuple[int, int]:
+        """
+        增量刷新种子状态，并让索引与之保持一致。
+
+        :return: (重新获取文件列表的种子数, 从索引中移除的种子数)
+        """
+        self.cache.refresh()
+        torrents = {t['hash']: t for t in self.cache.torrents()}
+        with self._lock:
+            stale = [h for h, signature in self._signatures.items()
+                     if h not in torrents or _signature(torrents[h]) != signature]
+            for torrent_hash in stale:
+                self._remove(torrent_hash)
+            pending = [t for h, t in torrents.items() if h not in self._signatures and t.get('progress', 0) >= 1]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="content_index") as executor:
+            file_lists = list(executor.map(self._complete_files, pending))
+        with self._lock:
+            for torrent, files in zip(pending, file_lists):
+                if files is None:
+                    continue  # 获取失败，下次刷新时重试
+                self._signatures[torrent['hash']] = _signature(torrent)
+                self._files[torrent['hash']] = files
+                for key in files:
+                    self._index.setdefault(key, set()).add(torrent['hash'])
+        return len(pending), len([h for h in stale if h not in torrents])
+
+    def match(self, targets: List) -> Dict[str, Optional[str]]:
+        """为给定的种子查找兄弟种子，返回 {hash: 兄弟种子 hash}，找不到（或获取文件列表失败）时为 None"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="content_index") as executor:
+            file_lists = list(executor.map(self._target_files, targets))
+        return {t['hash']: self.find_sibling(t, files) if files is not None else None
+                for t, files in zip(targets, file_lists)}
+
+    def find_sibling(self, torrent, files: List[FileKey]) -> Optional[str]:
+        """返回同一保存路径下覆盖 files 中全部文件、正在做种的种子 hash，耗时与文件数成正比"""
+        candidates = None
+        with self._lock:
+            for key in files:
+                hashes = self._index.get(key, set())
+                candidates = set(hashes) if candidates is None else candidates & hashes
+                if not candidates:
+                    return None
+        if candidates is None:
+            return None  # 没有非空文件可供比对
+        save_path = _normalize(torrent.get('save_path', ''))
+        candidates.discard(torrent['hash'])
+        for sibling in self.cache.torrents(sorted(candidates)):
+            if sibling.get('state') in SEEDING_STATES and _normalize(sibling.get('save_path', '')) == save_path:
+                return sibling['hash']
+        return None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._files)
+
+    def _remove(self, torrent_hash: str):
+        for key in self._files.pop(torrent_hash, ()):
+            hashes = self._index.get(key)
+            if hashes is not None:
+                hashes.discard(torrent_hash)
+                if not hashes:
+                    del self._index[key]
+        self._signatures.pop(torrent_hash, None)
+
+    def _complete_files(self, torrent) -> Optional[List[FileKey]]:
+        """已完成种子中下载完毕的文件，获取失败时返回 None"""
+        try:
+            files = self.client.torrents_files(torrent_hash=torrent['hash'])
+        except Exception:
+            return None
+        return [(f['name'], f['size']) for f in files if f['size'] and f.get('progress', 0) >= 1]
+
+    def _target_files(self, torrent) -> Optional[List[FileKey]]:
+        """辅种需要由兄弟种子覆盖的文件（所有非空文件），获取失败时返回 None"""
+        try:
+            files = self.client.torrents_files(torrent_hash=torrent['hash'])
+        except Exception:
+            return None
+        return [(f['name'], f['size']) for f in files if f['size']]
+
+
+def _signature(torrent) -> Tuple:
+    # 重新校验后未完成的种子也要移出索引，再次完成时重新获取文件列表
+    return (_normalize(torrent.get('save_path', '')), torrent.get('name'), torrent.get('size'),
+            torrent.get('progress', 0) >= 1)
+
+
+def _normalize(path: str) -> str:
+    return path.replace("\\", "/").rstrip("/")
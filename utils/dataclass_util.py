@@ -61,6 +61,8 @@ def load_dataclass_from_env(dataclass_type: Type[T], prefix: str = '') -> T:
             try:
                 if field_type is int:
                     loaded_values[field.name] = int(value_str)
+                elif field_type is float:
+                    loaded_values[field.name] = float(value_str)
                 elif field_type is bool:
                     loaded_values[field.name] = value_str.lower() in ('true', '1', 't', 'y', 'yes')
                 else:
@@ -0,0 +1,111 @@
+"""
+离线处理 qBittorrent 的 .fastresume 文件（qBittorrent 必须已退出）。
+
+跳过校验的本质是让 libtorrent 认为种子的所有分块都已存在：qBittorrent 的“跳过哈希校验”
+对应 libtorrent 的 seed_mode 标志。这里直接把 fastresume 改写成与之等价的状态，
+不经过 Web API 的删除/重新添加。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from os.path import exists, join
+from typing import Iterable, List, Optional, Tuple
+
+from utils.bencode import BencodeError, decode, encode
+
+# fastresume 中表示“暂停/停止”的标志（libtorrent 的 paused，以及部分 qBittorrent 版本自己的字段）
+PAUSED_KEYS = ("paused", "qBt-paused", "qBt-stopped")
+
+
+def _text(value) -> str:
+    return value.decode("utf-8", "replace") if isinstance(value, (bytes, bytearray)) else str(value)
+
+
+def is_target(resume: dict, tag: str) -> bool:
+    """fastresume 是否为带指定标签的暂停种子"""
+    tags = [_text(t) for t in resume.get("qBt-tags", [])]
+    return tag in tags and any(resume.get(key) for key in PAUSED_KEYS)
+
+
+def piece_count(info: dict) -> int:
+    """根据 info 字典计算分块数，支持 v1、v2 和混合种子"""
+    if "pieces" in info:
+        return len(info["pieces"]) // 20
+
+    # 纯 v2 种子：每个文件单独按分块对齐
+    piece_length = info["piece length"]
+    total = 0
+    stack = [info.get("file tree", {})]
+    while stack:
+        node = stack.pop()
+        for name, child in node.items():
+            if name == "" and "length" in child:
+                total += -(-child["length"] // piece_length)
+            else:
+                stack.append(child)
+    return total
+
+
+def scan_fastresume(path: str, tag: str) -> Optional[str]:
+    """检查单个 fastresume，符合条件时返回种子 hash（供进程池调用）"""
+    try:
+        with open(path, "rb") as f:
+            resume = decode(f.read())
+    except (OSError, BencodeError):
+        return None
+    if isinstance(resume, dict) and is_target(resume, tag):
+        return os.path.splitext(os.path.basename(path))[0]
+    return None
+
+
+def rewrite_fastresume(backup_path: str, torrent_hash: str) -> Tuple[str, bool, str]:
+    """
+    把单个种子的 fastresume 改写为“已完成、跳过校验、开始做种”，先写临时文件再原子替换。
+
+    :return: (hash, 是否成功, 说明)
+    """
+    resume_path = join(backup_path, f"{torrent_hash}.fastresume")
+    torrent_path = join(backup_path, f"{torrent_hash}.torrent")
+    try:
+        with open(resume_path, "rb") as f:
+            resume = decode(f.read())
+
+        info = resume.get("info")
+        if info is None:
+            if not exists(torrent_path):
+                return torrent_hash, False, "找不到对应的 .torrent 文件，无法确定分块数"
+            with open(torrent_path, "rb") as f:
+                info = decode(f.read())["info"]
+
+        resume["pieces"] = b"\x01" * piece_count(info)  # 每个分块都标记为已拥有
+        resume["seed_mode"] = 1  # 等同于添加时勾选“跳过哈希校验”
+        resume.pop("unfinished", None)  # 未完成分块的区块信息已无意义
+        for key in PAUSED_KEYS:
+            if key in resume:
+                resume[key] = 0
+
+        tmp_path = f"{resume_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode(resume))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, resume_path)
+        return torrent_hash, True, ""
+    except (OSError, BencodeError, KeyError, TypeError) as e:
+        return torrent_hash, False, str(e)
+
+
+def find_offline_targets(backup_path: str, tag: str, processes: Optional[int] = None) -> List[str]:
+    """并行扫描 BT_backup，返回带指定标签的暂停种子的 hash"""
+    paths = [join(backup_path, name) for name in os.listdir(backup_path) if name.endswith(".fastresume")]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(scan_fastresume, paths, [tag] * len(paths), chunksize=256)
+        return [h for h in results if h]
+
+
+def rewrite_all(backup_path: str, torrent_hashes: Iterable[str],
+                processes: Optional[int] = None) -> List[Tuple[str, bool, str]]:
+    """用进程池批量改写 fastresume，返回每个种子的结果"""
+    torrent_hashes = list(torrent_hashes)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(rewrite_fastresume, [backup_path] * len(torrent_hashes), torrent_hashes,
+                                 chunksize=64))
@@ -0,0 +1,134 @@
+"""
+追加写入的处理日志（JSONL），记录每个种子所处的阶段，用于进程崩溃后的恢复。
+
+每行是一条记录：{"hash", "phase", "ts", ...}。种子在删除前先写入 exported 记录（附带重新添加所需的参数，
+以及种子文件路径或 base64 编码的种子内容）并 fsync，因此即使在删除与重新添加之间崩溃，
+下次启动时也能根据日志把种子找回来。
+"""
+import base64
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# 阶段：exported（已导出，即将删除）→ deleted（已删除）→ re_added（已重新添加）；
+# skipped 表示种子没有被删除（仍在客户端中），无需恢复
+PHASES = ("exported", "deleted", "re_added", "skipped")
+PENDING_PHASES = ("exported", "deleted")
+
+# 重新添加时需要的种子属性
+TORRENT_FIELDS = ("name", "save_path", "content_path", "category", "tags", "up_limit", "dl_limit")
+
+
+class TorrentJournal:
+    """
+    线程安全的处理日志。
+
+    打开时读取已有记录并压缩（只保留未完成的种子），之后所有记录都追加写入同一个文件。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Dict[str, dict] = self._load(path)
+        self._compact()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def begin(self, torrent, torrent_file: Optional[str] = None, torrent_data: Optional[bytes] = None):
+        """删除种子前调用：记录添加参数和种子文件（路径或内容），写入磁盘后才返回"""
+        self.begin_many([(torrent, torrent_file, torrent_data)])
+
+    def begin_many(self, items: Iterable[Tuple[dict, Optional[str], Optional[bytes]]]):
+        """begin 的批量版本，items 为 (种子信息, 种子文件路径, 种子内容)，整批只 fsync 一次"""
+        records = []
+        for torrent, torrent_file, torrent_data in items:
+            record = {"hash": torrent["hash"], "phase": "exported",
+                      "torrent": {key: torrent[key] for key in TORRENT_FIELDS}}
+            if torrent_data is not None:
+                record["data"] = base64.b64encode(torrent_data).decode("ascii")
+            else:
+                record["file"] = torrent_file
+            records.append(record)
+        if records:
+            self._append(records)
+
+    def mark(self, hashes: Union[str, Iterable[str]], phase: str):
+        """记录种子进入新的阶段"""
+        if phase not in PHASES:
+            raise ValueError(f"未知的阶段: {phase}")
+        hashes = [hashes] if isinstance(hashes, str) else list(hashes)
+        if hashes:
+            self._append([{"hash": h, "phase": phase} for h in hashes])
+
+    def pending(self) -> List[dict]:
+        """返回上次中断时仍未完成（已导出或已删除，但未确认重新添加）的种子记录"""
+        with self._lock:
+            return [dict(r) for r in self._records.values()]
+
+    @staticmethod
+    def torrent_source(record: dict) -> Union[bytes, str, None]:
+        """取出记录中的种子内容（bytes）或种子文件路径，两者都不可用时返回 None"""
+        if record.get("data"):
+            return base64.b64decode(record["data"])
+        if record.get("file") and os.path.exists(record["file"]):
+            return record["file"]
+        return None
+
+    def close(self):
+        """关闭日志，并压缩掉已完成的记录；没有未完成的种子时删除日志文件"""
+        with self._lock:
+            self._file.close()
+        self._compact()
+
+    def _append(self, records: List[dict]):
+        now = time.time()
+        lines = []
+        for record in records:
+            record["ts"] = round(now, 3)
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        with self._lock:
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            for record in records:
+                _merge(self._records, record)
+
+    @staticmethod
+    def _load(path: str) -> Dict[str, dict]:
+        records = {}
+        if not os.path.exists(path):
+            return records
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时写了一半的最后一行
+                if isinstance(record, dict) and record.get("hash") and record.get("phase") in PHASES:
+                    _merge(records, record)
+        return records
+
+    def _compact(self):
+        """只保留未完成的种子，写入临时文件后原子替换"""
+        with self._lock:
+            pending = list(self._records.values())
+        if not pending:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in pending:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def _merge(records: Dict[str, dict], record: dict):
+    """把一条记录合并进种子的当前状态；种子完成后即丢弃，内存中只保留未完成的种子"""
+    if record["phase"] not in PENDING_PHASES:
+        records.pop(record["hash"], None)
+        return
+    records.setdefault(record["hash"], {}).update(record)
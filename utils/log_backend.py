@@ -0,0 +1,111 @@
+"""
+Avalon 的非阻塞日志后端：调用方只把消息放入队列，由后台线程统一写控制台、syslog 和 JSON Lines 文件。
+
+控制台输出的格式和颜色与直接使用 Avalon 时完全相同；多线程处理时不再争用输出锁，
+也不会因为同步写 syslog 而阻塞处理线程。
+"""
+import atexit
+import json
+import queue
+import sys
+import threading
+from datetime import datetime
+from typing import Optional
+
+from utils.avalon import Avalon
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+_STOP = object()
+
+
+class QueueLogBackend:
+    """队列 + 后台写线程的日志后端，按级别过滤，可同时写入 JSON Lines 文件"""
+
+    def __init__(self, level: str = "info", json_file: Optional[str] = None):
+        """
+        :param level: 最低输出级别（debug、info、warning、error），低于该级别的消息直接丢弃
+        :param json_file: JSON Lines 日志文件路径，为空时不写文件
+        """
+        if level.lower() not in LEVELS:
+            raise ValueError(f"未知的日志级别: {level}，可选值为 {', '.join(LEVELS)}")
+        self.level = LEVELS[level.lower()]
+        self._queue = queue.Queue()
+        self._json = open(json_file, "a", encoding="utf-8") if json_file else None
+        self._thread = threading.Thread(target=self._run, name="log_writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, level, msg, line, file, end, syslog_priority=None):
+        """由 Avalon 调用：过滤级别后放入队列，立即返回"""
+        if LEVELS.get(level, LEVELS["info"]) < self.level:
+            return
+        self._queue.put((datetime.now(), level, msg, line, file, end, syslog_priority,
+                         threading.current_thread().name))
+
+    def flush(self):
+        """等待队列中已有的消息全部写出"""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """写出剩余消息后停止后台线程并关闭日志文件"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self._json is not None:
+            self._json.close()
+            self._json = None
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            # 一次取出队列中积压的所有消息，合并写出后再刷新
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            touched = set()
+            for item in items:
+                if item is _STOP:
+                    stop = True
+                    continue
+                try:
+                    self._write(item, touched)
+                except Exception as e:  # 日志写出失败不影响主流程
+                    print(f"日志写出失败: {e}", file=sys.__stderr__)
+            for stream in touched:
+                try:
+                    stream.flush()
+                except Exception:
+                    pass
+            for _ in items:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, item, touched):
+        timestamp, level, msg, line, file, end, syslog_priority, thread_name = item
+        file.write(line + end)
+        touched.add(file)
+        if syslog_priority is not None:
+            import syslog
+            syslog.syslog(syslog_priority, msg)
+        if self._json is not None:
+            self._json.write(json.dumps({"time": timestamp.isoformat(timespec="milliseconds"), "level": level,
+                                         "thread": thread_name, "msg": msg}, ensure_ascii=False) + "\n")
+            touched.add(self._json)
+
+
+def install(level: str = "info", json_file: Optional[str] = None) -> QueueLogBackend:
+    """为 Avalon 安装队列日志后端，程序退出时自动写出剩余消息"""
+    backend = QueueLogBackend(level=level, json_file=json_file)
+    Avalon.backend = backend
+
+    def shutdown():
+        Avalon.backend = None
+        backend.close()
+
+    atexit.register(shutdown)
+    return backend
@@ -0,0 +1,113 @@
+"""
+BitTorrent v2（BEP 52）的文件布局与 merkle 树计算。
+
+v2 种子按文件分别计算哈希：每个文件切成 16 KiB 的块，以块的 SHA-256 为叶子构建 merkle 树，
+根哈希记在 info['file tree'] 的 pieces root 中；超过一个分块的文件另在种子顶层的 piece layers 中
+保存分块层（每个分块对应的子树根）的哈希。因此每个文件、每个分块都可以单独校验，与其他文件无关。
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from utils.bencode import decode
+
+BLOCK_SIZE = 16 * 1024
+HASH_SIZE = 32
+ZERO_HASH = bytes(HASH_SIZE)
+
+
+@dataclass
+class V2File:
+    """v2 种子中的一个文件，parts 为相对内容路径的路径分量"""
+    parts: List[str]
+    length: int
+    pieces_root: bytes  # 空文件为 b""
+    piece_layer: bytes  # 分块层哈希依次拼接；不超过一个分块的文件，或种子中缺少分块层时为 b""
+
+
+@dataclass
+class V2Layout:
+    """v2 或混合种子的按文件布局"""
+    piece_length: int
+    files: List[V2File]
+    single_file: bool
+    hybrid: bool  # 同时带有 v1 分块哈希
+
+    @property
+    def total_length(self) -> int:
+        return sum(f.length for f in self.files)
+
+    def piece_count(self, f: V2File) -> int:
+        return -(-f.length // self.piece_length)
+
+    @classmethod
+    def from_torrent(cls, torrent_data: bytes) -> Optional["V2Layout"]:
+        """解析种子内容，没有 v2 信息的种子返回 None"""
+        torrent = decode(torrent_data)
+        info = torrent['info']
+        if info.get('meta version') != 2 or not isinstance(info.get('file tree'), dict):
+            return None
+        # 分块层以 pieces root 为键，解码时键被转成了字符串，这里还原为原始字节
+        layers = {key.encode('utf-8', 'surrogateescape'): value
+                  for key, value in (torrent.get('piece layers') or {}).items()}
+        files = []
+        _walk(info['file tree'], [], files, layers)
+        # 单文件种子的文件树只有一个位于顶层的文件，内容路径即该文件本身
+        single_file = len(files) == 1 and len(files[0].parts) == 1
+        return cls(info['piece length'], files, single_file, 'pieces' in info)
+
+
+def _walk(tree: Dict, parts: List[str], files: List[V2File], layers: Dict[bytes, bytes]):
+    for name, node in tree.items():
+        if not isinstance(node, dict):
+            continue
+        if '' in node:
+            leaf = node['']
+            root = leaf.get('pieces root', b'')
+            files.append(V2File(parts + [name], leaf.get('length', 0), root, layers.get(root, b'')))
+        else:
+            _walk(node, parts + [name], files, layers)
+
+
+def merkle_root(hashes: List[bytes], leaves: int, pad: bytes = ZERO_HASH) -> bytes:
+    """以 hashes 为叶子、用 pad 补齐到 leaves 个（2 的幂）叶子后计算根哈希"""
+    layer = list(hashes)
+    while leaves > 1:
+        if len(layer) % 2:
+            layer.append(pad)
+        layer = [hashlib.sha256(layer[i] + layer[i + 1]).digest() for i in range(0, len(layer), 2)]
+        pad = hashlib.sha256(pad + pad).digest()
+        leaves //= 2
+    return layer[0] if layer else pad
+
+
+def block_hashes(data) -> List[bytes]:
+    """按 16 KiB 切块计算 SHA-256，最后一块不足 16 KiB 时按实际长度计算"""
+    view = memoryview(data)
+    return [hashlib.sha256(view[i:i + BLOCK_SIZE]).digest() for i in range(0, len(view), BLOCK_SIZE)]
+
+
+def piece_hash(data, piece_length: int) -> bytes:
+    """分块层中一个分块的哈希：该分块各块哈希补齐到整个分块的块数后的子树根"""
+    return merkle_root(block_hashes(data), max(1, piece_length // BLOCK_SIZE))
+
+
+def small_file_root(data) -> bytes:
+    """不超过一个分块的文件直接由块哈希计算 pieces root"""
+    hashes = block_hashes(data)
+    return merkle_root(hashes, _next_power_of_two(len(hashes)))
+
+
+def layer_root(layer: bytes, piece_length: int) -> bytes:
+    """由分块层哈希计算 pieces root，补齐的分块为全零子树的根"""
+    hashes = split_hashes(layer)
+    pad = merkle_root([], max(1, piece_length // BLOCK_SIZE))
+    return merkle_root(hashes, _next_power_of_two(len(hashes)), pad)
+
+
+def split_hashes(layer: bytes) -> List[bytes]:
+    return [layer[i:i + HASH_SIZE] for i in range(0, len(layer), HASH_SIZE)]
+
+
+def _next_power_of_two(n: int) -> int:
+    return 1 << max(0, (n - 1).bit_length())
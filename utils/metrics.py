@@ -0,0 +1,231 @@
+"""
+运行指标：按处理阶段和 Web API 接口统计耗时与错误次数，运行结束时输出汇总表，
+并可导出为 JSON 或 Prometheus textfile（供 node exporter 的 textfile collector 读取）。
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from utils.avalon import Avalon
+
+PROMETHEUS_PREFIX = "qb_skip_check"
+RESERVOIR_SIZE = 2048  # 每项统计保留的耗时样本数，用于估算 p50/p99
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class TimingStats:
+    """
+    一个阶段或一个接口的耗时与错误统计。
+
+    百分位数由蓄水池抽样（Algorithm R）保留的最多 RESERVOIR_SIZE 个样本估算，
+    长时间运行（如 watch 模式）时内存占用和计算开销不随记录次数增长；次数、总耗时和最大值是精确的。
+    """
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    peak: float = 0.0
+    samples: List[float] = field(default_factory=list)
+    _rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)
+
+    def add(self, elapsed: float, error: bool):
+        self.count += 1
+        self.total += elapsed
+        self.peak = max(self.peak, elapsed)
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(elapsed)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.samples[slot] = elapsed
+        if error:
+            self.errors += 1
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "errors": self.errors, "total": self.total,
+                "avg": self.total / self.count if self.count else 0.0,
+                "p50": percentile(self.samples, 50), "p99": percentile(self.samples, 99),
+                "max": self.peak}
+
+
+class RunMetrics:
+    """线程安全的运行指标收集器"""
+
+    def __init__(self):
+        self.phases: Dict[str, TimingStats] = {}
+        self.endpoints: Dict[str, TimingStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.time()
+        self._listeners: List[Callable[[str, str, float, bool], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: Callable[[str, str, float, bool], None]):
+        """注册回调 callback(类别, 名称, 耗时, 是否出错)，类别为 "phase" 或 "endpoint"，每次记录后调用"""
+        self._listeners.append(callback)
+
+    @contextmanager
+    def phase(self, name: str):
+        """统计代码块的耗时，块内抛出异常时记为一次错误"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self._observe(self.phases, "phase", name, time.perf_counter() - start, error)
+
+    def observe_endpoint(self, endpoint: str, elapsed: float, error: bool = False):
+        self._observe(self.endpoints, "endpoint", endpoint, elapsed, error)
+
+    def set_counter(self, name: str, value: int):
+        with self._lock:
+            self.counters[name] = value
+
+    def instrument_client(self, client):
+        """包装 qbittorrentapi.Client 的底层请求方法，按接口统计每次 HTTP 请求（含重试）的耗时"""
+        request = client._request
+
+        def timed_request(*args, **kwargs):
+            namespace = kwargs.get('api_namespace')
+            endpoint = f"{getattr(namespace, 'value', namespace)}/{kwargs.get('api_method')}"
+            start = time.perf_counter()
+            error = False
+            try:
+                return request(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self.observe_endpoint(endpoint, time.perf_counter() - start, error)
+
+        client._request = timed_request
+        return client
+
+    def _observe(self, table: Dict[str, TimingStats], kind: str, name: str, elapsed: float, error: bool):
+        with self._lock:
+            table.setdefault(name, TimingStats()).add(elapsed, error)
+        for callback in self._listeners:
+            callback(kind, name, elapsed, error)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started": self.started,
+                "duration": time.time() - self.started,
+                "counters": dict(self.counters),
+                "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+                "endpoints": {name: stats.to_dict() for name, stats in sorted(self.endpoints.items())},
+            }
+
+    def summary_lines(self) -> List[str]:
+        """生成汇总表，每行一个阶段或接口，耗时单位为毫秒"""
+        data = self.to_dict()
+        lines = [f"{'名称':<24}{'次数':>8}{'错误':>6}{'总耗时(s)':>11}{'平均':>9}{'p50':>9}{'p99':>9}{'最长':>9}"]
+        for title, table in (("阶段", data["phases"]), ("接口", data["endpoints"])):
+            if not table:
+                continue
+            lines.append(f"[{title}]")
+            for name, s in table.items():
+                lines.append(f"{name:<24}{s['count']:>8}{s['errors']:>6}{s['total']:>11.2f}{s['avg'] * 1000:>9.1f}"
+                             f"{s['p50'] * 1000:>9.1f}{s['p99'] * 1000:>9.1f}{s['max'] * 1000:>9.1f}")
+        return lines
+
+    def write(self, path: str):
+        """按扩展名写入指标文件：.json 为 JSON，其余为 Prometheus 文本格式；先写临时文件再原子替换"""
+        if path.lower().endswith(".json"):
+            content = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        else:
+            content = self.to_prometheus()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def to_prometheus(self) -> str:
+        data = self.to_dict()
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_last_run_timestamp_seconds 最近一次运行的开始时间",
+            f"# TYPE {p}_last_run_timestamp_seconds gauge",
+            f"{p}_last_run_timestamp_seconds {data['started']:.3f}",
+            f"# HELP {p}_run_duration_seconds 最近一次运行的耗时",
+            f"# TYPE {p}_run_duration_seconds gauge",
+            f"{p}_run_duration_seconds {data['duration']:.3f}",
+            f"# HELP {p}_torrents 最近一次运行中各结果的种子数",
+            f"# TYPE {p}_torrents gauge",
+        ]
+        lines += [f'{p}_torrents{{result="{name}"}} {value}' for name, value in data["counters"].items()]
+        for metric, label, table, help_seconds, help_errors in (
+                ("phase", "phase", data["phases"], "各处理阶段的耗时", "各处理阶段出错的次数"),
+                ("api_request", "endpoint", data["endpoints"],
+                 "各 Web API 接口的请求耗时", "各 Web API 接口请求失败的次数")):
+            lines += [f"# HELP {p}_{metric}_seconds {help_seconds}", f"# TYPE {p}_{metric}_seconds summary"]
+            for name, s in table.items():
+                lines += [f'{p}_{metric}_seconds{{{label}="{name}",quantile="0.5"}} {s["p50"]:.6f}',
+                          f'{p}_{metric}_seconds{{{label}="{name}",quantile="0.99"}} {s["p99"]:.6f}',
+                          f'{p}_{metric}_seconds_sum{{{label}="{name}"}} {s["total"]:.6f}',
+                          f'{p}_{metric}_seconds_count{{{label}="{name}"}} {s["count"]}']
+            lines += [f"# HELP {p}_{metric}_errors {help_errors}", f"# TYPE {p}_{metric}_errors gauge"]
+            lines += [f'{p}_{metric}_errors{{{label}="{name}"}} {s["errors"]}' for name, s in table.items()]
+        return "\n".join(lines) + "\n"
+
+
+class ProgressReporter:
+    """处理大批种子时，每隔一段时间输出一行进度、速率和预计剩余时间"""
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self.total = 0
+        self.done = 0
+        self._start = 0.0
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, total: int):
+        with self._lock:
+            self.total = total
+            self.done = 0
+            self._start = self._last_report = time.monotonic()
+
+    def advance(self, count: int = 1):
+        with self._lock:
+            self.done += count
+            now = time.monotonic()
+            if self.interval <= 0 or now - self._last_report < self.interval or self.done >= self.total:
+                return
+            self._last_report = now
+            line = self._format(now)
+        Avalon.info(line)
+
+    def _format(self, now: float) -> str:
+        elapsed = now - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = _format_duration((self.total - self.done) / rate) if rate > 0 else "未知"
+        return (f"进度：{self.done}/{self.total} ({self.done / self.total:.1%})，"
+                f"{rate:.1f} 个/秒，预计剩余 {eta}")
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours} 小时 {minutes} 分"
+    if minutes:
+        return f"{minutes} 分 {seconds} 秒"
+    return f"{seconds} 秒"
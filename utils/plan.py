@@ -0,0 +1,62 @@
+"""
+处理计划（--plan / --apply）：先只读地生成完整的操作计划并估算开销，确认后再按计划执行。
+
+计划保存为 JSON，导出的种子文件（已补全 tracker）保存在计划文件旁的 <计划名>_torrents 目录中，
+执行计划时直接使用这些种子文件，不再扫描或导出。
+"""
+import json
+import os
+from typing import Dict, List
+
+PLAN_VERSION = 1
+
+DEFAULT_LATENCY = 0.05  # 没有可用的实测延迟时假定的单次请求延迟（秒）
+
+
+def plan_torrent_dir(plan_path: str) -> str:
+    """计划对应的种子文件目录"""
+    return os.path.splitext(plan_path)[0] + "_torrents"
+
+
+def estimate_cost(chunks: List[int], groups_per_chunk: List[int], latency: float, concurrency: int = 1,
+                  bulk_delete: bool = False, batch_add: bool = False, preflight: bool = False) -> Dict:
+    """
+    估算执行计划所需的 API 调用次数和耗时：每个种子（或每批）删除、确认删除、添加、确认添加，
+    确认时至少轮询一次 torrents/info。
+
+    :param chunks: 每批的种子数；逐个/并发处理时视为一整批
+    :param groups_per_chunk: 每批按添加参数分组后的组数（仅批量添加时使用）
+    :param latency: 单次请求的延迟（秒），取生成计划时实测的值
+    :param concurrency: 同时发出请求的数量，分批模式下为 1
+    :param preflight: 删除前检查文件时，每个种子还需要一次 torrents/files 请求
+    """
+    deletes = adds = infos = 0
+    for size, groups in zip(chunks, groups_per_chunk):
+        deletes += 1 if bulk_delete else size
+        infos += 1 if bulk_delete else size  # 确认删除
+        adds += groups if batch_add else size
+        infos += groups if batch_add else size  # 确认添加
+    calls = {"torrents/delete": deletes, "torrents/add": adds, "torrents/info": infos}
+    if preflight:
+        calls["torrents/files"] = sum(chunks)
+    total = sum(calls.values())
+    concurrency = max(1, concurrency)
+    return {"calls": calls, "total_calls": total, "latency": latency, "concurrency": concurrency,
+            "seconds": total * latency / concurrency}
+
+
+def save_plan(path: str, plan: Dict):
+    """先写临时文件再原子替换"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_plan(path: str) -> Dict:
+    """读取计划文件，格式不符时抛出 ValueError"""
+    with open(path, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    if not isinstance(plan, dict) or plan.get("version") != PLAN_VERSION or "targets" not in plan:
+        raise ValueError(f"{path} 不是本程序生成的处理计划（或版本不兼容）")
+    return plan
@@ -0,0 +1,95 @@
+"""
+删除前的文件检查：获取每个目标种子的文件列表，并行检查本机上的文件是否存在、大小是否与种子一致，
+不一致的种子不删除，避免重新添加后进入 missingFiles 状态或重新校验。
+
+脚本所在主机与 qBittorrent 挂载存储的路径不同时（如 Docker 中的 /downloads 对应本机的 /mnt/nas），
+可通过路径映射把 qBittorrent 中的路径转换为本机路径。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PathMapper:
+    """按前缀把 qBittorrent 中的路径转换为本机路径，规则形如 "/downloads=/mnt/nas/downloads;D:\\=/mnt/d" """
+
+    def __init__(self, rules: Iterable[Tuple[str, str]] = ()):
+        # 最长的前缀优先匹配
+        self.rules = sorted(((_normalize(src).rstrip("/"), dst) for src, dst in rules),
+                            key=lambda rule: len(rule[0]), reverse=True)
+
+    @classmethod
+    def parse(cls, spec: str) -> "PathMapper":
+        """解析以分号分隔的 “qBittorrent 路径=本机路径” 规则，格式有误时抛出 ValueError"""
+        rules = []
+        for item in filter(None, (part.strip() for part in (spec or "").split(";"))):
+            src, sep, dst = item.partition("=")
+            if not sep or not src.strip() or not dst.strip():
+                raise ValueError(f"无法解析路径映射 {item!r}，格式应为 “qBittorrent 路径=本机路径”")
+            rules.append((src.strip(), dst.strip()))
+        return cls(rules)
+
+    def map(self, path: str) -> str:
+        """转换为本机路径，没有匹配的规则时原样返回"""
+        normalized = _normalize(path)
+        for src, dst in self.rules:
+            if normalized == src or normalized.startswith(src + "/"):
+                rest = normalized[len(src):].lstrip("/")
+                return os.path.join(dst, *rest.split("/")) if rest else dst
+        return path
+
+
+class PreflightChecker:
+    """并行获取文件列表并检查本机文件"""
+
+    def __init__(self, client, path_mapper: Optional[PathMapper] = None, workers: int = 8):
+        """
+        :param client: 已登录的 qbittorrentapi.Client
+        :param path_mapper: qBittorrent 路径到本机路径的映射
+        :param workers: 并行请求文件列表和检查文件的线程数
+        """
+        self.client = client
+        self.path_mapper = path_mapper or PathMapper()
+        self.workers = max(1, workers)
+
+    def check(self, torrents: List) -> Dict[str, Optional[str]]:
+        """检查给定的种子，返回 {hash: 问题说明}，文件完好的种子对应 None"""
+        problems = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="preflight") as executor:
+            file_lists = list(executor.map(self._local_files, torrents))
+            checks = []
+            for torrent, files in zip(torrents, file_lists):
+                if isinstance(files, str):
+                    problems[torrent['hash']] = files
+                else:
+                    checks += [(torrent['hash'], path, size) for path, size in files]
+            sizes = executor.map(_file_size, [path for _, path, _ in checks], chunksize=64)
+            for (torrent_hash, path, size), actual in zip(checks, sizes):
+                if torrent_hash in problems:
+                    continue
+                if actual is None:
+                    problems[torrent_hash] = f"文件不存在或无法访问: {path}"
+                elif actual != size:
+                    problems[torrent_hash] = f"文件大小不符: {path}（本机 {actual} 字节，种子中 {size} 字节）"
+        return {torrent['hash']: problems.get(torrent['hash']) for torrent in torrents}
+
+    def _local_files(self, torrent):
+        """返回种子中需要检查的文件 [(本机路径, 大小)]，获取失败时返回问题说明"""
+        try:
+            files = self.client.torrents_files(torrent_hash=torrent['hash'])
+        except Exception as e:
+            return f"获取文件列表失败: {e}"
+        save_path = self.path_mapper.map(torrent['save_path'])
+        # 优先级为 0 的文件未下载，不检查
+        return [(os.path.join(save_path, *f['name'].split("/")), f['size']) for f in files if f.get('priority', 1)]
+
+
+def _file_size(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _normalize(path: str) -> str:
+    return path.replace("\\", "/")
@@ -0,0 +1,139 @@
+"""
+qBittorrent Web API 客户端的创建与连接参数。
+
+在 qbittorrentapi.Client 的基础上：
+- 连接池大小、长连接、超时和重试次数可通过 QB_ 环境变量配置；
+- 缓存 Web API 版本号（qbittorrentapi 在每次导出、添加种子前都会重新查询一次）；
+- 会话过期 (403) 时由 qbittorrentapi 自动重新登录。这里让重新登录复用现有的 HTTP 会话和连接池
+  （qbittorrentapi 默认会关闭并重建会话，打断其他线程正在进行的请求），并保证多个线程同时遇到 403 时只登录一次；
+- 替换 qbittorrentapi 自带的重试：遇到 5xx 或连接错误时保留现有会话和连接池，按 retries 次数退避重试；
+  添加、删除种子的请求可能已经生效，一律不自动重试，由调用方确认种子状态后再决定。
+  urllib3 层只重试未送达的连接失败，以及幂等方法（GET 等）的读取超时和 5xx 响应。
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+import qbittorrentapi
+from qbittorrentapi.definitions import APINames
+from qbittorrentapi.exceptions import APIConnectionError, APIError, HTTP5XXError
+from urllib3.util.retry import Retry
+
+# 重发可能导致重复操作、或在请求已生效时报错的接口，失败时不自动重试
+NO_RETRY_ENDPOINTS = frozenset({"torrents/add", "torrents/delete"})
+
+
+@dataclass
+class ConnectionConfig:
+    """qBittorrent Web UI 的连接配置"""
+    host: str = "http://127.0.0.1"
+    port: int = 8080
+    username: str = ""
+    password: str = ""
+    pool_size: int = 0  # 连接池中保留的长连接数，0 表示按并发线程数自动设置
+    keep_alive: bool = True  # 复用 HTTP 连接；关闭后每个请求都重新建立连接
+    connect_timeout: float = 5.0  # 建立连接的超时时间（秒）
+    timeout: float = 30.0  # 等待响应的超时时间（秒），qBittorrent 繁忙时可适当调大
+    retries: int = 2  # 连接失败、读取超时或 5xx 响应时的重试次数（添加/删除种子的请求不重试）
+    retry_backoff: float = 0.3  # 重试间隔的退避系数（秒）
+
+
+class SkipCheckClient(qbittorrentapi.Client):
+    """缓存 Web API 版本号、串行化重新登录、出错时保留会话重试的 qbittorrentapi.Client"""
+
+    _web_api_version_cache = None
+
+    def __init__(self, *args, retries: int = 2, retry_backoff: float = 0.3, **kwargs):
+        self._login_lock = threading.RLock()
+        self._last_login = 0.0
+        self._retries = max(0, retries)
+        self._retry_backoff = retry_backoff
+        super().__init__(*args, **kwargs)
+
+    def _request_manager(self, http_method, api_namespace, api_method, _retries=1, _retry_backoff_factor=0.3,
+                         version_introduced="", version_removed="", **kwargs):
+        """
+        代替 qbittorrentapi 的同名方法：它在每次重试前都会重建上下文（关闭共享的 HTTP 会话和 cookie），
+        并发时会让其他线程的请求失败、引发连锁的重新登录，还会重发添加/删除请求。
+        """
+        endpoint = f"{getattr(api_namespace, 'value', api_namespace)}/{api_method}"
+        if not self._is_endpoint_supported_for_version(endpoint=endpoint, version_introduced=version_introduced,
+                                                       version_removed=version_removed):
+            return None
+        retries = 0 if endpoint in NO_RETRY_ENDPOINTS else self._retries
+        for attempt in range(retries + 1):
+            try:
+                return self._request(http_method=http_method, api_namespace=api_namespace, api_method=api_method,
+                                     **kwargs)
+            except HTTP5XXError:
+                if attempt >= retries:
+                    raise
+            except APIError:
+                raise
+            except Exception as e:
+                if attempt >= retries:
+                    raise APIConnectionError(f"连接 qBittorrent 失败: {e!r}", response=getattr(e, "response", None))
+            time.sleep(min(self._retry_backoff * 2 ** attempt, 10))
+
+    def auth_log_in(self, username=None, password=None, **kwargs):
+        """登录；多个线程同时因会话过期而重新登录时，排在后面的线程直接复用刚建立的会话"""
+        requested = time.monotonic()
+        with self._login_lock:
+            relogin = self._last_login > 0 and not username
+            if relogin and self._last_login > requested:
+                return
+            if relogin and self._http_session is not None:
+                self._refresh_login()
+            else:
+                super().auth_log_in(username, password, **kwargs)
+            self._last_login = time.monotonic()
+
+    def _refresh_login(self):
+        """在现有 HTTP 会话上重新登录，新的 SID 写入同一个 cookie jar，连接池保持不变"""
+        response = self._request_manager(
+            http_method="post",
+            api_namespace=APINames.Authorization,
+            api_method="login",
+            data={"username": self.username, "password": self._password},
+        )
+        if response.text != "Ok.":
+            raise qbittorrentapi.LoginFailed()
+
+    def app_web_api_version(self, **kwargs):
+        """Web API 版本在同一会话内不会变化，只在首次或重建连接上下文后查询"""
+        if self._web_api_version_cache is None or kwargs:
+            self._web_api_version_cache = super().app_web_api_version(**kwargs)
+        return self._web_api_version_cache
+
+    app_webapiVersion = app_web_api_version
+
+    def _initialize_context(self):
+        # 重新登录或切换协议时会重建上下文，此时 qBittorrent 可能已经升级，需要重新查询版本
+        self._web_api_version_cache = None
+        super()._initialize_context()
+
+
+def create_client(config: ConnectionConfig, concurrency: int = 1) -> SkipCheckClient:
+    """
+    按连接配置创建客户端（尚未登录）。
+
+    :param config: 连接配置，也可以是包含相同字段的其他配置对象
+    :param concurrency: 同时发出请求的线程数，用于自动确定连接池大小
+    """
+    pool_size = config.pool_size if config.pool_size > 0 else max(10, concurrency * 2)
+    # 连接失败时请求尚未送达，任何方法都可以重试；读取超时和 5xx 只对幂等方法重试（qbittorrentapi 多数接口用 POST，
+    # 这些请求的重试由 SkipCheckClient._request_manager 按接口决定）
+    retry = Retry(total=config.retries, connect=config.retries, read=config.retries,
+                  backoff_factor=config.retry_backoff, status_forcelist={500, 502, 503, 504},
+                  allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, raise_on_status=False)
+    return SkipCheckClient(
+        host=config.host,
+        port=config.port,
+        username=config.username,
+        password=config.password,
+        REQUESTS_ARGS={"timeout": (config.connect_timeout, config.timeout)},
+        HTTPADAPTER_ARGS={"pool_connections": pool_size, "pool_maxsize": pool_size, "max_retries": retry},
+        EXTRA_HEADERS={} if config.keep_alive else {"Connection": "close"},
+        retries=config.retries,
+        retry_backoff=config.retry_backoff,
+    )
@@ -0,0 +1,103 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Set, Union
+
+HashesT = Union[str, Iterable[str]]
+
+
+@dataclass
+class WaitStats:
+    """单类等待操作的耗时统计"""
+    count: int = 0
+    timeouts: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, elapsed: float, timed_out: bool):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        if timed_out:
+            self.timeouts += 1
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class TorrentWaiter:
+    """
+    事件驱动的种子就绪检测：轮询 qBittorrent，直到种子真正被删除或真正出现为止，
+    轮询间隔按指数退避增长，一旦条件满足立即返回，取代固定时长的 sleep。
+    """
+
+    def __init__(self, client, timeout: float = 10.0, initial_interval: float = 0.05,
+                 max_interval: float = 1.0, backoff: float = 2.0):
+        """
+        :param client: 已登录的 qbittorrentapi.Client
+        :param timeout: 单次等待的超时时间（秒）
+        :param initial_interval: 首次轮询间隔（秒）
+        :param max_interval: 轮询间隔上限（秒）
+        :param backoff: 每次轮询后间隔的放大倍数
+        """
+        self.client = client
+        self.timeout = timeout
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.stats = {"gone": WaitStats(), "present": WaitStats()}
+        self._stats_lock = threading.Lock()
+
+    def wait_gone(self, hashes: HashesT) -> bool:
+        """等待指定种子全部从客户端中消失，超时返回 False"""
+        wanted = self._normalize(hashes)
+        if not wanted:
+            return True
+        remaining = self._wait("gone", lambda: wanted & self._query_present(wanted))
+        return not remaining
+
+    def wait_present(self, hashes: HashesT) -> Set[str]:
+        """等待指定种子全部出现在客户端中，返回实际已出现的 hash 集合（超时则可能不完整）"""
+        wanted = self._normalize(hashes)
+        if not wanted:
+            return set()
+        missing = self._wait("present", lambda: wanted - self._query_present(wanted))
+        return wanted - missing
+
+    def summary(self) -> str:
+        """返回可读的等待耗时统计"""
+        names = {"gone": "删除确认", "present": "添加确认"}
+        parts = []
+        with self._stats_lock:
+            for kind, st in self.stats.items():
+                if st.count:
+                    parts.append(f"{names[kind]} {st.count} 次，平均 {st.avg * 1000:.0f} ms，"
+                                 f"最长 {st.max * 1000:.0f} ms，超时 {st.timeouts} 次")
+        return "；".join(parts) if parts else "无等待记录"
+
+    def _wait(self, kind: str, pending_fn) -> Set[str]:
+        """反复调用 pending_fn 直到其返回空集合或超时，返回最后一次的未满足集合"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        interval = self.initial_interval
+        pending = pending_fn()
+        while pending and time.monotonic() < deadline:
+            time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+            interval = min(interval * self.backoff, self.max_interval)
+            pending = pending_fn()
+
+        with self._stats_lock:
+            self.stats[kind].add(time.monotonic() - start, timed_out=bool(pending))
+        return pending
+
+    def _query_present(self, hashes: Set[str]) -> Set[str]:
+        """查询给定 hash 中当前存在于客户端的部分"""
+        infos = self.client.torrents_info(torrent_hashes=list(hashes))
+        return {t['hash'].lower() for t in infos}
+
+    @staticmethod
+    def _normalize(hashes: HashesT) -> Set[str]:
+        if isinstance(hashes, str):
+            hashes = [hashes]
+        return {h.lower() for h in hashes}
@@ -0,0 +1,232 @@
+"""
+目标种子筛选表达式。
+
+表达式由空格分隔的条件组成，所有条件同时满足才选中；同一条件内用逗号分隔的多个值满足其一即可，
+条件前加 "-" 表示取反。值中含空格时用引号括起来。支持的条件：
+
+    tag:IYUU自动辅种          标签
+    category:movies          分类（cat: 为简写）
+    state:paused             状态，可用 qBittorrent 的状态筛选名（paused、seeding、errored 等）或具体状态（pausedUP 等）
+    size:>1G  size:1G..10G   大小范围，单位 K/M/G/T（按 1024 进位），支持 > >= < <= 和 a..b（含两端，可省略一端）
+    path:/downloads/pt       保存路径为该目录或位于其下
+    tracker:example.com      当前 tracker 的主机名（含子域名）
+    hash:abc123,def456       种子 hash
+    name:关键字              名称包含关键字（不区分大小写）
+
+例如："tag:IYUU自动辅种 state:paused -category:temp size:>100M"。
+
+Web API 能筛选的条件（单值的标签、分类、状态筛选名，以及 hash）交给服务器，只传输候选种子，
+其余条件在本地一次遍历完成。
+"""
+import re
+import shlex
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from packaging.version import Version
+
+from utils.torrent_cache import PAUSED_STATES, split_tags
+
+DEFAULT_SELECTOR = "tag:IYUU自动辅种 state:paused"
+
+KEY_ALIASES = {"cat": "category", "status": "state", "save_path": "path"}
+KEYS = ("tag", "category", "state", "size", "path", "tracker", "hash", "name")
+
+# qBittorrent 状态筛选名对应的具体状态（本地筛选时使用，与 qBittorrent 的判定近似）
+STATUS_STATES = {
+    "paused": PAUSED_STATES,
+    "stopped": PAUSED_STATES,
+    "downloading": frozenset({"downloading", "metaDL", "forcedMetaDL", "stalledDL", "checkingDL", "pausedDL",
+                              "stoppedDL", "queuedDL", "forcedDL", "allocating"}),
+    "seeding": frozenset({"uploading", "stalledUP", "checkingUP", "queuedUP", "forcedUP"}),
+    "stalled": frozenset({"stalledUP", "stalledDL"}),
+    "stalled_uploading": frozenset({"stalledUP"}),
+    "stalled_downloading": frozenset({"stalledDL"}),
+    "errored": frozenset({"error", "missingFiles"}),
+    "checking": frozenset({"checkingUP", "checkingDL", "checkingResumeData"}),
+    "moving": frozenset({"moving"}),
+}
+STATUS_FILTERS = frozenset(STATUS_STATES) | {"all", "resumed", "running", "completed", "active", "inactive"}
+
+# qBittorrent v5（Web API 2.11.0）起 paused/resumed 筛选更名为 stopped/running
+_RENAMED_FILTERS = {"paused": "stopped", "resumed": "running"}
+_RENAMED_SINCE = Version("2.11.0")
+
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*$", re.IGNORECASE)
+
+
+class SelectorError(ValueError):
+    """筛选表达式有误"""
+
+
+@dataclass(frozen=True)
+class Term:
+    """一个筛选条件"""
+    key: str
+    values: Tuple[str, ...]
+    negate: bool = False
+
+
+class TorrentSelector:
+    """解析后的筛选表达式"""
+
+    def __init__(self, terms: Iterable[Term], expression: str = ""):
+        self.terms = list(terms)
+        self.expression = expression
+        self._sizes = {i: [_parse_size_range(v) for v in term.values]
+                       for i, term in enumerate(self.terms) if term.key == "size"}
+
+    @classmethod
+    def parse(cls, expression: str) -> "TorrentSelector":
+        """解析表达式，格式有误时抛出 SelectorError"""
+        try:
+            tokens = shlex.split(expression or "")
+        except ValueError as e:
+            raise SelectorError(f"无法解析筛选表达式 {expression!r}: {e}") from None
+        terms = []
+        for token in tokens:
+            negate = token.startswith(("-", "!"))
+            key, sep, value = token[1:].partition(":") if negate else token.partition(":")
+            key = KEY_ALIASES.get(key.lower(), key.lower())
+            if not sep or key not in KEYS:
+                raise SelectorError(f"无法识别的筛选条件 {token!r}，可用的条件: {', '.join(k + ':' for k in KEYS)}")
+            values = tuple(v.strip() for v in value.split(","))
+            if key == "hash":
+                values = tuple(v.lower() for v in values if v)
+            if key not in ("tag", "category") and (not values or not all(values)):  # 空标签/空分类表示未设置
+                raise SelectorError(f"筛选条件 {token!r} 缺少值")
+            terms.append(Term(key, values, negate))
+        if not terms:
+            # 空表达式会选中全部种子，不能作为处理目标
+            raise SelectorError(f"筛选表达式 {expression!r} 为空，至少需要一个条件，默认为 \"{DEFAULT_SELECTOR}\"")
+        return cls(terms, expression)
+
+    def server_params(self, api_version: Optional[str] = None) -> Tuple[Dict, Set[int]]:
+        """
+        可由 torrents_info 在服务器端筛选的参数，以及已交给服务器的条件序号。
+
+        :param api_version: Web API 版本，用于选择 paused/stopped 等筛选名
+        """
+        params, pushed = {}, set()
+        for i, term in enumerate(self.terms):
+            if term.negate:
+                continue
+            if term.key == "hash" and "torrent_hashes" not in params:
+                params["torrent_hashes"] = list(term.values)
+            elif len(term.values) != 1:
+                continue
+            elif term.key in ("tag", "category") and term.key not in params:
+                params[term.key] = term.values[0]
+            elif term.key == "state" and term.values[0] in STATUS_FILTERS and "status_filter" not in params:
+                params["status_filter"] = _server_status(term.values[0], api_version)
+            else:
+                continue
+            pushed.add(i)
+        return params, pushed
+
+    def fetch(self, client) -> List:
+        """向 Web API 查询种子：能下推的条件由服务器筛选，其余在本地筛选"""
+        params, pushed = self.server_params(client.app_web_api_version())
+        return self.select(client.torrents_info(**params), skip=pushed)
+
+    def select(self, torrents: Iterable, skip: Iterable[int] = ()) -> List:
+        """在本地一次遍历筛选种子，skip 为已在服务器端筛选过的条件序号"""
+        skip = set(skip)
+        checks = [(i, term) for i, term in enumerate(self.terms) if i not in skip]
+        return [t for t in torrents if all(self._match(i, term, t) != term.negate for i, term in checks)]
+
+    def matches(self, torrent) -> bool:
+        return bool(self.select([torrent]))
+
+    def offline_tag(self) -> Optional[str]:
+        """离线模式只能按标签筛选暂停的种子：表达式恰好是 "tag:X [state:paused]" 时返回 X，否则返回 None"""
+        tags = [t for t in self.terms if t.key == "tag" and not t.negate and len(t.values) == 1 and t.values[0]]
+        rest = [t for t in self.terms if t.key != "tag"]
+        paused = all(t.key == "state" and not t.negate and t.values in (("paused",), ("stopped",)) for t in rest)
+        return tags[0].values[0] if len(tags) == 1 and len(rest) <= 1 and paused else None
+
+    def __str__(self):
+        return self.expression or "全部种子"
+
+    def _match(self, index: int, term: Term, torrent) -> bool:
+        key = term.key
+        if key == "tag":
+            tags = split_tags(torrent.get("tags", ""))
+            return any(v in tags if v else not tags for v in term.values)
+        if key == "category":
+            return torrent.get("category", "") in term.values
+        if key == "state":
+            return any(_match_state(v, torrent) for v in term.values)
+        if key == "size":
+            size = torrent.get("size", 0)
+            return any(low <= size <= high for low, high in self._sizes[index])
+        if key == "path":
+            save_path = _normalize_path(torrent.get("save_path", ""))
+            return any(_under_path(save_path, _normalize_path(v)) for v in term.values)
+        if key == "tracker":
+            host = (urlparse(torrent.get("tracker", "")).hostname or "").lower()
+            return any(host == v.lower() or host.endswith("." + v.lower()) for v in term.values)
+        if key == "hash":
+            return torrent.get("hash", "").lower() in term.values
+        if key == "name":
+            name = torrent.get("name", "").lower()
+            return any(v.lower() in name for v in term.values)
+        return False
+
+
+def _match_state(value: str, torrent) -> bool:
+    state = torrent.get("state", "")
+    if value in STATUS_STATES:
+        return state in STATUS_STATES[value]
+    if value == "all":
+        return True
+    if value in ("resumed", "running"):
+        return state not in PAUSED_STATES
+    if value == "completed":
+        return torrent.get("progress", 0) >= 1
+    if value in ("active", "inactive"):
+        active = torrent.get("dlspeed", 0) > 0 or torrent.get("upspeed", 0) > 0
+        return active == (value == "active")
+    return state == value  # 具体状态，如 pausedUP
+
+
+def _server_status(value: str, api_version: Optional[str]) -> str:
+    """按 Web API 版本选择状态筛选名"""
+    if api_version is None:
+        return value
+    renamed = Version(api_version) >= _RENAMED_SINCE
+    for old, new in _RENAMED_FILTERS.items():
+        if value in (old, new):
+            return new if renamed else old
+    return value
+
+
+def _parse_size(text: str) -> int:
+    match = _SIZE_RE.match(text)
+    if not match:
+        raise SelectorError(f"无法解析大小 {text!r}，示例: 500M、1.5G")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def _parse_size_range(text: str) -> Tuple[float, float]:
+    """把 >1G、<=500M、1G..10G 等转为闭区间 (下限, 上限)"""
+    for op in (">=", "<=", ">", "<"):
+        if text.startswith(op):
+            size = _parse_size(text[len(op):])
+            return {">=": (size, float("inf")), "<=": (0, size),
+                    ">": (size + 1, float("inf")), "<": (0, size - 1)}[op]
+    if ".." in text:
+        low, _, high = text.partition("..")
+        return (_parse_size(low) if low.strip() else 0, _parse_size(high) if high.strip() else float("inf"))
+    raise SelectorError(f"大小条件 {text!r} 需要使用 >、>=、<、<= 或 a..b 的形式")
+
+
+def _normalize_path(path: str) -> str:
+    return path.replace("\\", "/").rstrip("/")
+
+
+def _under_path(path: str, prefix: str) -> bool:
+    """path 为 prefix 本身或位于其下（按路径分量比较，/data/pt 不匹配 /data/pt2）"""
+    return path == prefix or path.startswith(prefix + "/")
@@ -0,0 +1,228 @@
+"""
+删除前的分块抽查：从导出的种子中读取分块哈希，抽取首尾、文件边界以及若干随机分块，
+只读取这些分块对应的字节范围并计算 SHA-1，与种子中的哈希比对。
+
+相比完整校验只需读取极少量数据，就能发现文件被替换、截断或内容不一致等大部分问题。
+纯 v2 种子改为在各文件的分块层中抽取分块，按 merkle 树计算 SHA-256 比对。
+"""
+import hashlib
+import os
+import random
+from dataclasses import dataclass
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Optional, Sequence, Tuple
+
+from utils.bencode import decode
+from utils.merkle import HASH_SIZE, V2Layout, piece_hash, small_file_root
+
+PIECE_HASH_SIZE = 20
+
+
+@dataclass
+class TorrentFile:
+    """种子中的一个文件，parts 为相对内容路径的路径分量"""
+    parts: List[str]
+    length: int
+    offset: int  # 在整个种子数据中的起始偏移
+    padding: bool = False  # BEP 47 填充文件，内容全为 0，不存在于磁盘上
+
+
+@dataclass
+class TorrentLayout:
+    """v1 种子的分块与文件布局"""
+    piece_length: int
+    piece_hashes: bytes
+    files: List[TorrentFile]
+    single_file: bool
+
+    @property
+    def piece_count(self) -> int:
+        return len(self.piece_hashes) // PIECE_HASH_SIZE
+
+    @property
+    def total_length(self) -> int:
+        return sum(f.length for f in self.files)
+
+    @classmethod
+    def from_torrent(cls, torrent_data: bytes) -> Optional["TorrentLayout"]:
+        """解析种子内容，纯 v2 种子（没有 v1 分块哈希）返回 None"""
+        info = decode(torrent_data)['info']
+        if 'pieces' not in info:
+            return None
+        files, offset = [], 0
+        if 'files' in info:
+            for f in info['files']:
+                parts = f.get('path.utf-8') or f['path']
+                padding = b'p' in f.get('attr', b'')
+                files.append(TorrentFile([_text(p) for p in parts], f['length'], offset, padding))
+                offset += f['length']
+        else:
+            files.append(TorrentFile([], info['length'], 0))
+        return cls(info['piece length'], info['pieces'], files, 'files' not in info)
+
+
+def choose_pieces(layout: TorrentLayout, samples: int, rng: random.Random = random) -> List[int]:
+    """选择要抽查的分块：最多 samples 个边界分块（首尾及各文件起止处），再加 samples 个随机分块"""
+    count = layout.piece_count
+    if count == 0 or samples <= 0:
+        return []
+    boundary = [0, count - 1]
+    for f in layout.files:
+        if f.length and not f.padding:
+            boundary.append(f.offset // layout.piece_length)
+            boundary.append((f.offset + f.length - 1) // layout.piece_length)
+    boundary = list(dict.fromkeys(boundary))[:max(2, samples)]
+    return sorted(set(boundary) | set(rng.sample(range(count), min(samples, count))))
+
+
+class SpotChecker:
+    """按内容路径读取本机文件，抽查若干分块的哈希"""
+
+    def __init__(self, samples: int = 8, path_mapper=None, rng: Optional[random.Random] = None, cache=None):
+        """
+        :param samples: 每个种子抽查的随机分块数（另有同样数量上限的边界分块）
+        :param path_mapper: qBittorrent 路径到本机路径的映射（utils.preflight.PathMapper）
+        :param cache: 校验结果缓存（utils.verify_cache.VerifyCache），已抽查或完整校验过且未改动的文件不再读取
+        """
+        self.samples = samples
+        self.path_mapper = path_mapper
+        self.rng = rng or random.Random()
+        self.cache = cache
+
+    def check(self, content_path: str, torrent_data: bytes) -> Optional[str]:
+        """
+        抽查种子的内容，通过时返回 None，否则返回问题说明。
+
+        :param content_path: qBittorrent 中的内容路径（单文件种子为文件本身，多文件种子为其所在目录）
+        :param torrent_data: .torrent 文件内容
+        """
+        root = self.path_mapper.map(content_path) if self.path_mapper is not None else content_path
+        lookup = self.cache.lookup(torrent_data, root, self.cache.SPOT) if self.cache is not None else None
+        skip = lookup.hits if lookup is not None else set()
+        read = set()  # 抽查过并且通过的文件
+        layout = TorrentLayout.from_torrent(torrent_data)
+        if layout is None:
+            v2_layout = V2Layout.from_torrent(torrent_data)
+            problem = self._check_v2(v2_layout, root, skip, read) if v2_layout is not None else None
+        else:
+            problem = self._check_v1(layout, root, skip, read)
+        if problem is None and lookup is not None:
+            self.cache.store(lookup, self.cache.SPOT, read)
+        return problem
+
+    def _check_v1(self, layout: TorrentLayout, root: str, skip, read) -> Optional[str]:
+        handles = {}
+        try:
+            for index in choose_pieces(layout, self.samples, self.rng):
+                start = index * layout.piece_length
+                end = min(start + layout.piece_length, layout.total_length)
+                paths = {_local_path(root, layout.single_file, f.parts)
+                         for f in _overlapping_files(layout.files, start, end) if not f.padding}
+                if paths <= skip:
+                    continue  # 只涉及已校验过的文件
+                problem = self._check_piece(layout, root, index, handles)
+                if problem:
+                    return problem
+        finally:
+            for handle in handles.values():
+                if handle is not None:
+                    handle.close()
+        read.update(handles)
+        return None
+
+    @staticmethod
+    def _check_piece(layout: TorrentLayout, root: str, index: int, handles) -> Optional[str]:
+        start = index * layout.piece_length
+        end = min(start + layout.piece_length, layout.total_length)
+        sha1 = hashlib.sha1()
+        for f in _overlapping_files(layout.files, start, end):
+            begin = max(start, f.offset) - f.offset
+            length = min(end, f.offset + f.length) - f.offset - begin
+            if f.padding:
+                sha1.update(bytes(length))
+                continue
+            path = _local_path(root, layout.single_file, f.parts)
+            if path not in handles:
+                try:
+                    handles[path] = open(path, 'rb')
+                except OSError as e:
+                    handles[path] = None
+                    return f"无法读取文件 {path}: {e.strerror or e}"
+            handle = handles[path]
+            if handle is None:
+                return f"无法读取文件 {path}"
+            handle.seek(begin)
+            data = handle.read(length)
+            if len(data) != length:
+                return f"文件 {path} 的长度不足"
+            sha1.update(data)
+        expected = layout.piece_hashes[index * PIECE_HASH_SIZE:(index + 1) * PIECE_HASH_SIZE]
+        if sha1.digest() != expected:
+            return f"第 {index} 个分块的哈希不匹配"
+        return None
+
+    def _check_v2(self, layout: V2Layout, root: str, skip, read) -> Optional[str]:
+        files = [f for f in layout.files if f.length and _local_path(root, layout.single_file, f.parts) not in skip]
+        if not files or self.samples <= 0:
+            return None
+        # 与 v1 相同：最多 samples 个边界分块（各文件首尾），再加在全部分块中随机抽取的 samples 个分块
+        boundary = []
+        for i, f in enumerate(files):
+            boundary += [(i, 0), (i, layout.piece_count(f) - 1)]
+        chosen = list(dict.fromkeys(boundary))[:max(2, self.samples)]
+        ends = list(accumulate(layout.piece_count(f) for f in files))
+        for n in self.rng.sample(range(ends[-1]), min(self.samples, ends[-1])):
+            i = bisect_right(ends, n)
+            chosen.append((i, n - (ends[i - 1] if i else 0)))
+        for i, index in sorted(set(chosen)):
+            f = files[i]
+            path = _local_path(root, layout.single_file, f.parts)
+            checked, problem = _check_v2_piece(layout, f, path, index)
+            if problem:
+                return problem
+            if checked:
+                read.add(path)  # 只缓存确实读取并核对过的文件
+        return None
+
+
+def _check_v2_piece(layout: V2Layout, f, path: str, index: int) -> Tuple[bool, Optional[str]]:
+    """
+    抽查 v2 种子中一个文件的一个分块。
+
+    :return: (是否读取并核对了分块, 问题描述)；种子中缺少大文件的分块层时无法单独校验分块，返回 (False, None)
+    """
+    start = index * layout.piece_length
+    length = min(layout.piece_length, f.length - start)
+    if f.piece_layer:
+        expected = f.piece_layer[index * HASH_SIZE:(index + 1) * HASH_SIZE]
+    elif f.length <= layout.piece_length:
+        expected = f.pieces_root
+    else:
+        return False, None
+    try:
+        with open(path, 'rb') as handle:
+            handle.seek(start)
+            data = handle.read(length)
+    except OSError as e:
+        return True, f"无法读取文件 {path}: {e.strerror or e}"
+    if len(data) != length:
+        return True, f"文件 {path} 的长度不足"
+    actual = piece_hash(data, layout.piece_length) if f.piece_layer else small_file_root(data)
+    if actual != expected:
+        return True, f"文件 {path} 的第 {index} 个分块哈希不匹配"
+    return True, None
+
+
+def _overlapping_files(files: Sequence[TorrentFile], start: int, end: int):
+    for f in files:
+        if f.offset < end and f.offset + f.length > start and f.length:
+            yield f
+
+
+def _local_path(root: str, single_file: bool, parts) -> str:
+    return root if single_file else os.path.join(root, *parts)
+
+
+def _text(value) -> str:
+    return value.decode('utf-8', 'surrogateescape') if isinstance(value, (bytes, bytearray)) else str(value)
@@ -0,0 +1,79 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import qbittorrentapi
+
+# status_filter='paused' 对应的种子状态，qBittorrent v5 起 paused 更名为 stopped
+PAUSED_STATES = frozenset({"pausedUP", "pausedDL", "stoppedUP", "stoppedDL"})
+
+
+class TorrentStateCache:
+    """
+    本地种子状态缓存，通过 sync/maindata 的 rid 增量接口保持最新。
+
+    首次刷新获取完整列表，之后每次刷新只传输发生变化的字段和被删除的 hash，
+    适合在种子数量很多、需要反复刷新列表的场景中代替 torrents_info()。
+    """
+
+    def __init__(self, client: qbittorrentapi.Client):
+        self.client = client
+        self.rid = 0
+        self._torrents: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Tuple[Set[str], Set[str]]:
+        """
+        拉取自上次刷新以来的变化并合并到本地缓存。
+
+        :return: (有变化的 hash 集合, 被删除的 hash 集合)
+        """
+        with self._lock:
+            data = self.client.sync_maindata(rid=self.rid)
+            if data.get('full_update'):
+                self._torrents.clear()
+
+            changed = set()
+            for torrent_hash, changes in (data.get('torrents') or {}).items():
+                entry = self._torrents.setdefault(torrent_hash, {'hash': torrent_hash})
+                entry.update(changes)
+                changed.add(torrent_hash)
+
+            removed = set(data.get('torrents_removed') or [])
+            for torrent_hash in removed:
+                self._torrents.pop(torrent_hash, None)
+
+            self.rid = data.get('rid', self.rid)
+            return changed, removed
+
+    def torrents(self, torrent_hashes: Optional[Iterable[str]] = None) -> List[qbittorrentapi.TorrentDictionary]:
+        """返回缓存中的种子（可按 hash 过滤），与 torrents_info() 的返回值用法一致"""
+        with self._lock:
+            if torrent_hashes is None:
+                entries = list(self._torrents.values())
+            else:
+                entries = [self._torrents[h] for h in torrent_hashes if h in self._torrents]
+            return [qbittorrentapi.TorrentDictionary(dict(e), self.client) for e in entries]
+
+    def filter(self, status_filter: Optional[str] = None, tag: Optional[str] = None,
+               category: Optional[str] = None) -> List[qbittorrentapi.TorrentDictionary]:
+        """在本地缓存中按状态、标签、分类筛选种子，目前状态只支持 paused/stopped"""
+        if status_filter not in (None, "paused", "stopped"):
+            raise ValueError(f"不支持的状态筛选: {status_filter}")
+        result = []
+        for torrent in self.torrents():
+            if status_filter in ("paused", "stopped") and torrent.get('state') not in PAUSED_STATES:
+                continue
+            if tag is not None and tag not in split_tags(torrent.get('tags', '')):
+                continue
+            if category is not None and torrent.get('category') != category:
+                continue
+            result.append(torrent)
+        return result
+
+    def __len__(self):
+        return len(self._torrents)
+
+
+def split_tags(tags: str) -> List[str]:
+    """qBittorrent 以 “, ” 分隔的标签字符串转为列表"""
+    return [t.strip() for t in tags.split(',') if t.strip()]
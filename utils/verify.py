@@ -0,0 +1,340 @@
+"""
+本地完整校验：用进程池并行计算种子全部分块的哈希，速度取决于磁盘带宽，而不是 qBittorrent 的单线程校验。
+
+v1 种子的分块按连续区间分给各子进程，子进程通过内存映射读取文件（并提示内核顺序预读），
+跨越多个文件的分块按文件顺序拼接计算 SHA-1。v2 及混合种子改用各文件的 merkle 树（SHA-256）
+逐个文件校验，大文件按分块区间拆开并行，小文件合并成批，已确认完好的文件可以跳过不读。
+校验结果按文件汇总，便于定位损坏或缺失的文件。
+"""
+import hashlib
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.merkle import HASH_SIZE, V2Layout, layer_root, piece_hash, small_file_root
+from utils.spot_check import PIECE_HASH_SIZE, TorrentLayout
+
+# 每个子任务校验的数据量，过小时进程间通信开销占比高，过大时负载不均
+CHUNK_BYTES = 64 << 20
+
+_FILE, _PADDING, _BAD, _SKIP = 0, 1, 2, 3
+
+
+@dataclass
+class VerifyResult:
+    """一个种子的校验结果"""
+    supported: bool = True
+    pieces: int = 0
+    failed_pieces: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    problems: Dict[str, str] = field(default_factory=dict)  # 文件路径 -> 问题说明
+    files: Dict[str, bool] = field(default_factory=dict)  # 文件路径 -> 是否确认完好（含跳过的文件）
+    merkle: bool = False  # 按 v2 merkle 树逐个文件校验
+    cached: int = 0  # 复用校验缓存、没有重新读取的文件数
+
+    @property
+    def ok(self) -> bool:
+        return self.supported and not self.failed_pieces and not self.problems
+
+    @property
+    def speed(self) -> float:
+        """校验速度（字节/秒）"""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class VerifyEngine:
+    """多进程完整校验，同一个引擎可依次（或在多个线程中同时）校验多个种子"""
+
+    def __init__(self, processes: Optional[int] = None, path_mapper=None, chunk_bytes: int = CHUNK_BYTES, cache=None):
+        """
+        :param processes: 子进程数，为空时按 CPU 核数
+        :param path_mapper: qBittorrent 路径到本机路径的映射（utils.preflight.PathMapper）
+        :param chunk_bytes: 每个子任务校验的数据量
+        :param cache: 校验结果缓存（utils.verify_cache.VerifyCache），跳过已校验且未改动的文件并记录新的结果
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.path_mapper = path_mapper
+        self.chunk_bytes = chunk_bytes
+        self.cache = cache
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def verify(self, content_path: str, torrent_data: bytes, skip: Iterable[str] = ()) -> VerifyResult:
+        """
+        校验种子的全部内容，v2 及混合种子按文件用 merkle 树校验，其余按 v1 分块校验。
+
+        :param content_path: qBittorrent 中的内容路径（单文件种子为文件本身，多文件种子为其所在目录）
+        :param torrent_data: .torrent 文件内容
+        :param skip: 已确认完好、不需要再读取的文件（本机路径）；v1 种子中与其他文件共用的分块仍会读取
+        """
+        start = time.perf_counter()
+        root = self.path_mapper.map(content_path) if self.path_mapper is not None else content_path
+        skip = set(skip)
+        lookup = None
+        if self.cache is not None:
+            lookup = self.cache.lookup(torrent_data, root, self.cache.FULL)
+            skip |= lookup.hits
+        v2_layout = V2Layout.from_torrent(torrent_data)
+        if v2_layout is not None:
+            result = self._verify_v2(v2_layout, root, skip)
+        else:
+            layout = TorrentLayout.from_torrent(torrent_data)
+            if layout is None:
+                return VerifyResult(supported=False)
+            result = self._verify_v1(layout, root, skip)
+        if lookup is not None:
+            result.cached = len(lookup.hits)
+            self.cache.store(lookup, self.cache.FULL, [path for path, ok in result.files.items() if ok and path not in skip])
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _verify_v1(self, layout: TorrentLayout, root: str, skip) -> VerifyResult:
+        result = VerifyResult(pieces=layout.piece_count)
+        files = []  # (路径, 偏移, 长度, 类型)，与 layout.files 一一对应
+        for f in layout.files:
+            path = root if layout.single_file else os.path.join(root, *f.parts)
+            if f.padding:
+                files.append((path, f.offset, f.length, _PADDING))
+                continue
+            if path in skip:
+                files.append((path, f.offset, f.length, _SKIP))
+                continue
+            problem = _check_size(path, f.length)
+            if problem:
+                result.problems[path] = problem
+            else:
+                result.bytes += f.length
+            files.append((path, f.offset, f.length, _BAD if problem else _FILE))
+
+        failed = []
+        for pieces in self._map(_hash_pieces, self._tasks(layout, files)):
+            failed += pieces
+        result.failed_pieces = len(failed)
+
+        # 不匹配的分块按文件汇总；涉及缺失或长度不足文件的分块已由该文件报告，不再归到其他文件
+        per_file = {}
+        unconfirmed = set()  # 与不匹配的分块重叠的文件，即使没有归咎于它也不能确认完好
+        for index in failed:
+            overlapping = _overlapping(files, *_piece_range(layout, index))
+            unconfirmed.update(path for path, _, _, kind in overlapping if kind == _FILE)
+            if any(kind == _BAD for _, _, _, kind in overlapping):
+                continue
+            for path, _, _, kind in overlapping:
+                if kind == _FILE:
+                    per_file[path] = per_file.get(path, 0) + 1
+        for path, count in per_file.items():
+            result.problems.setdefault(path, f"{count} 个分块的哈希不匹配")
+        for path, _, _, kind in files:
+            if kind != _PADDING:
+                result.files[path] = path not in result.problems and path not in unconfirmed
+        return result
+
+    def _verify_v2(self, layout: V2Layout, root: str, skip) -> VerifyResult:
+        result = VerifyResult(merkle=True)
+        per_task = max(1, self.chunk_bytes // layout.piece_length)
+        items = []  # (路径, 长度, 分块大小, 起始分块, 结束分块, 期望哈希)，起始分块为 None 时按整个文件的 pieces root 校验
+        counts = {}
+        for f in layout.files:
+            path = root if layout.single_file else os.path.join(root, *f.parts)
+            count = layout.piece_count(f)
+            counts[path] = count
+            result.pieces += count
+            if path in skip or not f.length:
+                result.files[path] = True
+                continue
+            problem = _check_size(path, f.length)
+            if problem is None and len(f.pieces_root) != HASH_SIZE:
+                problem = "种子中缺少该文件的 pieces root"
+            if problem is None and f.piece_layer and (len(f.piece_layer) != count * HASH_SIZE
+                                                      or layer_root(f.piece_layer, layout.piece_length) != f.pieces_root):
+                problem = "种子中该文件的分块层哈希与 pieces root 不符"
+            if problem:
+                result.problems[path] = problem
+                result.failed_pieces += count
+                result.files[path] = False
+                continue
+            result.bytes += f.length
+            if f.piece_layer:
+                for first in range(0, count, per_task):
+                    last = min(first + per_task, count)
+                    items.append((path, f.length, layout.piece_length, first, last,
+                                  f.piece_layer[first * HASH_SIZE:last * HASH_SIZE]))
+            else:
+                # 不超过一个分块的文件没有分块层，缺少分块层的大文件也只能整体校验
+                items.append((path, f.length, layout.piece_length, None, count, f.pieces_root))
+
+        per_file = {}
+        for task_result in self._map(_hash_files, self._batch(items)):
+            for path, failed in task_result:
+                per_file[path] = per_file.get(path, 0) + failed
+        for path, failed in per_file.items():
+            result.files[path] = not failed
+            if failed:
+                result.failed_pieces += failed
+                result.problems[path] = f"{failed}/{counts[path]} 个分块的哈希不匹配"
+        return result
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _tasks(self, layout: TorrentLayout, files) -> List[Tuple]:
+        """把分块按连续区间切分为子任务，每个任务只携带与其重叠的文件"""
+        per_task = max(1, self.chunk_bytes // layout.piece_length)
+        tasks = []
+        for first in range(0, layout.piece_count, per_task):
+            last = min(first + per_task, layout.piece_count)
+            start, _ = _piece_range(layout, first)
+            _, end = _piece_range(layout, last - 1)
+            tasks.append((first, last, layout.piece_length, layout.total_length,
+                          layout.piece_hashes[first * PIECE_HASH_SIZE:last * PIECE_HASH_SIZE],
+                          list(_overlapping(files, start, end))))
+        return tasks
+
+    def _batch(self, items) -> List[List[Tuple]]:
+        """把 v2 校验条目合并为子任务，每个子任务的数据量不超过 chunk_bytes（单个条目超过时独占一个任务）"""
+        tasks, current, size = [], [], 0
+        for item in items:
+            path, length, piece_length, first, last, _ = item
+            item_size = length if first is None else min(length, last * piece_length) - first * piece_length
+            if current and size + item_size > self.chunk_bytes:
+                tasks.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += item_size
+        if current:
+            tasks.append(current)
+        return tasks
+
+    def _map(self, func, tasks):
+        if self.processes <= 1 or len(tasks) <= 1:
+            return map(func, tasks)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes)
+            executor = self._executor
+        return executor.map(func, tasks)
+
+
+def _hash_pieces(task) -> List[int]:
+    """子进程：校验一段连续的分块，返回不匹配的分块序号"""
+    first, last, piece_length, total_length, hashes, files = task
+    task_start, task_end = first * piece_length, min(last * piece_length, total_length)
+    maps = {}
+    failed = []
+    try:
+        j = 0
+        for index in range(first, last):
+            start = index * piece_length
+            end = min(start + piece_length, total_length)
+            while j < len(files) and files[j][1] + files[j][2] <= start:
+                j += 1
+            segments = []
+            k = j
+            while k < len(files) and files[k][1] < end:
+                path, offset, length, kind = files[k]
+                k += 1
+                begin, stop = max(start, offset) - offset, min(end, offset + length) - offset
+                if stop > begin:
+                    segments.append((path, offset, begin, stop, kind))
+            kinds = {kind for _, _, _, _, kind in segments}
+            if _BAD in kinds:
+                failed.append(index)
+                continue
+            if _FILE not in kinds:
+                continue  # 只涉及已确认完好的文件（及填充文件），不再读取
+            sha1 = hashlib.sha1()
+            for path, offset, begin, stop, kind in segments:
+                if kind == _PADDING:
+                    sha1.update(bytes(stop - begin))
+                    continue
+                if path not in maps:
+                    maps[path] = _open_map(path, max(task_start - offset, 0), task_end - offset)
+                sha1.update(maps[path][begin:stop])
+            offset = (index - first) * PIECE_HASH_SIZE
+            if sha1.digest() != hashes[offset:offset + PIECE_HASH_SIZE]:
+                failed.append(index)
+    finally:
+        for m in maps.values():
+            m.close()
+    return failed
+
+
+def _hash_files(items) -> List[Tuple[str, int]]:
+    """子进程：按 merkle 树校验若干 v2 文件或文件中的一段分块，返回 [(路径, 不匹配的分块数)]"""
+    results = []
+    for path, length, piece_length, first, last, expected in items:
+        m = _open_map(path, 0, length) if first is None else \
+            _open_map(path, first * piece_length, min(last * piece_length, length))
+        try:
+            if first is None:
+                if length <= piece_length:
+                    actual = small_file_root(m[:length])
+                else:
+                    layer = b''.join(piece_hash(m[start:min(start + piece_length, length)], piece_length)
+                                     for start in range(0, length, piece_length))
+                    actual = layer_root(layer, piece_length)
+                results.append((path, 0 if actual == expected else last))
+                continue
+            failed = 0
+            for index in range(first, last):
+                start = index * piece_length
+                offset = (index - first) * HASH_SIZE
+                if piece_hash(m[start:min(start + piece_length, length)], piece_length) != expected[offset:offset + HASH_SIZE]:
+                    failed += 1
+            results.append((path, failed))
+        finally:
+            m.close()
+    return results
+
+
+def _open_map(path: str, start: int, stop: int) -> mmap.mmap:
+    """
+    只读映射整个文件，并提示内核本任务将顺序读取 [start, stop) 这一段。
+
+    一个大文件会拆成多个任务分给不同进程，每个任务只预读自己要校验的那一段，
+    避免每个进程都让内核预读整个文件、互相挤占页缓存。
+    """
+    with open(path, 'rb') as f:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # Windows 等不支持 madvise 的平台跳过
+    if hasattr(m, 'madvise'):
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            m.madvise(mmap.MADV_SEQUENTIAL)
+        start = start // mmap.PAGESIZE * mmap.PAGESIZE  # madvise 的起点需要按页对齐
+        stop = min(stop, len(m))
+        if hasattr(mmap, 'MADV_WILLNEED') and stop > start:
+            m.madvise(mmap.MADV_WILLNEED, start, stop - start)
+    return m
+
+
+def _check_size(path: str, length: int) -> Optional[str]:
+    try:
+        size = os.stat(path).st_size
+    except OSError:
+        return "文件不存在或无法访问"
+    if size < length:
+        return f"文件长度不足（本机 {size} 字节，种子中 {length} 字节）"
+    return None
+
+
+def _piece_range(layout: TorrentLayout, index: int) -> Tuple[int, int]:
+    start = index * layout.piece_length
+    return start, min(start + layout.piece_length, layout.total_length)
+
+
+def _overlapping(files, start: int, end: int):
+    return [f for f in files if f[1] < end and f[1] + f[2] > start and f[2]]
@@ -0,0 +1,158 @@
+"""
+校验结果缓存（SQLite）：记录本机文件在某个种子中通过分块抽查或完整校验的结果。
+IYUU 辅种时同一份文件往往对应多个种子，之后校验这些种子时直接复用结果，不再重复读取文件。
+
+缓存以文件路径和“期望内容指纹”为键：指纹由种子中覆盖该文件的分块哈希计算（v2 种子为 pieces root），
+只有期望的内容完全相同时才会复用。每条记录保存校验前文件的大小、修改时间和 inode，
+三者任一变化即视为文件已被修改，记录失效。记录数超过上限时按最近使用时间淘汰。
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from utils.merkle import V2Layout
+from utils.spot_check import PIECE_HASH_SIZE, TorrentLayout
+
+Identity = Tuple[int, int, int]  # (大小, 修改时间（纳秒）, inode)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verified (
+    path TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (path, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS verified_last_used ON verified (last_used);
+"""
+
+
+def file_fingerprints(torrent_data: bytes, root: str) -> Dict[str, str]:
+    """
+    计算种子中每个文件的期望内容指纹，返回 {本机路径: 指纹}，没有分块哈希的种子返回空字典。
+
+    v1 种子的指纹包含分块大小、文件在首个分块中的偏移、文件长度和与文件重叠的全部分块哈希，
+    跨文件的分块只有在所涉及的文件都已确认完好时才会被跳过，因此复用结果不会放过其中任何一个文件的错误。
+
+    :param root: 本机的内容路径（单文件种子为文件本身，多文件种子为其所在目录）
+    """
+    v2_layout = V2Layout.from_torrent(torrent_data)
+    if v2_layout is not None:
+        return {_local_path(root, v2_layout.single_file, f.parts): f"v2:{f.length}:{f.pieces_root.hex()}"
+                for f in v2_layout.files if f.length}
+    layout = TorrentLayout.from_torrent(torrent_data)
+    if layout is None:
+        return {}
+    fingerprints = {}
+    piece_length = layout.piece_length
+    for f in layout.files:
+        if f.padding or not f.length:
+            continue
+        first, last = f.offset // piece_length, (f.offset + f.length - 1) // piece_length
+        digest = hashlib.sha1(layout.piece_hashes[first * PIECE_HASH_SIZE:(last + 1) * PIECE_HASH_SIZE]).hexdigest()
+        fingerprints[_local_path(root, layout.single_file, f.parts)] = \
+            f"v1:{piece_length}:{f.offset % piece_length}:{f.length}:{digest}"
+    return fingerprints
+
+
+@dataclass
+class CacheLookup:
+    """一个种子的查询结果，校验后原样传给 VerifyCache.store"""
+    fingerprints: Dict[str, str] = field(default_factory=dict)  # 本机路径 -> 期望内容指纹
+    identities: Dict[str, Identity] = field(default_factory=dict)  # 读取文件前获取的文件身份
+    hits: Set[str] = field(default_factory=set)  # 已通过校验、之后没有改动过的文件
+
+
+class VerifyCache:
+    """线程安全的校验结果缓存，多个进程可共用同一个数据库文件"""
+
+    # 校验级别：完整校验的结果也可用于抽查，反之不行
+    SPOT = 1
+    FULL = 2
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        """
+        :param path: SQLite 数据库文件
+        :param max_entries: 最多保留的记录数，超过时淘汰最久未使用的记录
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.lookups = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def lookup(self, torrent_data: bytes, root: str, level: int) -> CacheLookup:
+        """
+        查找种子中已按相同指纹通过校验（且级别不低于 level）、之后没有改动过的文件。
+
+        :param root: 本机的内容路径（单文件种子为文件本身，多文件种子为其所在目录）
+        """
+        result = CacheLookup(file_fingerprints(torrent_data, root))
+        for path in result.fingerprints:
+            identity = _identity(path)
+            if identity is not None:
+                result.identities[path] = identity
+        now = time.time()
+        with self._lock, self._conn:
+            for path, fingerprint in result.fingerprints.items():
+                row = self._conn.execute("SELECT size, mtime_ns, inode, level FROM verified "
+                                         "WHERE path = ? AND fingerprint = ?", (path, fingerprint)).fetchone()
+                if row is None:
+                    continue
+                if result.identities.get(path) != tuple(row[:3]):
+                    # 文件已被修改、替换或删除
+                    self._conn.execute("DELETE FROM verified WHERE path = ? AND fingerprint = ?", (path, fingerprint))
+                elif row[3] >= level:
+                    result.hits.add(path)
+                    self._conn.execute("UPDATE verified SET last_used = ? WHERE path = ? AND fingerprint = ?",
+                                       (now, path, fingerprint))
+            self.lookups += len(result.fingerprints)
+            self.hits += len(result.hits)
+        return result
+
+    def store(self, lookup: CacheLookup, level: int, paths: Iterable[str]):
+        """记录 paths 中的文件已通过校验，文件身份使用查询时（读取文件前）获取的值"""
+        now = time.time()
+        rows = [(path, lookup.fingerprints[path], *lookup.identities[path], level, now)
+                for path in paths if path in lookup.fingerprints and path in lookup.identities]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            # 文件没有改动时保留更高的校验级别（如先完整校验、后又抽查）
+            self._conn.executemany(
+                "INSERT INTO verified (path, fingerprint, size, mtime_ns, inode, level, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (path, fingerprint) DO UPDATE SET "
+                "level = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns AND inode = excluded.inode "
+                "THEN MAX(level, excluded.level) ELSE excluded.level END, "
+                "size = excluded.size, mtime_ns = excluded.mtime_ns, inode = excluded.inode, "
+                "last_used = excluded.last_used", rows)
+            excess = self._conn.execute("SELECT COUNT(*) FROM verified").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute("DELETE FROM verified WHERE rowid IN "
+                                   "(SELECT rowid FROM verified ORDER BY last_used LIMIT ?)", (excess,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _identity(path: str) -> Optional[Identity]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def _local_path(root: str, single_file: bool, parts) -> str:
+    return root if single_file else os.path.join(root, *parts)